@@ -0,0 +1,74 @@
+"""
+Benchmark of the extract paths of PostgresConnectorContextManager: pd.read_sql, get_data_sql (fetchall)
+and get_data_sql_copy (COPY TO STDOUT parsed by Arrow), on a generated result with integer, numeric,
+float, date, timestamp and text columns.
+
+Usage (from the "PyTest DQ Framework" folder):
+    python -m benchmarks.benchmark_copy_extract --db_user=myuser --db_password=mypassword --rows 100000 1000000
+"""
+
+import argparse
+import time
+import warnings
+
+import pandas as pd
+
+from src.connectors.postgres.postgres_connector import PostgresConnectorContextManager
+
+BENCHMARK_QUERY = """
+select
+    i as id,
+    (i % 1000)::numeric(12, 2) / 7 as treatment_cost,
+    random() as score,
+    date '2000-01-01' + i % 3650 as visit_date,
+    timestamp '2000-01-01' + i * interval '1 minute' as visit_timestamp,
+    'facility ' || i % 100 as facility_name
+from generate_series(1, {rows}) as i
+"""
+
+
+def time_extract(extract, repeat):
+    """
+    Return the best duration of repeat runs of an extract function and the number of rows it returned.
+    """
+    best = None
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = len(extract())
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+    return best, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pd.read_sql, fetchall and COPY extracts.")
+    parser.add_argument("--db_host", default="localhost", help="Database host")
+    parser.add_argument("--db_name", default="mydatabase", help="Database name")
+    parser.add_argument("--db_port", default="5434", help="Database port")
+    parser.add_argument("--db_user", required=True, help="Database user")
+    parser.add_argument("--db_password", required=True, help="Database password")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 1000000], help="Result sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per extract, the best one is reported")
+    args = parser.parse_args()
+
+    # pd.read_sql warns about psycopg2 connections on every call
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    print(f"{'rows':>10} | {'read_sql, s':>11} | {'fetchall, s':>11} | {'copy, s':>8} | {'vs read_sql':>11} | "
+          f"{'vs fetchall':>11}")
+    with PostgresConnectorContextManager(
+            db_host=args.db_host, db_name=args.db_name, db_port=args.db_port,
+            db_user=args.db_user, db_password=args.db_password) as db_connector:
+        for rows in args.rows:
+            query = BENCHMARK_QUERY.format(rows=rows)
+            read_sql, _ = time_extract(lambda: pd.read_sql(query, db_connector.conn), args.repeat)
+            fetchall, _ = time_extract(lambda: db_connector.get_data_sql(query), args.repeat)
+            copy, copy_rows = time_extract(lambda: db_connector.get_data_sql_copy(query), args.repeat)
+            assert copy_rows == rows
+            print(f"{rows:>10} | {read_sql:>11.3f} | {fetchall:>11.3f} | {copy:>8.3f} | {read_sql / copy:>10.1f}x | "
+                  f"{fetchall / copy:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark of the DuckDB engine against the pandas engine (ParquetReader + CheckPlan.profile + HashReconciler)
+on the exported parquet datasets: every dataset is profiled for nulls, duplicate rows and min/max of its
+numeric columns, and diffed against a snapshot of itself with one row missing and one row duplicated.
+The results of both engines are asserted to be identical.
+
+Usage (from the "PyTest DQ Framework" folder):
+    python -m benchmarks.benchmark_duckdb_engine --path ../generated_parquet_data
+"""
+
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from src.connectors.file_system.duckdb_engine import DuckDBEngine
+from src.connectors.file_system.parquet_reader import ParquetReader
+from src.data_quality.check_plan import CheckPlan
+from src.data_quality.reconciliation import HashReconciler, SIDE_COLUMN
+
+
+def check_plan(df):
+    numeric = df.select_dtypes("number").columns
+    return CheckPlan(not_null_columns=list(df.columns), duplicate_keys=[None],
+                     column_rules={name: {"min": 0} for name in numeric})
+
+
+def snapshot(df):
+    """
+    The dataset shuffled, without its first row and with its last row twice.
+    """
+    changed = pd.concat([df.iloc[1:], df.iloc[-1:]], ignore_index=True)
+    return changed.sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+def summary(profile, df_diff):
+    return {
+        "rows": profile.row_count,
+        "nulls": profile.null_counts,
+        "duplicates": {key: (r.duplicate_groups, r.duplicated_rows, r.largest_group)
+                       for key, r in profile.duplicate_reports.items()},
+        "minimums": {name: float(value) for name, value in profile.minimums.items()},
+        "maximums": {name: float(value) for name, value in profile.maximums.items()},
+        "invalid": profile.invalid_counts,
+        "diff": df_diff[SIDE_COLUMN].value_counts().to_dict(),
+    }
+
+
+def run_pandas(path, plan, source):
+    target = ParquetReader().read_partitioned(path, columns=list(source.columns))
+    profile = plan.profile(target)
+    return summary(profile, HashReconciler.diff(source, target, df1_name="source", df2_name="target"))
+
+
+def run_duckdb(engine, path, plan, source):
+    target = engine.load(path, recursive=True, columns=list(source.columns))
+    profile = plan.profile(target)
+    return summary(profile, engine.diff(source, target, df1_name="source", df2_name="target"))
+
+
+def best_of(run, repeat):
+    """
+    Return the best duration of repeat runs and the result of the last one.
+    """
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DuckDBEngine against the pandas engine.")
+    parser.add_argument("--path", default="../generated_parquet_data", help="Folder with the parquet datasets")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per engine, the best one is reported")
+    parser.add_argument("--threads", type=int, default=0, help="DuckDB threads, 0 for all cores")
+    args = parser.parse_args()
+
+    datasets = sorted(d for d in os.listdir(args.path) if os.path.isdir(os.path.join(args.path, d)))
+    engine = DuckDBEngine(threads=args.threads or None)
+
+    print(f"{'dataset':<46} | {'rows':>7} | {'pandas, s':>9} | {'duckdb, s':>9} | {'speed-up':>8}")
+    with engine:
+        for dataset in datasets:
+            path = os.path.join(args.path, dataset)
+            data = ParquetReader().read_partitioned(path)
+            source = snapshot(data)
+            plan = check_plan(source)
+            pandas_time, pandas_result = best_of(lambda: run_pandas(path, plan, source), args.repeat)
+            duckdb_time, duckdb_result = best_of(lambda: run_duckdb(engine, path, plan, source), args.repeat)
+            assert pandas_result == duckdb_result, f"{dataset}:\n{pandas_result}\n!=\n{duckdb_result}"
+            print(f"{dataset:<46} | {len(data):>7} | {pandas_time:>9.3f} | {duckdb_time:>9.3f} | "
+                  f"{pandas_time / duckdb_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
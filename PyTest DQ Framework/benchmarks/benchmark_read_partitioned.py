@@ -0,0 +1,68 @@
+"""
+Benchmark of ParquetReader.read_partitioned against the previous implementation
+(os.walk, one pd.read_parquet per file and a final pd.concat) on the exported parquet datasets.
+
+Usage (from the "PyTest DQ Framework" folder):
+    python -m benchmarks.benchmark_read_partitioned --path ../generated_parquet_data
+"""
+
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from src.connectors.file_system.parquet_reader import ParquetReader
+
+
+def read_partitioned_per_file(path):
+    """
+    The previous read_partitioned: serial per-file reads concatenated at the end.
+    """
+    parquet_files = []
+    for root, _, files in os.walk(path):
+        for f in files:
+            if f.lower().endswith(".parquet"):
+                parquet_files.append(os.path.join(root, f))
+    return pd.concat([pd.read_parquet(f) for f in parquet_files], ignore_index=True)
+
+
+def time_read(read, repeat):
+    """
+    Return the best duration of repeat runs of a read function and the number of rows it returned.
+    """
+    best = None
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = len(read())
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+    return best, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ParquetReader.read_partitioned.")
+    parser.add_argument("--path", default="../generated_parquet_data", help="Folder with the parquet datasets")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per read, the best one is reported")
+    args = parser.parse_args()
+
+    datasets = sorted(d for d in os.listdir(args.path) if os.path.isdir(os.path.join(args.path, d)))
+    paths = [os.path.join(args.path, d) for d in datasets]
+    reader = ParquetReader()
+    single_thread_reader = ParquetReader(use_threads=False)
+
+    print(f"{'dataset':<46} | {'files':>5} | {'rows':>7} | {'per file, s':>11} | {'dataset 1 thread, s':>19} | "
+          f"{'dataset, s':>10} | {'speed-up':>8}")
+    for path in paths:
+        files = sum(f.endswith(".parquet") for _, _, fs in os.walk(path) for f in fs)
+        per_file, rows = time_read(lambda: read_partitioned_per_file(path), args.repeat)
+        single_thread, _ = time_read(lambda: single_thread_reader.read_partitioned(path), args.repeat)
+        threaded, dataset_rows = time_read(lambda: reader.read_partitioned(path), args.repeat)
+        assert rows == dataset_rows
+        print(f"{os.path.basename(path):<46} | {files:>5} | {rows:>7} | {per_file:>11.3f} | {single_thread:>19.3f} | "
+              f"{threaded:>10.3f} | {per_file / threaded:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+import uuid
+from typing import Iterable, Optional
+
+import pyarrow as pa
+
+
+class ArrowIPCCache:
+    """
+    On-disk cache of decoded Arrow tables, stored as Arrow IPC (Feather v2) files and read back memory-mapped.
+    Entries are keyed by the source of the table, e.g. the files with their mtimes and sizes, so a changed
+    source never hits a stale entry. The least recently used entries are evicted once the cache exceeds max_bytes.
+    """
+    SUFFIX = ".arrow"
+
+    def __init__(self, cache_dir: str, max_bytes: int = 1024 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def hash_key(**parts) -> str:
+        """
+        Build a key from JSON-serializable parts.
+        """
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @classmethod
+    def make_key(cls, files: Iterable[str], **options) -> str:
+        """
+        Build the key of the files, their mtimes and sizes, and any read options (columns, filters, ...).
+        """
+        fingerprint = []
+        for path in sorted(files):
+            stat = os.stat(path)
+            fingerprint.append((os.path.abspath(path), stat.st_mtime_ns, stat.st_size))
+        return cls.hash_key(files=fingerprint, options=options)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+    def get(self, key: str) -> Optional[pa.Table]:
+        """
+        Return the cached table, memory-mapped without copying, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            # The buffers of the table keep the mapped region alive after the file is closed
+            with pa.memory_map(path, "r") as source:
+                # The modification time of an entry is its last use for the LRU eviction
+                os.utime(path)
+                return pa.ipc.open_file(source).read_all()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, table: pa.Table) -> None:
+        """
+        Store a table uncompressed, so it can be memory-mapped, then evict entries over max_bytes.
+        """
+        path = self._path(key)
+        temporary_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with pa.OSFile(temporary_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(temporary_path, path)
+        self.evict(keep=key)
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """
+        Delete the least recently used entries until the cache fits into max_bytes. Returns the freed bytes.
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(self.SUFFIX):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime_ns, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for _, size, name in sorted(entries):
+            if total - freed <= self.max_bytes:
+                break
+            if keep and name == keep + self.SUFFIX:
+                continue
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                # Still memory-mapped by a reader on Windows, it is evicted by a later put
+                continue
+            freed += size
+        return freed
+
+    def clear(self) -> None:
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(self.SUFFIX):
+                os.remove(os.path.join(self.cache_dir, name))
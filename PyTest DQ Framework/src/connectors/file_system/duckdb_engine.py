@@ -0,0 +1,219 @@
+import os
+import re
+import threading
+from itertools import count
+from typing import List, Optional, Tuple, Union
+
+import pandas as pd
+import pyarrow as pa
+
+from src.connectors.file_system.parquet_reader import ParquetReader
+from src.data_quality.check_plan import CheckPlan, DatasetProfile
+from src.data_quality.reconciliation import SIDE_COLUMN
+from src.data_quality.sql_checks import SqlCheckCompiler, SqlCheckRunner, quote_identifier, quote_literal
+
+# DuckDB types compared by value kind in completeness diffs, like HashReconciler.normalize does in pandas
+_INTEGER_TYPES = {"TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT",
+                  "UTINYINT", "USMALLINT", "UINTEGER", "UBIGINT", "UHUGEINT"}
+_FLOAT_TYPES = {"FLOAT", "DOUBLE"}
+_DATETIME_TYPES = {"DATE", "TIMESTAMP", "TIMESTAMP_S", "TIMESTAMP_MS", "TIMESTAMP_NS"}
+
+
+def _import_duckdb():
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError("DuckDBEngine requires the duckdb package: pip install duckdb") from e
+    return duckdb
+
+
+class DuckDBCheckCompiler(SqlCheckCompiler):
+    """
+    SqlCheckCompiler for DuckDB: scale and precision are checked on the column type itself,
+    since DuckDB NUMERIC is DECIMAL(18, 3) and would round the values before the check.
+    """
+
+    @staticmethod
+    def violation(column: str, rule: str, value, rules: dict) -> str:
+        c = quote_identifier(column)
+        if rule == "scale":
+            return f"{c} <> round({c}, {int(value)})"
+        if rule == "precision":
+            scale = int(rules.get("scale", 0))
+            return f"abs(round({c}, {scale})) >= power(10, {int(value) - scale})"
+        return SqlCheckCompiler.violation(column, rule, value, rules)
+
+
+class DuckDBDataset:
+    """
+    A hive-partitioned parquet folder registered as a DuckDB view.
+    Stands in for the DataFrame of ParquetReader.load in DataQualityLibrary checks and CheckPlan.profile:
+    every check runs as SQL over the files and only its results are fetched.
+    """
+
+    def __init__(self, engine: "DuckDBEngine", view: str, columns: List[str]):
+        self.engine = engine
+        self.view = view
+        self.columns = columns
+
+    def __len__(self):
+        return int(self.engine.get_data_sql(f"select count(*) from {quote_identifier(self.view)}").iloc[0, 0])
+
+    @property
+    def empty(self) -> bool:
+        return self.engine.get_data_sql(f"select 1 from {quote_identifier(self.view)} limit 1").empty
+
+    def profile(self, plan: CheckPlan) -> DatasetProfile:
+        return self.engine.profile(plan, self.view)
+
+    def __repr__(self):
+        return f"DuckDBDataset({self.view!r}, columns={self.columns})"
+
+
+class DuckDBEngine:
+    """
+    In-process DuckDB engine running the DQ checks directly on the parquet exports.
+    load() registers a hive-partitioned folder as a view over read_parquet, CheckPlans are compiled to SQL
+    by DuckDBCheckCompiler and run by SqlCheckRunner, and completeness diffs are multiset differences,
+    computed by one aggregate query, against a source snapshot (a DataFrame, registered as an Arrow table).
+    DuckDB scans the files with threads threads (all cores by default), so nothing but the check results
+    is loaded into pandas.
+    """
+
+    def __init__(self, threads: Optional[int] = None, sample_size: int = 20, database: str = ":memory:"):
+        duckdb = _import_duckdb()
+        self.connection = duckdb.connect(database)
+        # Footers of the files are read once, not by every check query
+        self.connection.execute("SET parquet_metadata_cache = true")
+        if threads:
+            self.connection.execute(f"SET threads = {int(threads)}")
+        self.runner = SqlCheckRunner(self, sample_size=sample_size, compiler_class=DuckDBCheckCompiler)
+        self._names = count()
+        self._lock = threading.Lock()
+
+    def get_data_sql(self, sql: str) -> pd.DataFrame:
+        with self._lock:
+            return self.connection.execute(sql).df()
+
+    def _view_name(self, path: str) -> str:
+        name = re.sub(r"\W", "_", os.path.basename(os.path.normpath(path))) or "dataset"
+        return f"{name}_{next(self._names)}"
+
+    def load(self, path: str | Tuple[str, str], recursive: bool = False,
+             columns: Optional[List[str]] = None) -> DuckDBDataset:
+        """
+        Register a parquet file or folder as a view, mirroring ParquetReader.load:
+        with recursive=True the hive partitions of the subfolders can be selected in columns,
+        but are not part of the default columns.
+        """
+        if isinstance(path, tuple):
+            path = ParquetReader().resolve_parquet_path(*path)
+        if os.path.isdir(path):
+            files = os.path.join(path, "**", "*.parquet") if recursive else os.path.join(path, "*.parquet")
+        else:
+            files = path
+        source = f"read_parquet({quote_literal(files)}, hive_partitioning = {'true' if recursive else 'false'})"
+        if recursive and not columns:
+            # The data columns of the files, without the hive partitions
+            columns = list(self.get_data_sql(
+                f"select * from read_parquet({quote_literal(files)}, hive_partitioning = false) limit 0").columns)
+        selected = ", ".join(quote_identifier(name) for name in columns) if columns else "*"
+        view = self._view_name(path)
+        with self._lock:
+            self.connection.execute(f"create or replace view {quote_identifier(view)} as select {selected} "
+                                    f"from {source}")
+        described = self.get_data_sql(f"select * from {quote_identifier(view)} limit 0")
+        return DuckDBDataset(self, view, list(described.columns))
+
+    def register(self, df: pd.DataFrame, name: str = "snapshot") -> DuckDBDataset:
+        """
+        Register a DataFrame, e.g. a source snapshot, as a view. It is converted to Arrow once,
+        so Decimals and dates keep their SQL types.
+        """
+        view = self._view_name(name)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with self._lock:
+            self.connection.register(view, table)
+        return DuckDBDataset(self, view, list(df.columns))
+
+    def profile(self, plan: CheckPlan, source: str) -> DatasetProfile:
+        return self.runner.profile(plan, source)
+
+    def column_types(self, dataset: DuckDBDataset) -> dict:
+        described = self.get_data_sql(f"describe select * from {quote_identifier(dataset.view)}")
+        return dict(zip(described["column_name"], described["column_type"]))
+
+    @staticmethod
+    def _kind(column_type: str) -> str:
+        base = column_type.split("(")[0].upper()
+        if base in _DATETIME_TYPES:
+            return "datetime"
+        if base == "TIMESTAMP WITH TIME ZONE":
+            return "datetimetz"
+        if base in _INTEGER_TYPES:
+            return "int"
+        if base in _FLOAT_TYPES or base == "DECIMAL":
+            return "float"
+        return column_type
+
+    @classmethod
+    def _normalized(cls, column: str, kind: str, other_kind: str) -> str:
+        """
+        Return the expression of a column in the type both sides are compared in.
+        """
+        c = quote_identifier(column)
+        if kind == "datetimetz":
+            return f"cast(timezone('UTC', {c}) as TIMESTAMP_NS)"
+        if kind == "datetime":
+            return f"cast({c} as TIMESTAMP_NS)"
+        if kind == "float" or (kind == "int" and other_kind == "float"):
+            # + 0.0 turns -0.0 into 0.0
+            return f"cast({c} as DOUBLE) + 0.0"
+        if kind == "int":
+            return f"cast({c} as HUGEINT)"
+        if kind != other_kind:
+            return f"cast({c} as VARCHAR)"
+        return c
+
+    def diff(self, df1: Union[pd.DataFrame, DuckDBDataset], df2: Union[pd.DataFrame, DuckDBDataset],
+             columns: Optional[List[str]] = None, df1_name: str = "df1", df2_name: str = "df2") -> pd.DataFrame:
+        """
+        Return the rows not matched on the other side, like HashReconciler.diff: a row present a different
+        number of times on both sides is a difference as well. Values are returned in the compared types.
+        """
+        dataset1 = df1 if isinstance(df1, DuckDBDataset) else self.register(df1, df1_name)
+        dataset2 = df2 if isinstance(df2, DuckDBDataset) else self.register(df2, df2_name)
+        columns = list(dataset1.columns) if columns is None else list(columns)
+        kinds1 = {name: self._kind(t) for name, t in self.column_types(dataset1).items()}
+        kinds2 = {name: self._kind(t) for name, t in self.column_types(dataset2).items()}
+
+        def select(dataset, kinds, other_kinds, weight):
+            expressions = ", ".join(f"{self._normalized(name, kinds[name], other_kinds[name])} "
+                                    f"as {quote_identifier(name)}" for name in columns)
+            return f"select {expressions}, {weight} as __weight from {quote_identifier(dataset.view)}"
+
+        # One hash aggregate of both sides: the net count of every distinct row, repeated as many times
+        # as it is in excess on its side (NULLs and NaNs group together, like fingerprints do)
+        selected = ", ".join(quote_identifier(name) for name in columns)
+        try:
+            return self.get_data_sql(
+                f"select {selected}, case when __excess > 0 then {quote_literal(df1_name)} "
+                f"else {quote_literal(df2_name)} end as {quote_identifier(SIDE_COLUMN)}\n"
+                f"from (select {selected}, cast(sum(__weight) as BIGINT) as __excess from (\n"
+                f"{select(dataset1, kinds1, kinds2, 1)}\nunion all\n{select(dataset2, kinds2, kinds1, -1)}\n"
+                f") group by {selected} having sum(__weight) <> 0) as counts, range(abs(__excess)) as repeats(i)\n"
+                f"order by __excess < 0")
+        finally:
+            with self._lock:
+                for dataset, df in ((dataset1, df1), (dataset2, df2)):
+                    if dataset is not df:
+                        self.connection.unregister(dataset.view)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
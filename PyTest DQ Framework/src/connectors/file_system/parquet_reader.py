@@ -1,15 +1,113 @@
+import datetime
 import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 import pandas as pd
-from typing import List, Tuple, Optional
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pa_fs
+import pyarrow.parquet as pq
+from typing import Callable, Dict, List, Tuple, Optional, Union
+
+from src.cache.arrow_ipc_cache import ArrowIPCCache
+
+# Filters: a pyarrow.compute expression, or pandas/pyarrow style DNF tuples,
+# e.g. [("visit_date", "=", "2025-10-28")] or [[("facility_type", "=", "Clinic")], [...]]
+Filters = Union[pc.Expression, List[Tuple], List[List[Tuple]]]
+
+# Hive partition columns derived from data columns: partition column -> (data column, value -> partition value)
+DERIVED_PARTITION_COLUMNS = {
+    "partition_date": ("visit_date", lambda value: pd.Timestamp(value).strftime("%Y-%m")),
+    "facility_type_partition": ("facility_type", lambda value: str(value).replace(" ", "_")),
+}
+# Comparison of a data column -> comparison of its (coarser) partition column
+PARTITION_OPERATORS = {"=": "=", "==": "=", "in": "in", ">": ">=", ">=": ">=", "<": "<=", "<=": "<="}
+# Rules whose result can be proven from the minimum and maximum of a column
+RANGE_RULES = {"min", "max"}
+
+
+@dataclass
+class ParquetStatistics:
+    """
+    Row count, null counts, minimums and maximums of the columns of a parquet dataset, merged from the
+    footer statistics of its row groups (hive partition columns from their partition values).
+    A statistic is None when a file does not carry it; minimums and maximums are bounds, possibly
+    truncated for strings. DataQualityLibrary checks accept it (see CheckPlan.profile_statistics) and read
+    rows (through load) only for the columns whose statistics cannot decide the result.
+    """
+    row_count: int
+    columns: List[str]
+    null_counts: Dict[str, Optional[int]]
+    minimums: Dict[str, object]
+    maximums: Dict[str, object]
+    load: Callable[[List[str]], pd.DataFrame] = field(repr=False)
+
+    @property
+    def empty(self) -> bool:
+        return self.row_count == 0
+
+    def nulls(self, column_names: Optional[List[str]] = None) -> Dict[str, Optional[int]]:
+        """
+        Return the null counts of the given columns, or of all columns, like DatasetProfile.nulls.
+        Columns without null counts in the footers are read.
+        """
+        column_names = self.columns if column_names is None else column_names
+        counts = {name: self.null_counts.get(name) for name in column_names}
+        unknown = [name for name in column_names if name in self.columns and counts[name] is None]
+        if unknown:
+            counts.update({name: int(count) for name, count in self.load(unknown).isna().sum().items()})
+        return counts
+
+    @staticmethod
+    def _comparable(bound, value):
+        if isinstance(bound, (datetime.date, pd.Timestamp)):
+            return pd.Timestamp(bound), pd.Timestamp(value)
+        return bound, value
+
+    def satisfies(self, column: str, rules: dict) -> bool:
+        """
+        Return True if the footer statistics prove that no value of the column breaks its min / max rules.
+        False means undecided: other rules, missing statistics or a range crossing a limit.
+        """
+        if not rules or set(rules) - RANGE_RULES or self.null_counts.get(column) is None:
+            return False
+        if self.null_counts[column] == self.row_count:
+            # Nulls satisfy min and max
+            return True
+        try:
+            if "min" in rules:
+                minimum, limit = self._comparable(self.minimums.get(column), rules["min"])
+                if minimum is None or minimum < limit:
+                    return False
+            if "max" in rules:
+                maximum, limit = self._comparable(self.maximums.get(column), rules["max"])
+                if maximum is None or maximum > limit:
+                    return False
+        except (TypeError, ValueError):
+            return False
+        return True
 
 
 class ParquetReader:
     """
     Utility class to load Parquet files inside pytest tests.
     Supports single files or directories containing multiple parquet parts.
+    Reads are built on pyarrow.dataset: only the requested columns are read, filters are pushed down to the
+    row groups, and filters on visit_date / facility_type also prune the partition_date /
+    facility_type_partition directories.
+    Files are read in parallel on the Arrow thread pool (use_threads) and converted to pandas once.
+    Hive partition columns are categoricals, or typed by partition_types, e.g. {"partition_date": pa.string()};
+    read_partitioned returns them only when they are listed in columns.
+    read_statistics answers row counts, null counts and min / max from the parquet footers alone.
+    With a cache, decoded tables are kept as memory-mapped Arrow IPC files and reused while the files are unchanged.
     """
-    def __init__(self, base_path: Optional[str] = None):
+    def __init__(self, base_path: Optional[str] = None, use_threads: bool = True,
+                 partition_types: Optional[Dict[str, pa.DataType]] = None, cache: Optional[ArrowIPCCache] = None):
         self.base_path = base_path
+        self.use_threads = use_threads
+        self.partition_types = partition_types
+        self.cache = cache
 
     def resolve_parquet_path(self, local_path: str, jenkins_path: str) -> str:
         """
@@ -35,52 +133,216 @@ class ParquetReader:
             return os.path.join(self.base_path, path)
         return path
 
-    def read(self, path: str) -> pd.DataFrame:
+    def _partitioning(self):
+        if self.partition_types:
+            return ds.partitioning(pa.schema(list(self.partition_types.items())), flavor="hive")
+        # Hive partitions as dictionaries, so they are read as categoricals like pd.read_parquet does
+        return ds.HivePartitioning.discover(infer_dictionary=True)
+
+    @staticmethod
+    def _to_dnf(filters: Filters) -> List[List[Tuple]]:
+        if filters and isinstance(filters[0], tuple):
+            return [list(filters)]
+        return [list(conjunction) for conjunction in filters]
+
+    def with_partition_pruning(self, filters: Optional[Filters], partition_columns: List[str]) -> Optional[Filters]:
         """
-        Read a parquet file or a folder of parquet files into a Dataframe.
+        Add partition column predicates implied by the data column predicates of DNF filters,
+        e.g. visit_date = 2025-10-28 also implies partition_date = 2025-10.
+        Expression filters are returned unchanged.
         """
+        if isinstance(filters, pc.Expression) or not filters:
+            return filters
+        pruned = []
+        for conjunction in self._to_dnf(filters):
+            implied = []
+            for partition_column, (data_column, to_partition) in DERIVED_PARTITION_COLUMNS.items():
+                if partition_column not in partition_columns:
+                    continue
+                for column, op, value in conjunction:
+                    if column != data_column or op not in PARTITION_OPERATORS:
+                        continue
+                    if op == "in":
+                        partition_value = sorted({to_partition(v) for v in value})
+                    else:
+                        partition_value = to_partition(value)
+                    implied.append((partition_column, PARTITION_OPERATORS[op], partition_value))
+            pruned.append(conjunction + implied)
+        return pruned
+
+    def _filter_expression(self, dataset: ds.Dataset, filters: Optional[Filters]) -> Optional[pc.Expression]:
+        if filters is None or isinstance(filters, pc.Expression):
+            return filters
+        # Compare against the column types of the dataset, e.g. timestamps given as date strings
+        typed = []
+        for conjunction in self._to_dnf(filters):
+            typed_conjunction = []
+            for column, op, value in conjunction:
+                column_type = dataset.schema.field(column).type
+                if pa.types.is_timestamp(column_type):
+                    value = [pd.Timestamp(v) for v in value] if op in ("in", "not in") else pd.Timestamp(value)
+                elif pa.types.is_date(column_type):
+                    value = ([pd.Timestamp(v).date() for v in value] if op in ("in", "not in")
+                             else pd.Timestamp(value).date())
+                typed_conjunction.append((column, op, value))
+            typed.append(typed_conjunction)
+        return pq.filters_to_expression(typed)
+
+    def _read_dataset(self, dataset: ds.Dataset, columns: Optional[List[str]], filters: Optional[Filters],
+                      partition_columns: List[str]) -> pd.DataFrame:
+        filters = self.with_partition_pruning(filters, partition_columns)
+        cache_key = None
+        table = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(dataset.files, columns=columns, filters=repr(filters),
+                                            partition_types=repr(self.partition_types))
+            table = self.cache.get(cache_key)
+        if table is None:
+            table = dataset.to_table(columns=columns, filter=self._filter_expression(dataset, filters),
+                                     use_threads=self.use_threads)
+            if cache_key is not None:
+                self.cache.put(cache_key, table)
+        # The table is not used afterwards, so its buffers can be released while the DataFrame is built
+        return table.to_pandas(split_blocks=True, self_destruct=True, use_threads=self.use_threads)
+
+    def _dataset(self, path: str) -> ds.Dataset:
         resolved_path = self._resolve_path(path)
 
         if not os.path.exists(resolved_path):
             raise FileNotFoundError(f"Path does not exist: {resolved_path}")
 
-        return pd.read_parquet(resolved_path)
+        return ds.dataset(resolved_path, format="parquet", partitioning=self._partitioning())
 
-    def read_partitioned(self, path: str) -> pd.DataFrame:
-        """
-        Recursively read ALL parquet files inside a folder and its subfolders.
-        Useful for deeply partitioned or broken parquet structures.
-        """
+    def _partitioned_dataset(self, path: str) -> ds.Dataset:
         resolved_path = self._resolve_path(path)
 
         if not os.path.exists(resolved_path):
             raise FileNotFoundError(f"Path does not exist: {resolved_path}")
 
-        parquet_files: List[str] = []
+        if os.path.isfile(resolved_path):
+            # A single file has no partition folders below it
+            return ds.dataset([resolved_path], format="parquet")
 
-        # Recursively walk through folders
-        for root, _, files in os.walk(resolved_path):
-            for f in files:
-                if f.lower().endswith(".parquet"):
-                    parquet_files.append(os.path.join(root, f))
+        # Recursively list the folder once, keeping every parquet file at any depth
+        file_infos = pa_fs.LocalFileSystem().get_file_info(pa_fs.FileSelector(resolved_path, recursive=True))
+        parquet_files: List[str] = sorted(
+            info.path for info in file_infos
+            if info.type == pa_fs.FileType.File and info.base_name.lower().endswith(".parquet")
+        )
 
         if not parquet_files:
             raise ValueError(f"No parquet files found in: {resolved_path}")
 
-        # Load and concatenate all parquet parts
-        dfs = [pd.read_parquet(f) for f in parquet_files]
-        return pd.concat(dfs, ignore_index=True)
+        return ds.dataset(parquet_files, format="parquet", partitioning=self._partitioning(),
+                          partition_base_dir=resolved_path)
+
+    @staticmethod
+    def _partition_columns(dataset: ds.Dataset) -> List[str]:
+        return dataset.partitioning.schema.names if dataset.partitioning else []
+
+    def read(self, path: str, columns: Optional[List[str]] = None, filters: Optional[Filters] = None) -> pd.DataFrame:
+        """
+        Read a parquet file or a folder of parquet files into a Dataframe.
+        Hive partition columns of a folder are included, like pd.read_parquet does.
+        """
+        dataset = self._dataset(path)
+        return self._read_dataset(dataset, columns, filters, self._partition_columns(dataset))
+
+    def read_partitioned(self, path: str, columns: Optional[List[str]] = None,
+                         filters: Optional[Filters] = None) -> pd.DataFrame:
+        """
+        Recursively read ALL parquet files inside a folder and its subfolders, or a single parquet file.
+        Useful for deeply partitioned or broken parquet structures.
+        The files are discovered in a single listing and read as one Arrow dataset on multiple threads.
+        Hive partition keys of the subfolders can be filtered on, but are only returned (as typed columns)
+        when listed in columns.
+        """
+        dataset = self._partitioned_dataset(path)
+        partition_columns = self._partition_columns(dataset)
+        if columns is None:
+            columns = [name for name in dataset.schema.names if name not in partition_columns]
+        return self._read_dataset(dataset, columns, filters, partition_columns)
+
+    @staticmethod
+    def _update_range(minimums: dict, maximums: dict, column: str, low, high):
+        if column not in minimums or (minimums[column] is not None and low < minimums[column]):
+            minimums[column] = low
+        if column not in maximums or (maximums[column] is not None and high > maximums[column]):
+            maximums[column] = high
+
+    def read_statistics(self, path: str | Tuple[str, str], recursive: bool = False,
+                        columns: Optional[List[str]] = None) -> ParquetStatistics:
+        """
+        Read the statistics of a parquet file or folder (recursive like load) from the file footers only.
+        Columns not in the dataset are left out, so checks report them as not found. By default the columns
+        are the ones load returns, so hive partition columns only with recursive=False.
+        """
+        if isinstance(path, tuple):
+            path = self.resolve_parquet_path(*path)
+        dataset = self._partitioned_dataset(path) if recursive else self._dataset(path)
+        partition_columns = self._partition_columns(dataset)
+        if columns is None:
+            columns = [name for name in dataset.schema.names if not (recursive and name in partition_columns)]
+        names = [name for name in columns if name in dataset.schema.names]
+
+        fragments = list(dataset.get_fragments())
+        if self.use_threads and len(fragments) > 1:
+            with ThreadPoolExecutor(max_workers=min(16, len(fragments))) as executor:
+                footers = list(executor.map(lambda fragment: fragment.metadata, fragments))
+        else:
+            footers = [fragment.metadata for fragment in fragments]
+
+        row_count = 0
+        null_counts: Dict[str, Optional[int]] = {name: 0 for name in names}
+        minimums, maximums = {}, {}
+        for fragment, footer in zip(fragments, footers):
+            row_count += footer.num_rows
+            partition_keys = ds.get_partition_keys(fragment.partition_expression)
+            column_index = {footer.schema.column(i).name: i for i in range(footer.num_columns)}
+            for name in names:
+                if name in partition_columns or name not in column_index:
+                    # Partition values, or a column missing from the file (read as nulls)
+                    value = partition_keys.get(name)
+                    if value is None:
+                        null_counts[name] = None if null_counts[name] is None else null_counts[name] + footer.num_rows
+                    elif footer.num_rows:
+                        self._update_range(minimums, maximums, name, value, value)
+                    continue
+                for i in range(footer.num_row_groups):
+                    row_group = footer.row_group(i)
+                    statistics = row_group.column(column_index[name]).statistics
+                    if statistics is None or not statistics.has_null_count:
+                        null_counts[name] = None
+                    elif null_counts[name] is not None:
+                        null_counts[name] += statistics.null_count
+                    if statistics is not None and statistics.has_min_max:
+                        self._update_range(minimums, maximums, name, statistics.min, statistics.max)
+                    elif statistics is None or not statistics.has_null_count or (
+                            statistics.null_count < row_group.num_rows):
+                        # Values without a range
+                        minimums[name] = maximums[name] = None
+
+        return ParquetStatistics(
+            row_count=row_count,
+            columns=names,
+            null_counts=null_counts,
+            minimums={name: minimums.get(name) for name in names},
+            maximums={name: maximums.get(name) for name in names},
+            load=lambda load_columns: self.load(path, recursive=recursive, columns=load_columns),
+        )
 
-    def load(self, path: str | Tuple[str, str], recursive: bool = False) -> pd.DataFrame:
+    def load(self, path: str | Tuple[str, str], recursive: bool = False, columns: Optional[List[str]] = None,
+             filters: Optional[Filters] = None) -> pd.DataFrame:
         """
         Unified loader.
         If recursive=True: loads from subfolders (read_partitioned).
         If recursive=False: loads single file or simple parquet folder (read).
+        columns limits the columns read, filters the rows read (see Filters).
         """
         if isinstance(path, tuple):
             local_path, jenkins_path = path
             path = self.resolve_parquet_path(local_path, jenkins_path)
 
         if recursive:
-            return self.read_partitioned(path)
-        return self.read(path)
+            return self.read_partitioned(path, columns=columns, filters=filters)
+        return self.read(path, columns=columns, filters=filters)
@@ -1,39 +1,330 @@
+import io
+import re
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from uuid import uuid4
+
 import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.pool import PoolError, ThreadedConnectionPool
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from src.cache.arrow_ipc_cache import ArrowIPCCache
+
+# Arrow types of the PostgreSQL type OIDs; NUMERIC is mapped separately, unlisted types are read as strings
+POSTGRES_OID_TO_ARROW_TYPE = {
+    16: pa.bool_(),
+    20: pa.int64(),
+    21: pa.int16(),
+    23: pa.int32(),
+    25: pa.string(),
+    700: pa.float32(),
+    701: pa.float64(),
+    1042: pa.string(),
+    1043: pa.string(),
+    1082: pa.date32(),
+    1114: pa.timestamp("us"),
+    1184: pa.timestamp("us", tz="UTC"),
+}
+NUMERIC_OID = 1700
+
+# Whitespace outside of string literals, collapsed when normalizing SQL
+SQL_WHITESPACE = re.compile(r"('(?:[^']|'')*')|\s+")
+
+# Identity of the cluster: its system identifier (new for every initdb) and the start time of the server,
+# since statistics counters restart after a crash recovery. pg_control_system() may need extra privileges.
+CONTROL_SYSTEM_PRIVILEGE_QUERY = "SELECT has_function_privilege('pg_control_system()', 'EXECUTE')"
+CLUSTER_IDENTITY_QUERY = "SELECT (SELECT system_identifier FROM pg_control_system()), pg_postmaster_start_time()"
+
+# Version of a table: modification counters and the file node, which changes on TRUNCATE and VACUUM FULL
+TABLE_VERSIONS_QUERY = """
+SELECT s.schemaname, s.relname, s.n_tup_ins, s.n_tup_upd, s.n_tup_del, c.relfilenode
+FROM pg_stat_user_tables s
+JOIN pg_class c ON c.oid = s.relid
+WHERE (s.schemaname, s.relname) IN %(tables)s
+ORDER BY s.schemaname, s.relname
+"""
+
+
+class PostgresConnectionPool:
+    """
+    Thread-safe pool of health-checked PostgreSQL connections shared by the test fixtures.
+    checkout waits up to timeout seconds for a connection when all of them are in use.
+    """
+    def __init__(self, db_host: str, db_name: str, db_port: int, db_user: str, db_password: str,
+                 min_size: int = 1, max_size: int = 4, timeout: float = 300):
+        self.pool = ThreadedConnectionPool(
+            minconn=min_size,
+            maxconn=max_size,
+            host=db_host,
+            dbname=db_name,
+            user=db_user,
+            password=db_password,
+            port=db_port
+        )
+        self.timeout = timeout
+        self.available = threading.BoundedSemaphore(max_size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+
+    @staticmethod
+    def is_healthy(conn) -> bool:
+        """
+        Check that a connection is open and answers a trivial query.
+        """
+        if conn.closed:
+            return False
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def checkout(self):
+        """
+        Take a healthy connection from the pool, replacing a broken one.
+        """
+        if not self.available.acquire(timeout=self.timeout):
+            raise PoolError(f"No pooled connection available within {self.timeout}s")
+        try:
+            conn = self.pool.getconn()
+            if not self.is_healthy(conn):
+                self.pool.putconn(conn, close=True)
+                conn = self.pool.getconn()
+        except Exception:
+            self.available.release()
+            raise
+        return conn
+
+    def checkin(self, conn):
+        """
+        Return a connection to the pool, rolling back any transaction left open on it.
+        """
+        try:
+            if not conn.closed and conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            self.pool.putconn(conn, close=bool(conn.closed))
+        finally:
+            self.available.release()
+
+    @contextmanager
+    def connection(self):
+        """
+        Check out a connection for the duration of a with block.
+        """
+        conn = self.checkout()
+        try:
+            yield conn
+        finally:
+            self.checkin(conn)
+
+    def close(self):
+        if not self.pool.closed:
+            self.pool.closeall()
 
 
 class PostgresConnectorContextManager:
     """
     PostgreSQL Database Context Manager.
+    When a pool is given, the connection is checked out of it instead of opened, and returned on exit.
+    With a cache, get_data_sql results are stored as Arrow and reused while the queried tables are unchanged.
     """
-    def __init__(self, db_host: str, db_name: str, db_port: int, db_user: str, db_password: str):
+    def __init__(self, db_host: str = None, db_name: str = None, db_port: int = None, db_user: str = None,
+                 db_password: str = None, pool: Optional[PostgresConnectionPool] = None,
+                 cache: Optional[ArrowIPCCache] = None):
         self.db_host = db_host
         self.db_name = db_name
         self.db_user = db_user
         self.db_password = db_password
         self.db_port = db_port
+        self.pool = pool
+        self.cache = cache
+        self._cluster_identity = None
+        self._cluster_identity_checked = False
         self.conn = None
         self.cursor = None
 
     def __enter__(self):
-        self.conn = psycopg2.connect(
-            host=self.db_host,
-            dbname=self.db_name,
-            user=self.db_user,
-            password=self.db_password,
-            port=self.db_port
-        )
+        if self.pool:
+            self.conn = self.pool.checkout()
+        else:
+            self.conn = psycopg2.connect(
+                host=self.db_host,
+                dbname=self.db_name,
+                user=self.db_user,
+                password=self.db_password,
+                port=self.db_port
+            )
         self.cursor = self.conn.cursor()
         return self
 
     def __exit__(self, exc_type, exc_value, exc_tb):
         if self.cursor:
             self.cursor.close()
-        if self.conn:
+        if self.conn and self.pool:
+            self.pool.checkin(self.conn)
+            self.conn = None
+        elif self.conn:
             self.conn.close()
 
     def get_data_sql(self, sql):
+        if self.cache is not None and self.get_cluster_identity() is not None:
+            return self.get_data_sql_cached(sql)
         self.cursor.execute(sql)
         rows = self.cursor.fetchall()
         columns = [desc[0] for desc in self.cursor.description]
         return pd.DataFrame(rows, columns=columns)
+
+    @staticmethod
+    def normalize_sql(sql) -> str:
+        """
+        Collapse whitespace outside of string literals and drop the trailing semicolon.
+        """
+        normalized = SQL_WHITESPACE.sub(lambda match: match.group(1) or " ", sql)
+        return normalized.strip().rstrip(";").strip()
+
+    def get_referenced_tables(self, sql) -> List[Tuple[str, str]]:
+        """
+        Return the (schema, table) pairs the query reads, as resolved by the planner (views are expanded).
+        """
+        self.cursor.execute(f"EXPLAIN (VERBOSE, FORMAT JSON) {sql}")
+        plan = self.cursor.fetchone()[0]
+        tables = set()
+        nodes = [plan[0]["Plan"]]
+        while nodes:
+            node = nodes.pop()
+            if "Relation Name" in node:
+                tables.add((node.get("Schema", "public"), node["Relation Name"]))
+            nodes.extend(node.get("Plans", []))
+        return sorted(tables)
+
+    def get_table_versions(self, tables: List[Tuple[str, str]]) -> List[tuple]:
+        """
+        Return the modification counters and file nodes of the tables from pg_stat_user_tables.
+        """
+        if not tables:
+            return []
+        # Statistics are snapshotted per transaction, drop the snapshot to see the current counters
+        self.cursor.execute("SELECT pg_stat_clear_snapshot()")
+        self.cursor.execute(TABLE_VERSIONS_QUERY, {"tables": tuple(tables)})
+        return self.cursor.fetchall()
+
+    def get_cluster_identity(self) -> Optional[Tuple[str, str]]:
+        """
+        Return the system identifier and the start time of the server, or None if pg_control_system()
+        may not be called, in which case queries are not cached.
+        """
+        if not self._cluster_identity_checked:
+            self.cursor.execute(CONTROL_SYSTEM_PRIVILEGE_QUERY)
+            if self.cursor.fetchone()[0]:
+                self.cursor.execute(CLUSTER_IDENTITY_QUERY)
+                system_identifier, start_time = self.cursor.fetchone()
+                self._cluster_identity = (str(system_identifier), start_time.isoformat())
+            self._cluster_identity_checked = True
+        return self._cluster_identity
+
+    def get_data_sql_cached(self, sql) -> pd.DataFrame:
+        """
+        get_data_sql through the query cache. The key is the normalized SQL, the cluster (system identifier and
+        server start time), the database and the versions of the tables the query reads, so any insert, update,
+        delete or truncate on them, a recreated cluster or a restart invalidates the entry.
+        Queries with volatile functions (now(), random()) must not be cached.
+        Statistics are flushed by PostgreSQL with a delay of up to a second, so a change committed
+        within that second may not be noticed yet.
+        """
+        normalized_sql = self.normalize_sql(sql)
+        tables = self.get_referenced_tables(normalized_sql)
+        key = self.cache.hash_key(
+            sql=normalized_sql,
+            cluster=self.get_cluster_identity(),
+            database=(self.conn.info.host, self.conn.info.port, self.conn.info.dbname),
+            tables=self.get_table_versions(tables)
+        )
+        table = self.cache.get(key)
+        if table is not None:
+            return table.to_pandas()
+
+        self.cursor.execute(sql)
+        rows = self.cursor.fetchall()
+        columns = [desc[0] for desc in self.cursor.description]
+        df = pd.DataFrame(rows, columns=columns)
+        try:
+            self.cache.put(key, pa.Table.from_pandas(df, preserve_index=False))
+        except (pa.ArrowException, OverflowError):
+            # Values Arrow cannot represent losslessly are not cached
+            pass
+        return df
+
+    def iter_data_sql(self, sql, itersize: int = 10000) -> Iterator[pd.DataFrame]:
+        """
+        Stream the query result in DataFrame chunks of itersize rows through a server-side cursor,
+        so results larger than memory can be checked chunk by chunk.
+        At least one chunk is yielded, empty only for an empty result.
+        """
+        cursor = self.conn.cursor(name=f"dq_stream_{uuid4().hex}")
+        cursor.itersize = itersize
+        try:
+            cursor.execute(sql)
+            chunks = 0
+            while True:
+                rows = cursor.fetchmany(itersize)
+                # The empty fetch after an exact multiple of itersize rows only ends the stream
+                if rows or not chunks:
+                    yield pd.DataFrame(rows, columns=[desc[0] for desc in cursor.description])
+                    chunks += 1
+                if len(rows) < itersize:
+                    break
+        finally:
+            cursor.close()
+
+    def get_arrow_column_types(self, sql) -> Dict[str, pa.DataType]:
+        """
+        Resolve the Arrow type of every result column from a LIMIT 0 run of the query.
+        NUMERIC with a declared precision of up to 38 digits becomes a decimal, other NUMERIC a float64.
+        """
+        self.cursor.execute(f"SELECT * FROM ({sql.strip().rstrip(';')}) AS q LIMIT 0")
+        column_types = {}
+        for desc in self.cursor.description:
+            if desc.type_code == NUMERIC_OID:
+                if desc.precision is not None and desc.precision <= 38:
+                    column_types[desc.name] = pa.decimal128(desc.precision, desc.scale)
+                else:
+                    column_types[desc.name] = pa.float64()
+            else:
+                column_types[desc.name] = POSTGRES_OID_TO_ARROW_TYPE.get(desc.type_code, pa.string())
+        return column_types
+
+    def get_data_sql_copy(self, sql, as_arrow: bool = False) -> Union[pd.DataFrame, pa.Table]:
+        """
+        Extract the query result with COPY (query) TO STDOUT and parse the CSV stream straight into
+        a typed Arrow table, skipping the per-cell Python objects of fetchall.
+        Returns the Arrow table, or a DataFrame converted from it with as few copies as possible.
+        """
+        column_types = self.get_arrow_column_types(sql)
+        buffer = io.BytesIO()
+        self.cursor.copy_expert(f"COPY ({sql.strip().rstrip(';')}) TO STDOUT WITH (FORMAT csv, HEADER)", buffer)
+        buffer.seek(0)
+        table = pa_csv.read_csv(
+            buffer,
+            convert_options=pa_csv.ConvertOptions(
+                column_types=column_types,
+                true_values=["t"],
+                false_values=["f"],
+                # NULL is an unquoted empty field, an empty string is quoted
+                null_values=[""],
+                strings_can_be_null=True,
+                quoted_strings_can_be_null=False,
+            ),
+        )
+        if as_arrow:
+            return table
+        return table.to_pandas(split_blocks=True, self_destruct=True)
@@ -0,0 +1,143 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.data_quality.duplicates import DuplicateReport, HashDuplicateDetector
+from src.data_quality.rule_engine import RuleEngine
+
+# Key columns of a duplicate check, None for entire rows
+DuplicateKey = Optional[Tuple[str, ...]]
+
+
+def duplicate_key(column_names: Optional[List[str]]) -> DuplicateKey:
+    return tuple(column_names) if column_names else None
+
+
+@dataclass
+class DatasetProfile:
+    """
+    Results of all checks of a CheckPlan on one DataFrame, computed in a single pass
+    (or on a Postgres relation by SqlCheckRunner, then invalid_rows only hold a sample of the violations).
+    DataQualityLibrary checks accept a profile instead of a DataFrame and assert against it.
+    """
+    row_count: int
+    columns: List[str]
+    null_counts: Dict[str, int]
+    duplicate_reports: Dict[DuplicateKey, DuplicateReport]
+    minimums: Dict[str, object]
+    maximums: Dict[str, object]
+    column_rules: Dict[str, dict]
+    invalid_rows: Dict[str, pd.DataFrame]
+    invalid_counts: Dict[str, int]
+
+    @property
+    def empty(self) -> bool:
+        return self.row_count == 0
+
+    def duplicates(self, column_names: Optional[List[str]] = None) -> DuplicateReport:
+        """
+        Return the duplicate groups by the given columns, or entire rows, with a bounded sample of their rows.
+        """
+        key = duplicate_key(column_names)
+        if key not in self.duplicate_reports:
+            raise ValueError(f"Duplicates by {list(key) if key else 'entire rows'} are not in the check plan.")
+        return self.duplicate_reports[key]
+
+    def nulls(self, column_names: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        Return the null counts of the given columns, or of all columns of the check plan.
+        Columns missing from the DataFrame are reported with a count of None.
+        """
+        column_names = list(self.null_counts) if column_names is None else column_names
+        not_planned = [name for name in column_names if name not in self.null_counts]
+        if not_planned:
+            raise ValueError(f"Null checks of {not_planned} are not in the check plan.")
+        return {name: self.null_counts[name] for name in column_names}
+
+    def rule_violations(self, column_rules: Optional[Dict[str, dict]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Return the rows breaking the rules of every column, for the given rules or all rules of the check plan.
+        """
+        column_rules = self.column_rules if column_rules is None else column_rules
+        for column, rules in column_rules.items():
+            if self.column_rules.get(column) != rules:
+                raise ValueError(f"Rules {rules} of '{column}' are not in the check plan.")
+        return {column: self.invalid_rows[column] for column in column_rules}
+
+
+@dataclass
+class CheckPlan:
+    """
+    The checks of a dataset, declared once and computed together by profile():
+    null counts, duplicate groups by each key (None for entire rows), min/max and rule violations per column.
+    Datasets of other engines (e.g. DuckDBDataset) are profiled by their own profile(plan).
+    """
+    not_null_columns: List[str] = field(default_factory=list)
+    duplicate_keys: List[Optional[List[str]]] = field(default_factory=list)
+    column_rules: Dict[str, dict] = field(default_factory=dict)
+    duplicate_sample_size: int = 20
+
+    def profile(self, df: pd.DataFrame) -> DatasetProfile:
+        """
+        Compute the profile of the DataFrame. Profile once per dataset (e.g. in a module-scoped fixture)
+        and pass the profile to every check.
+        """
+        if not isinstance(df, pd.DataFrame):
+            return df.profile(self)
+
+        present = [name for name in self.not_null_columns if name in df.columns]
+        null_counts = df[present].isna().sum()
+
+        detector = HashDuplicateDetector(sample_size=self.duplicate_sample_size)
+        duplicate_reports = {duplicate_key(column_names): detector.detect(df, column_names)
+                             for column_names in self.duplicate_keys}
+
+        rule_columns = list(self.column_rules)
+        missing = [name for name in rule_columns if name not in df.columns]
+        if missing:
+            raise ValueError(f"Column '{missing[0]}' not found in Dataframe.")
+        ordered = df[rule_columns].select_dtypes(include=["number", "datetime"])
+        minimums = ordered.min().to_dict() if not ordered.empty else {}
+        maximums = ordered.max().to_dict() if not ordered.empty else {}
+        invalid_rows = {column: df[RuleEngine.invalid_mask(df, column, rules)]
+                        for column, rules in self.column_rules.items()}
+
+        return DatasetProfile(
+            row_count=len(df),
+            columns=list(df.columns),
+            null_counts={name: (int(null_counts[name]) if name in null_counts.index else None)
+                         for name in self.not_null_columns},
+            duplicate_reports=duplicate_reports,
+            minimums=minimums,
+            maximums=maximums,
+            column_rules=dict(self.column_rules),
+            invalid_rows=invalid_rows,
+            invalid_counts={column: len(rows) for column, rows in invalid_rows.items()},
+        )
+
+    def profile_statistics(self, statistics) -> DatasetProfile:
+        """
+        Compute the rule results of the plan from the ParquetStatistics of a dataset. Rules proven by
+        the footer statistics get no invalid rows, the others are evaluated on the rows read for them.
+        """
+        missing = [name for name in self.column_rules if name not in statistics.columns]
+        if missing:
+            raise ValueError(f"Column '{missing[0]}' not found in Dataframe.")
+        undecided = {column: rules for column, rules in self.column_rules.items()
+                     if not statistics.satisfies(column, rules)}
+        invalid_rows = {column: pd.DataFrame(columns=statistics.columns) for column in self.column_rules}
+        if undecided:
+            rows = statistics.load(statistics.columns)
+            invalid_rows.update(CheckPlan(column_rules=undecided).profile(rows).invalid_rows)
+        return DatasetProfile(
+            row_count=statistics.row_count,
+            columns=statistics.columns,
+            null_counts={},
+            duplicate_reports={},
+            minimums=dict(statistics.minimums),
+            maximums=dict(statistics.maximums),
+            column_rules=dict(self.column_rules),
+            invalid_rows=invalid_rows,
+            invalid_counts={column: len(rows) for column, rows in invalid_rows.items()},
+        )
@@ -1,5 +1,16 @@
+from typing import TYPE_CHECKING, Iterable, Optional, Union
+
 import pandas as pd
 
+from src.connectors.file_system.parquet_reader import ParquetStatistics
+from src.data_quality.check_plan import CheckPlan, DatasetProfile
+from src.data_quality.duplicates import HashDuplicateDetector
+from src.data_quality.reconciliation import HashReconciler, SIDE_COLUMN
+
+if TYPE_CHECKING:
+    # DuckDB is optional, its datasets are recognized by their engine attribute at run time
+    from src.connectors.file_system.duckdb_engine import DuckDBDataset
+
 
 class DataQualityLibrary:
     """
@@ -8,69 +19,106 @@ class DataQualityLibrary:
     This class is intended to be used in a PyTest-based testing framework to validate
     the quality of data in DataFrames. Each method performs a specific data quality
     check and uses assertions to ensure that the data meets the expected conditions.
+    Checks marked as such also accept the DatasetProfile of a CheckPlan instead of a DataFrame,
+    asserting against the precomputed results instead of scanning the data again.
+    A DuckDBDataset can be passed wherever a DataFrame is, the checks then run as SQL over its parquet files.
+    Checks marked as such accept the ParquetStatistics of ParquetReader.read_statistics, answering from the
+    parquet footers and reading rows only when the statistics cannot decide.
     """
 
     @staticmethod
-    def check_duplicates(df: pd.DataFrame, column_names=None):
+    def check_duplicates(df: Union[pd.DataFrame, DatasetProfile], column_names=None):
         """
         Check for duplicated rows in the entire Dataframe or duplicated values by columns.
+        Accepts a DatasetProfile.
         """
-        if column_names:
-            duplicates = df[df[column_names].duplicated(keep=False)]
-        else:
-            duplicates = df[df.duplicated(keep=False)]
+        if not isinstance(df, DatasetProfile):
+            df = CheckPlan(duplicate_keys=[column_names]).profile(df)
+        duplicates = df.duplicates(column_names)
+        assert duplicates.empty, f"Duplicated rows:\n{duplicates}"
+
+    @staticmethod
+    def check_duplicates_in_chunks(chunks: Iterable[pd.DataFrame], column_names=None, buckets: int = 64,
+                                   spill_dir: Optional[str] = None):
+        """
+        Check for duplicated keys in a stream of Dataframe chunks, e.g. from iter_data_sql, too large for memory.
+        Keys are spilled to disk in buckets by hash and every bucket is checked on its own.
+        """
+        duplicates = HashDuplicateDetector(buckets=buckets, spill_dir=spill_dir).detect_chunks(chunks, column_names)
         assert duplicates.empty, f"Duplicated rows:\n{duplicates}"
 
     @staticmethod
-    def check_count(df1: pd.DataFrame, df2: pd.DataFrame, df1_name: str, df2_name: str):
+    def check_count(df1: Union[pd.DataFrame, DatasetProfile, ParquetStatistics],
+                    df2: Union[pd.DataFrame, DatasetProfile, ParquetStatistics], df1_name: str, df2_name: str):
         """
         Check that two Dataframes have the same number of rows.
+        Accepts DatasetProfiles and ParquetStatistics.
         """
-        count_mismatch = len(df1) - len(df2)
+        count1 = df1.row_count if isinstance(df1, (DatasetProfile, ParquetStatistics)) else len(df1)
+        count2 = df2.row_count if isinstance(df2, (DatasetProfile, ParquetStatistics)) else len(df2)
+        count_mismatch = count1 - count2
         assert count_mismatch == 0, (
-            f"Row count mismatch: {df1_name} has {len(df1)} rows, "
-            f"{df2_name} has {len(df2)} rows (difference: {count_mismatch}).")
+            f"Row count mismatch: {df1_name} has {count1} rows, "
+            f"{df2_name} has {count2} rows (difference: {count_mismatch}).")
 
     @staticmethod
-    def check_data_completeness(df1: pd.DataFrame, df2: pd.DataFrame):
+    def check_data_completeness(df1: Union[pd.DataFrame, "DuckDBDataset"], df2: Union[pd.DataFrame, "DuckDBDataset"],
+                                df1_name: str = "df1", df2_name: str = "df2"):
         """
-        Check that two Dataframes contain the same data (ignor order).
+        Check that two Dataframes contain the same data (ignor order), including the number of times
+        every row occurs. Rows are compared by hash fingerprints, only differing rows are materialized.
+        If either side is a DuckDBDataset, the rows are compared in DuckDB (see DuckDBEngine.diff).
         """
         assert set(df1.columns) == set(df2.columns), (
             f"Column mismatch between Dataframes.\n"
-            f"df1 columns: {sorted(df1.columns.tolist())}\n"
-            f"df2 columns: {sorted(df2.columns.tolist())}")
+            f"df1 columns: {sorted(df1.columns)}\n"
+            f"df2 columns: {sorted(df2.columns)}")
 
-        df1_sorted = df1.sort_values(by=df1.columns.tolist()).reset_index(drop=True)
-        df2_sorted = df2.sort_values(by=df2.columns.tolist()).reset_index(drop=True)
-        df_diff = pd.concat([df1_sorted, df2_sorted]).drop_duplicates(keep=False)
-        assert df_diff.empty, f"Source to target completeness violation. Differences:\n{df_diff}"
+        duckdb_datasets = [df for df in (df1, df2) if not isinstance(df, pd.DataFrame) and hasattr(df, "engine")]
+        if duckdb_datasets:
+            df_diff = duckdb_datasets[0].engine.diff(df1, df2, df1_name=df1_name, df2_name=df2_name)
+        else:
+            df_diff = HashReconciler.diff(df1, df2, df1_name=df1_name, df2_name=df2_name)
+        assert df_diff.empty, (
+            f"Source to target completeness violation. Differences:\n{df_diff}\n"
+            f"({(df_diff[SIDE_COLUMN] == df1_name).sum()} row(s) only in {df1_name}, "
+            f"{(df_diff[SIDE_COLUMN] == df2_name).sum()} row(s) only in {df2_name})")
 
     @staticmethod
-    def check_dataset_is_not_empty(df: pd.DataFrame):
+    def check_partitions_reconciled(report: pd.DataFrame):
+        """
+        Check that every partition of a partitioned source to target reconciliation report matched.
+        """
+        assert not report.empty, "Reconciliation report is empty."
+        mismatched = report[~report["matched"]]
+        assert mismatched.empty, (
+            f"Source to target completeness violation in {len(mismatched)} of {len(report)} partition(s):\n"
+            f"{mismatched.to_string(index=False)}")
+
+    @staticmethod
+    def check_dataset_is_not_empty(df: Union[pd.DataFrame, DatasetProfile, ParquetStatistics]):
         """
         Check if the Dataframe is not empty.
+        Accepts a DatasetProfile or ParquetStatistics.
         """
         assert not df.empty, "Dataframe is empty."
 
     @staticmethod
-    def check_not_null_values(df: pd.DataFrame, column_names=None):
+    def check_not_null_values(df: Union[pd.DataFrame, DatasetProfile, ParquetStatistics], column_names=None):
         """
         Check if columns in the Dataframe contain null values.
-        If column_names is None, check all columns.
+        If column_names is None, check all columns (of the check plan, for a DatasetProfile).
+        Accepts ParquetStatistics, only columns without null counts in the footers are read.
         """
-        if column_names is None:
-            column_names = df.columns.tolist()
+        if not isinstance(df, (DatasetProfile, ParquetStatistics)):
+            df = CheckPlan(not_null_columns=list(df.columns) if column_names is None else column_names).profile(df)
 
         columns_with_nulls = {}
 
-        for column_name in column_names:
-            if column_name not in df.columns:
+        for column_name, null_count in df.nulls(column_names).items():
+            if null_count is None:
                 columns_with_nulls[column_name] = "!!!column NOT found in Dataframe!!!"
-                continue
-
-            null_count = df[column_name].isnull().sum()
-            if null_count > 0:
+            elif null_count > 0:
                 columns_with_nulls[column_name] = null_count
 
         if columns_with_nulls:
@@ -80,38 +128,26 @@ class DataQualityLibrary:
             raise AssertionError(f"Null values found in column(s):\n{formatted}")
 
     @staticmethod
-    def check_column_rules(df: pd.DataFrame, column_rules: dict) -> pd.DataFrame:
+    def check_column_rules(df: Union[pd.DataFrame, DatasetProfile, ParquetStatistics],
+                           column_rules: dict = None) -> pd.DataFrame:
         """
         Validate Dataframe columns based on user-defined rules.
+        Rules are evaluated vectorized, see RuleEngine for the vocabulary.
+        With a DatasetProfile, column_rules defaults to the rules of the check plan.
+        With ParquetStatistics, min / max rules within the footer ranges pass without reading rows.
         """
-        invalid_rows_list = []
-
-        for column, rules in column_rules.items():
-
-            if column not in df.columns:
-                raise ValueError(f"Column '{column}' not found in Dataframe.")
+        if isinstance(df, ParquetStatistics):
+            df = CheckPlan(column_rules=column_rules).profile_statistics(df)
+        elif not isinstance(df, DatasetProfile):
+            df = CheckPlan(column_rules=column_rules).profile(df)
 
-            # mask for this column
-            invalid_mask = pd.Series(False, index=df.index)
-
-            if "min" in rules:
-                invalid_mask |= df[column] < rules["min"]
-
-            if "max" in rules:
-                invalid_mask |= df[column] > rules["max"]
-
-            if "expected_values" in rules:
-                invalid_mask |= ~df[column].isin(rules["expected_values"])
-
-            if "condition" in rules:
-                try:
-                    valid_condition = df.apply(rules["condition"], axis=1)
-                except Exception as e:
-                    raise ValueError(f"Error evaluating custom condition for '{column}': {e}")
-                invalid_mask |= ~valid_condition
+        invalid_rows_list = []
+        violations = df.rule_violations(column_rules)
+        invalid_count = sum(df.invalid_counts[column] for column in violations)
 
-            if invalid_mask.any():
-                bad = df.loc[invalid_mask].copy()
+        for column, bad in violations.items():
+            if not bad.empty:
+                bad = bad.copy()
                 bad["invalid_column"] = column
                 invalid_rows_list.append(bad)
 
@@ -125,7 +161,7 @@ class DataQualityLibrary:
         assert invalid_df.empty, (
             "Invalid data detected:\n"
             f"{invalid_df}\n"
-            f"(Total {len(invalid_df)} invalid row(s) across "
+            f"(Total {invalid_count} invalid row(s) across "
             f"{invalid_df['invalid_column'].nunique() if not invalid_df.empty else 0} column(s))"
         )
 
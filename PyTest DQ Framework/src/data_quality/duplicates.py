@@ -0,0 +1,186 @@
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Column of the duplicate sample holding the size of the group of a row
+GROUP_SIZE_COLUMN = "duplicate_count"
+
+
+@dataclass
+class DuplicateReport:
+    """
+    Duplicate groups found by HashDuplicateDetector: their number, the rows they cover, the size of the
+    largest one, and a bounded sample of offending rows (the largest groups first).
+    """
+    duplicate_groups: int
+    duplicated_rows: int
+    largest_group: int
+    sample: pd.DataFrame
+
+    @property
+    def empty(self) -> bool:
+        return self.duplicate_groups == 0
+
+    def merge(self, other: "DuplicateReport", sample_size: int) -> "DuplicateReport":
+        sample = pd.concat([s for s in (self.sample, other.sample) if not s.empty] or [self.sample],
+                           ignore_index=True)
+        return DuplicateReport(
+            duplicate_groups=self.duplicate_groups + other.duplicate_groups,
+            duplicated_rows=self.duplicated_rows + other.duplicated_rows,
+            largest_group=max(self.largest_group, other.largest_group),
+            sample=sample.sort_values(GROUP_SIZE_COLUMN, ascending=False, kind="stable").head(sample_size)
+        )
+
+    def __str__(self):
+        return (f"{self.duplicate_groups} duplicate group(s) covering {self.duplicated_rows} row(s), "
+                f"largest group: {self.largest_group} row(s). Sample:\n{self.sample}")
+
+
+class HashDuplicateDetector:
+    """
+    Duplicate detection on 64-bit hashes of the key columns.
+    Only the rows of colliding hashes are compared exactly, and only sample_size offending rows are kept.
+    detect_chunks checks key sets larger than memory: the keys of every chunk are spilled to bucket files
+    by hash, so all occurrences of a key land in the same bucket, and the buckets are checked one at a time.
+    """
+
+    def __init__(self, sample_size: int = 20, buckets: int = 64, spill_dir: Optional[str] = None):
+        self.sample_size = sample_size
+        self.buckets = buckets
+        self.spill_dir = spill_dir
+
+    @staticmethod
+    def key_hashes(df: pd.DataFrame) -> np.ndarray:
+        return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+    @staticmethod
+    def stable_key_hashes(table: pa.Table) -> np.ndarray:
+        """
+        Hash the rows of an Arrow table by value and Arrow type, so chunks with the same schema hash alike
+        (pandas would turn an integer chunk with nulls into floats, changing its hashes).
+        """
+        columns = {}
+        for index, column in enumerate(table.columns):
+            columns[f"{index}_null"] = column.is_null().to_numpy()
+            values = None
+            if not (pa.types.is_string(column.type) or pa.types.is_large_string(column.type)
+                    or pa.types.is_binary(column.type) or pa.types.is_large_binary(column.type)):
+                try:
+                    # Numbers, dates and timestamps as their 64-bit values (by type, not by value,
+                    # so every chunk of a column takes the same path)
+                    values = column.cast(pa.float64() if pa.types.is_floating(column.type) else pa.int64())
+                    values = pc.fill_null(values, 0).to_numpy()
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                    values = None
+            if values is None:
+                values = column.to_numpy()
+            columns[str(index)] = values
+        return pd.util.hash_pandas_object(pd.DataFrame(columns), index=False).to_numpy()
+
+    def detect(self, df: pd.DataFrame, column_names: Optional[List[str]] = None,
+               hashes: Optional[np.ndarray] = None) -> DuplicateReport:
+        """
+        Count the duplicate groups of the entire rows or of the given columns.
+        The sample holds whole rows of df with their group size.
+        """
+        keys = df[column_names] if column_names else df
+        hashes = self.key_hashes(keys) if hashes is None else hashes
+        candidates = np.flatnonzero(pd.Series(hashes).duplicated(keep=False).to_numpy())
+        if len(candidates) == 0:
+            return self._report(df.iloc[:0], np.zeros(0, dtype=np.uint64))
+
+        # Equal hashes of different keys are collisions, not duplicates
+        exact = keys.iloc[candidates].duplicated(keep=False).to_numpy()
+        rows = candidates[exact]
+        return self._report(df.iloc[rows], hashes[rows])
+
+    def _report(self, duplicated: pd.DataFrame, hashes: np.ndarray) -> DuplicateReport:
+        sizes = pd.Series(hashes).value_counts()
+        group_size = pd.Series(hashes).map(sizes).to_numpy()
+        # Largest groups first, rows of a group together
+        order = np.lexsort((hashes, -group_size))[:self.sample_size]
+        sample = duplicated.iloc[order].assign(**{GROUP_SIZE_COLUMN: group_size[order]})
+        return DuplicateReport(
+            duplicate_groups=len(sizes),
+            duplicated_rows=int(sizes.sum()),
+            largest_group=int(sizes.max()) if len(sizes) else 0,
+            sample=sample
+        )
+
+    def _spill(self, table: pa.Table, writers: dict, spill_dir: str):
+        bucket_of_row = self.stable_key_hashes(table) % self.buckets
+        for bucket in np.unique(bucket_of_row):
+            if bucket not in writers:
+                writers[bucket] = pa.ipc.new_file(os.path.join(spill_dir, f"bucket-{bucket}.arrow"), table.schema)
+            writers[bucket].write_table(table.take(np.flatnonzero(bucket_of_row == bucket)))
+
+    def _respill(self, writers: dict, spill_dir: str, schema: pa.Schema) -> dict:
+        """
+        Cast the spilled keys to a promoted schema and spill them again: the hashes, and so the buckets,
+        of a key depend on its type.
+        """
+        old_paths = []
+        for bucket, writer in writers.items():
+            writer.close()
+            path = os.path.join(spill_dir, f"bucket-{bucket}.arrow")
+            # All buckets are moved aside first, the new buckets take the same file names
+            os.rename(path, f"{path}.old")
+            old_paths.append(f"{path}.old")
+        respilled = {}
+        for path in old_paths:
+            with pa.memory_map(path) as source:
+                self._spill(pa.ipc.open_file(source).read_all().cast(schema), respilled, spill_dir)
+            os.remove(path)
+        return respilled
+
+    def detect_chunks(self, chunks: Iterable[pd.DataFrame],
+                      column_names: Optional[List[str]] = None) -> DuplicateReport:
+        """
+        Count the duplicate groups of a stream of DataFrame chunks, holding about 1 / buckets of the keys
+        in memory at a time. The sample holds the key columns only.
+        The key types are unified across the chunks, e.g. a column of nulls only in the first chunk
+        takes the type of the later chunks.
+        """
+        spill_dir = tempfile.mkdtemp(prefix="dq_duplicates_", dir=self.spill_dir)
+        writers = {}
+        schema = None
+        try:
+            for chunk in chunks:
+                keys = chunk[column_names] if column_names else chunk
+                if keys.empty:
+                    continue
+                table = pa.Table.from_pandas(keys, preserve_index=False)
+                table = table.replace_schema_metadata(None)
+                if schema is None:
+                    schema = table.schema
+                elif not table.schema.equals(schema):
+                    unified = pa.unify_schemas([schema, table.schema], promote_options="permissive")
+                    if not unified.equals(schema):
+                        schema = unified
+                        writers = self._respill(writers, spill_dir, schema)
+                    table = table.cast(schema)
+                self._spill(table, writers, spill_dir)
+            for writer in writers.values():
+                writer.close()
+
+            report = DuplicateReport(0, 0, 0, pd.DataFrame(columns=[*(schema.names if schema else []),
+                                                                    GROUP_SIZE_COLUMN]))
+            for bucket in sorted(writers):
+                with pa.memory_map(os.path.join(spill_dir, f"bucket-{bucket}.arrow")) as source:
+                    keys = pa.ipc.open_file(source).read_pandas()
+                report = report.merge(self.detect(keys), self.sample_size)
+            return report
+        finally:
+            for writer in writers.values():
+                try:
+                    writer.close()
+                except (OSError, pa.ArrowInvalid):
+                    pass
+            shutil.rmtree(spill_dir, ignore_errors=True)
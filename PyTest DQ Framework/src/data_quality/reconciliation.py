@@ -0,0 +1,252 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterator, List, Optional, Tuple, Union
+from urllib.parse import unquote
+
+import numpy as np
+import pandas as pd
+import pyarrow.compute as pc
+
+from src.connectors.file_system.parquet_reader import DERIVED_PARTITION_COLUMNS
+
+# Column of the reconciliation result telling which DataFrame a differing row comes from
+SIDE_COLUMN = "side"
+# Directory name of the null partition written by Arrow
+HIVE_NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+# Marker of "no partition streamed yet", None being the partition of null values
+_NO_PARTITION = object()
+
+
+class HashReconciler:
+    """
+    Order-insensitive comparison of two DataFrames in linear time.
+    Every row is hashed into a 64-bit fingerprint and the multisets of fingerprints are compared,
+    so a row present a different number of times on both sides is a difference as well.
+    Only the differing rows are materialized.
+    """
+
+    @staticmethod
+    def _normalize_column(column: pd.Series) -> Tuple[pd.Series, str]:
+        """
+        Convert a column to a canonical representation and return it with its kind:
+        'datetime' (datetime64[ns]), 'int', 'float', 'bool' or 'object'.
+        """
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            if column.cat.categories.dtype == object:
+                # Categories of strings hash like the plain strings
+                return column, "object"
+            column = column.astype(column.cat.categories.dtype)
+
+        if pd.api.types.is_datetime64_any_dtype(column) or (
+                column.dtype == object and pd.api.types.infer_dtype(column, skipna=True) in ("date", "datetime")):
+            column = pd.to_datetime(column, utc=isinstance(column.dtype, pd.DatetimeTZDtype))
+            if isinstance(column.dtype, pd.DatetimeTZDtype):
+                column = column.dt.tz_localize(None)
+            return column.astype("datetime64[ns]"), "datetime"
+
+        if pd.api.types.is_bool_dtype(column):
+            return column, "bool"
+        if pd.api.types.is_integer_dtype(column):
+            if column.isna().any():
+                return column.astype("float64"), "float"
+            return column.astype("int64"), "int"
+        if pd.api.types.is_float_dtype(column):
+            return column.astype("float64"), "float"
+        if column.dtype == object and pd.api.types.infer_dtype(column, skipna=True) in (
+                "decimal", "floating", "integer", "mixed-integer-float"):
+            # Decimals from NUMERIC columns are compared as the floats they are exported as
+            return column.map(float, na_action="ignore").astype("float64"), "float"
+        return column, "object"
+
+    @classmethod
+    def normalize(cls, df1: pd.DataFrame, df2: pd.DataFrame,
+                  columns: List[str]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Bring the columns of both DataFrames to common canonical types, so equal values hash equally:
+        dates and timestamps become datetime64[ns], Decimals become floats, and an integer column
+        compared to a float one is converted to float.
+        """
+        normalized1, normalized2 = {}, {}
+        for name in columns:
+            column1, kind1 = cls._normalize_column(df1[name])
+            column2, kind2 = cls._normalize_column(df2[name])
+            if kind1 != kind2 and {kind1, kind2} <= {"int", "float"}:
+                column1, column2 = column1.astype("float64"), column2.astype("float64")
+            normalized1[name], normalized2[name] = column1, column2
+        return pd.DataFrame(normalized1, index=df1.index), pd.DataFrame(normalized2, index=df2.index)
+
+    @staticmethod
+    def fingerprints(df: pd.DataFrame) -> np.ndarray:
+        """
+        Return the uint64 fingerprint of every row.
+        """
+        float_columns = df.select_dtypes("float").columns
+        if len(float_columns):
+            # -0.0 and 0.0 and the different NaN bit patterns must hash equally
+            df = df.assign(**{name: df[name].fillna(np.nan) + 0.0 for name in float_columns})
+        return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+    @staticmethod
+    def _excess_rows(df: pd.DataFrame, hashes: np.ndarray, excess: pd.Series) -> pd.DataFrame:
+        """
+        Select, for every fingerprint in excess, the first excess[fingerprint] rows carrying it.
+        """
+        hashes = pd.Series(hashes)
+        candidates = hashes[hashes.isin(excess.index)]
+        occurrence = candidates.groupby(candidates).cumcount()
+        keep = occurrence < candidates.map(excess)
+        return df.iloc[keep[keep].index.to_numpy()]
+
+    @classmethod
+    def diff(cls, df1: pd.DataFrame, df2: pd.DataFrame, columns: Optional[List[str]] = None,
+             df1_name: str = "df1", df2_name: str = "df2") -> pd.DataFrame:
+        """
+        Return the rows that are not matched on the other side, in the original representation,
+        with the side column set to df1_name or df2_name. An empty result means equal multisets of rows.
+        """
+        columns = list(df1.columns) if columns is None else list(columns)
+        normalized1, normalized2 = cls.normalize(df1, df2, columns)
+        hashes1 = cls.fingerprints(normalized1)
+        hashes2 = cls.fingerprints(normalized2)
+        del normalized1, normalized2
+
+        counts = pd.Series(hashes1).value_counts().sub(pd.Series(hashes2).value_counts(), fill_value=0)
+        counts = counts[counts != 0].astype("int64")
+        if counts.empty:
+            return pd.DataFrame(columns=[*columns, SIDE_COLUMN])
+
+        only1 = cls._excess_rows(df1[columns], hashes1, counts[counts > 0])
+        only2 = cls._excess_rows(df2[columns], hashes2, -counts[counts < 0])
+        sides = [rows.assign(**{SIDE_COLUMN: name})
+                 for rows, name in ((only1, df1_name), (only2, df2_name)) if not rows.empty]
+        return pd.concat(sides, ignore_index=True)
+
+
+class PartitionedReconciler:
+    """
+    Source to target reconciliation one partition at a time, for datasets larger than memory.
+    The source query is streamed from Postgres ordered by the data column of the partition column
+    (see DERIVED_PARTITION_COLUMNS), so every partition arrives as one contiguous run of rows.
+    Each finished partition is compared with the target partition, read with partition pruning,
+    on up to workers threads; target partitions without source rows are compared last.
+    At most one source partition per worker (plus the one being streamed) is held in memory.
+    """
+    SOURCE_NAME = "source"
+    TARGET_NAME = "target"
+    REPORT_COLUMNS = ["partition", "source_rows", "target_rows", "only_in_source", "only_in_target", "matched"]
+
+    def __init__(self, db_connection, parquet_reader, workers: int = 1, itersize: int = 100000):
+        self.db_connection = db_connection
+        self.parquet_reader = parquet_reader
+        self.workers = workers
+        self.itersize = itersize
+
+    @staticmethod
+    def target_partitions(path: str, partition_column: str) -> List[Optional[str]]:
+        """
+        Return the values of the hive partition directories of the partition column under path.
+        """
+        values = []
+        for name in sorted(os.listdir(path)):
+            prefix = f"{partition_column}="
+            if name.startswith(prefix) and os.path.isdir(os.path.join(path, name)):
+                value = unquote(name[len(prefix):])
+                values.append(None if value == HIVE_NULL_PARTITION else value)
+        return values
+
+    @staticmethod
+    def partition_keys(chunk: pd.DataFrame, partition_column: str) -> pd.Series:
+        """
+        Return the partition value of every row, None for rows with a null data column.
+        """
+        data_column, to_partition = DERIVED_PARTITION_COLUMNS[partition_column]
+        values = chunk[data_column]
+        mapping = {value: to_partition(value) for value in values.drop_duplicates() if not pd.isna(value)}
+        return values.map(mapping).astype(object).where(values.notna(), None)
+
+    def iter_source_partitions(self, source_query: str,
+                               partition_column: str) -> Iterator[Tuple[Optional[str], pd.DataFrame]]:
+        """
+        Stream the source query and yield (partition value, rows) for every partition, in order.
+        """
+        data_column, _ = DERIVED_PARTITION_COLUMNS[partition_column]
+        sql = f"select * from ({source_query.strip().rstrip(';')}) as source order by {data_column}"
+        current, parts, seen = _NO_PARTITION, [], set()
+        for chunk in self.db_connection.iter_data_sql(sql, itersize=self.itersize):
+            if chunk.empty:
+                continue
+            keys = self.partition_keys(chunk, partition_column)
+            for key, part in chunk.groupby(keys, sort=False, dropna=False):
+                key = None if pd.isna(key) else key
+                if key != current:
+                    if current is not _NO_PARTITION:
+                        yield current, pd.concat(parts, ignore_index=True)
+                    if key in seen:
+                        raise ValueError(f"Source rows of partition {key!r} are not contiguous, "
+                                         f"check that {data_column} determines {partition_column}")
+                    current, parts = key, []
+                    seen.add(key)
+                parts.append(part)
+        if current is not _NO_PARTITION:
+            yield current, pd.concat(parts, ignore_index=True)
+
+    def compare_partition(self, path: str, partition_column: str, partition: Optional[str],
+                          source: Optional[pd.DataFrame], columns: Optional[List[str]]) -> dict:
+        """
+        Read the target partition and compare it with the source rows of the partition.
+        Without source rows (None) every target row is unmatched.
+        """
+        filters = (pc.field(partition_column).is_null() if partition is None
+                   else [(partition_column, "=", partition)])
+        target = self.parquet_reader.load(path, recursive=True, columns=columns, filters=filters)
+        if source is None:
+            return {"partition": partition, "source_rows": 0, "target_rows": len(target),
+                    "only_in_source": 0, "only_in_target": len(target), "matched": target.empty}
+        diff = HashReconciler.diff(source, target, columns=columns,
+                                   df1_name=self.SOURCE_NAME, df2_name=self.TARGET_NAME)
+        only_in_source = int((diff[SIDE_COLUMN] == self.SOURCE_NAME).sum())
+        only_in_target = int((diff[SIDE_COLUMN] == self.TARGET_NAME).sum())
+        return {"partition": partition, "source_rows": len(source), "target_rows": len(target),
+                "only_in_source": only_in_source, "only_in_target": only_in_target,
+                "matched": only_in_source == 0 and only_in_target == 0}
+
+    def reconcile(self, source_query: str, target_path: Union[str, Tuple[str, str]], partition_column: str,
+                  columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Compare the source query result with the target dataset partition by partition and return a report
+        with the row counts and the numbers of unmatched rows of every partition.
+        columns are compared (and read from the target), by default all columns of the source query.
+        """
+        if isinstance(target_path, tuple):
+            target_path = self.parquet_reader.resolve_parquet_path(*target_path)
+        remaining = self.target_partitions(target_path, partition_column)
+
+        def source_partitions():
+            nonlocal columns
+            for partition, source in self.iter_source_partitions(source_query, partition_column):
+                if columns is None:
+                    columns = list(source.columns)
+                if partition in remaining:
+                    remaining.remove(partition)
+                yield partition, source
+            # Target partitions the source has no rows for
+            for partition in remaining:
+                yield partition, None
+
+        rows = []
+        if self.workers <= 1:
+            for partition, source in source_partitions():
+                rows.append(self.compare_partition(target_path, partition_column, partition, source, columns))
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                in_flight = set()
+                for partition, source in source_partitions():
+                    if len(in_flight) >= self.workers:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        rows.extend(future.result() for future in done)
+                    in_flight.add(executor.submit(self.compare_partition, target_path, partition_column,
+                                                  partition, source, columns))
+                rows.extend(future.result() for future in in_flight)
+
+        report = pd.DataFrame(rows, columns=self.REPORT_COLUMNS)
+        return report.sort_values("partition", key=lambda keys: keys.astype(str), ignore_index=True)
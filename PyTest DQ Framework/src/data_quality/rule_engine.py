@@ -0,0 +1,169 @@
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Cross-column comparisons: rule name -> comparison of the column with the column named by the rule value
+COLUMN_COMPARISONS = {
+    "less_than": np.less,
+    "less_or_equal": np.less_equal,
+    "greater_than": np.greater,
+    "greater_or_equal": np.greater_equal,
+    "equal_to": np.equal,
+    "not_equal_to": np.not_equal,
+}
+
+
+class RuleEngine:
+    """
+    Vectorized evaluation of declarative column rules.
+
+    Every rule is compiled to a boolean pandas / NumPy / Arrow compute expression marking the invalid rows:
+        min, max                    - value range (inclusive)
+        expected_values             - allowed values (null is invalid unless listed)
+        forbidden_values            - values that must not occur
+        regex                       - the whole string matches the pattern
+        min_length, max_length      - string length in characters
+        scale                       - at most this number of digits after the decimal point
+        precision                   - at most precision - scale digits before the decimal point (scale defaults to 0)
+        less_than, less_or_equal, greater_than, greater_or_equal, equal_to, not_equal_to
+                                    - comparison with another column, given by name
+        not_null                    - True to forbid nulls
+        expression                  - a DataFrame.eval expression that is true for valid rows
+        condition                   - row-wise callable, true for valid rows (last resort, slow)
+    Except for expected_values and not_null, null values satisfy the rules.
+    """
+
+    @staticmethod
+    def _string_array(column: pd.Series) -> pa.Array:
+        values = column.to_numpy(dtype=object)
+        try:
+            return pa.array(values, type=pa.string(), from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            return pa.array(np.where(column.isna(), None, column.astype(str)), type=pa.string())
+
+    @staticmethod
+    def _invalid(valid: pa.Array) -> np.ndarray:
+        """
+        Invert an Arrow boolean validity array, nulls being valid.
+        """
+        return ~pc.fill_null(valid, True).to_numpy(zero_copy_only=False)
+
+    @staticmethod
+    def _numeric(column: pd.Series) -> pd.Series:
+        if column.dtype == object:
+            # Decimals of NUMERIC columns
+            return column.map(float, na_action="ignore").astype("float64")
+        return column.astype("float64")
+
+    @classmethod
+    def _decimal_array(cls, column: pd.Series):
+        """
+        Return an Arrow decimal array of a column of Decimals, or None if it does not hold Decimals.
+        """
+        if column.dtype != object:
+            return None
+        try:
+            array = pa.array(column.to_numpy(dtype=object), from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            return None
+        return array if pa.types.is_decimal(array.type) else None
+
+    @classmethod
+    def _regex(cls, df, column, pattern):
+        anchored = f"^(?:{pattern})$"
+        try:
+            return cls._invalid(pc.match_substring_regex(cls._string_array(df[column]), anchored))
+        except pa.ArrowInvalid:
+            # Patterns RE2 does not support, e.g. look-arounds and back-references
+            return ~df[column].astype("string").str.fullmatch(pattern).fillna(True).to_numpy(dtype=bool)
+
+    @classmethod
+    def _length(cls, df, column, compare, value):
+        lengths = pc.utf8_length(cls._string_array(df[column]))
+        return cls._invalid(compare(lengths, value))
+
+    @classmethod
+    def _scale(cls, df, column, scale):
+        decimals = cls._decimal_array(df[column])
+        if decimals is not None:
+            return cls._invalid(pc.equal(pc.round(decimals, ndigits=scale), decimals))
+        values = cls._numeric(df[column]).to_numpy()
+        with np.errstate(invalid="ignore"):
+            return ~(np.isnan(values) | (np.round(values, scale) == values))
+
+    @classmethod
+    def _precision(cls, df, column, precision, scale):
+        values = cls._numeric(df[column]).to_numpy()
+        with np.errstate(invalid="ignore"):
+            integer_digits_ok = np.abs(np.round(values, scale)) < 10.0 ** (precision - scale)
+        return ~(np.isnan(values) | integer_digits_ok)
+
+    @classmethod
+    def _condition(cls, df, column, condition):
+        if df.empty:
+            return np.zeros(0, dtype=bool)
+        try:
+            valid_condition = df.apply(condition, axis=1)
+        except Exception as e:
+            raise ValueError(f"Error evaluating custom condition for '{column}': {e}")
+        return ~valid_condition.to_numpy(dtype=bool)
+
+    @classmethod
+    def _expression(cls, df, column, expression):
+        try:
+            valid = df.eval(expression)
+        except Exception as e:
+            raise ValueError(f"Error evaluating expression for '{column}': {e}")
+        return ~pd.Series(valid, index=df.index).fillna(True).to_numpy(dtype=bool)
+
+    @classmethod
+    def _compare_columns(cls, df, column, compare, other):
+        if other not in df.columns:
+            raise ValueError(f"Column '{other}' compared with '{column}' not found in Dataframe.")
+        left, right = df[column], df[other]
+        nulls = (left.isna() | right.isna()).to_numpy()
+        with np.errstate(invalid="ignore"):
+            valid = compare(left.to_numpy(), right.to_numpy())
+        return ~(nulls | np.asarray(valid, dtype=bool))
+
+    @classmethod
+    def rule_masks(cls, df: pd.DataFrame, column: str, rules: dict) -> Dict[str, np.ndarray]:
+        """
+        Return the boolean mask of invalid rows of every rule of a column.
+        """
+        values = df[column]
+        compiled: Dict[str, Callable[[object], np.ndarray]] = {
+            "min": lambda v: (values < v).fillna(False).to_numpy(dtype=bool),
+            "max": lambda v: (values > v).fillna(False).to_numpy(dtype=bool),
+            "expected_values": lambda v: ~values.isin(v).to_numpy(),
+            "forbidden_values": lambda v: values.isin(v).to_numpy() & values.notna().to_numpy(),
+            "regex": lambda v: cls._regex(df, column, v),
+            "min_length": lambda v: cls._length(df, column, pc.greater_equal, v),
+            "max_length": lambda v: cls._length(df, column, pc.less_equal, v),
+            "scale": lambda v: cls._scale(df, column, v),
+            "precision": lambda v: cls._precision(df, column, v, rules.get("scale", 0)),
+            "not_null": lambda v: values.isna().to_numpy() if v else np.zeros(len(df), dtype=bool),
+            "expression": lambda v: cls._expression(df, column, v),
+            "condition": lambda v: cls._condition(df, column, v),
+            **{name: (lambda v, compare=compare: cls._compare_columns(df, column, compare, v))
+               for name, compare in COLUMN_COMPARISONS.items()},
+        }
+        unknown = set(rules) - set(compiled)
+        if unknown:
+            raise ValueError(f"Unknown rule(s) for '{column}': {sorted(unknown)}")
+        return {name: compiled[name](value) for name, value in rules.items()}
+
+    @classmethod
+    def invalid_mask(cls, df: pd.DataFrame, column: str, rules: dict) -> np.ndarray:
+        """
+        Return the boolean mask of rows breaking any rule of a column.
+        """
+        if column not in df.columns:
+            raise ValueError(f"Column '{column}' not found in Dataframe.")
+        invalid = np.zeros(len(df), dtype=bool)
+        for mask in cls.rule_masks(df, column, rules).values():
+            invalid |= mask
+        return invalid
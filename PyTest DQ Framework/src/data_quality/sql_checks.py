@@ -0,0 +1,226 @@
+import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.data_quality.check_plan import CheckPlan, DatasetProfile, duplicate_key
+from src.data_quality.duplicates import DuplicateReport, GROUP_SIZE_COLUMN
+
+# Rules comparing a column with another column: rule name -> SQL operator of a valid row
+SQL_COLUMN_COMPARISONS = {
+    "less_than": "<",
+    "less_or_equal": "<=",
+    "greater_than": ">",
+    "greater_or_equal": ">=",
+    "equal_to": "=",
+    "not_equal_to": "<>",
+}
+
+
+def quote_identifier(name: str) -> str:
+    """
+    Quote a column or table name.
+    """
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def quote_literal(value) -> str:
+    """
+    Render a Python value as an SQL literal.
+    """
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float, Decimal)):
+        return repr(float(value)) if isinstance(value, float) else str(value)
+    if isinstance(value, (datetime.date, datetime.datetime, pd.Timestamp)):
+        return f"'{value.isoformat()}'"
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def quote_array(values) -> str:
+    return "ARRAY[" + ", ".join(quote_literal(value) for value in values) + "]"
+
+
+class SqlCheckCompiler:
+    """
+    Compiles a CheckPlan into SQL on a source relation (a table name or a SELECT query):
+    one aggregate query computing the row count, null counts, min/max, numbers of rule violations and
+    duplicate groups of every check, and bounded sample queries of the rows breaking a check.
+    Rules follow RuleEngine (nulls satisfy every rule but expected_values and not_null);
+    Python-only rules (expression, condition) cannot be compiled. Regular expressions are PostgreSQL ones.
+    """
+
+    def __init__(self, plan: CheckPlan, source: str):
+        self.plan = plan
+        if source.strip().lower().startswith(("select", "with")):
+            self.source = source.strip().rstrip(";")
+        else:
+            self.source = "select * from " + ".".join(quote_identifier(part) for part in source.split("."))
+
+    def with_source(self, query: str) -> str:
+        return f"with source as (\n{self.source}\n)\n{query}"
+
+    @staticmethod
+    def violation(column: str, rule: str, value, rules: dict) -> str:
+        """
+        Return the SQL predicate of the rows breaking a rule of a column.
+        """
+        c = quote_identifier(column)
+        if rule == "min":
+            return f"{c} < {quote_literal(value)}"
+        if rule == "max":
+            return f"{c} > {quote_literal(value)}"
+        if rule == "expected_values":
+            listed = [v for v in value if v is not None and not pd.isna(v)]
+            allowed = f"{c} = ANY({quote_array(listed)})" if listed else "FALSE"
+            if len(listed) < len(value):
+                return f"({c} IS NOT NULL AND NOT {allowed})"
+            return f"({c} IS NULL OR NOT {allowed})"
+        if rule == "forbidden_values":
+            listed = [v for v in value if v is not None and not pd.isna(v)]
+            return f"{c} = ANY({quote_array(listed)})" if listed else "FALSE"
+        if rule == "regex":
+            return f"{c}::text !~ {quote_literal(f'^(?:{value})$')}"
+        if rule == "min_length":
+            return f"char_length({c}::text) < {int(value)}"
+        if rule == "max_length":
+            return f"char_length({c}::text) > {int(value)}"
+        if rule == "scale":
+            return f"{c}::numeric <> round({c}::numeric, {int(value)})"
+        if rule == "precision":
+            scale = int(rules.get("scale", 0))
+            return f"abs(round({c}::numeric, {scale})) >= 10::numeric ^ {int(value) - scale}"
+        if rule == "not_null":
+            return f"{c} IS NULL" if value else "FALSE"
+        if rule in SQL_COLUMN_COMPARISONS:
+            return f"NOT ({c} {SQL_COLUMN_COMPARISONS[rule]} {quote_identifier(value)})"
+        if rule in ("expression", "condition"):
+            raise ValueError(f"Rule '{rule}' of '{column}' is evaluated in Python and cannot be pushed down to SQL.")
+        raise ValueError(f"Unknown rule(s) for '{column}': ['{rule}']")
+
+    def rule_violation(self, column: str, rules: dict) -> str:
+        predicates = [self.violation(column, rule, value, rules) for rule, value in rules.items()]
+        return " OR ".join(f"({predicate})" for predicate in predicates) or "FALSE"
+
+    @staticmethod
+    def key_list(key_columns: List[str], prefix: str = "") -> str:
+        return ", ".join(prefix + quote_identifier(name) for name in key_columns)
+
+    def aggregate_query(self, columns: List[str]) -> Tuple[str, dict]:
+        """
+        Return the aggregate query of the whole plan and the meaning of its (positional) output columns.
+        """
+        fields = {"row_count": ("row_count", None)}
+        expressions = ["count(*) AS row_count"]
+        for i, name in enumerate(self.plan.not_null_columns):
+            if name in columns:
+                expressions.append(f"count(*) - count({quote_identifier(name)}) AS nulls_{i}")
+                fields[f"nulls_{i}"] = ("nulls", name)
+        for i, (name, rules) in enumerate(self.plan.column_rules.items()):
+            if name not in columns:
+                raise ValueError(f"Column '{name}' not found in Dataframe.")
+            if "min" in rules or "max" in rules:
+                expressions.append(f"min({quote_identifier(name)}) AS min_{i}")
+                expressions.append(f"max({quote_identifier(name)}) AS max_{i}")
+                fields[f"min_{i}"] = ("min", name)
+                fields[f"max_{i}"] = ("max", name)
+            expressions.append(f"count(*) FILTER (WHERE {self.rule_violation(name, rules)}) AS invalid_{i}")
+            fields[f"invalid_{i}"] = ("invalid", name)
+
+        joins = []
+        for i, key in enumerate(self.plan.duplicate_keys):
+            key_columns = list(key) if key else columns
+            joins.append(
+                f"CROSS JOIN (SELECT count(*) AS duplicate_groups_{i}, coalesce(sum(n), 0) AS duplicated_rows_{i}, "
+                f"coalesce(max(n), 0) AS largest_group_{i} FROM (SELECT count(*) AS n FROM source "
+                f"GROUP BY {self.key_list(key_columns)} HAVING count(*) > 1) AS groups_{i}) AS duplicates_{i}")
+            for part in ("duplicate_groups", "duplicated_rows", "largest_group"):
+                fields[f"{part}_{i}"] = (part, duplicate_key(key))
+
+        query = (f"SELECT * FROM (SELECT {', '.join(expressions)} FROM source) AS totals"
+                 + "".join(f"\n{join}" for join in joins))
+        return self.with_source(query), fields
+
+    def violation_sample_query(self, column: str, sample_size: int) -> str:
+        return self.with_source(
+            f"SELECT * FROM source WHERE {self.rule_violation(column, self.plan.column_rules[column])} "
+            f"LIMIT {int(sample_size)}")
+
+    def duplicate_sample_query(self, key_columns: List[str], sample_size: int) -> str:
+        """
+        Return the rows of the largest duplicate groups with their group size.
+        """
+        matches = " AND ".join(f"source.{quote_identifier(name)} IS NOT DISTINCT FROM groups.{quote_identifier(name)}"
+                               for name in key_columns)
+        return self.with_source(
+            f"SELECT source.*, groups.n AS {GROUP_SIZE_COLUMN} FROM source JOIN ("
+            f"SELECT {self.key_list(key_columns)}, count(*) AS n FROM source GROUP BY {self.key_list(key_columns)} "
+            f"HAVING count(*) > 1 ORDER BY n DESC LIMIT {int(sample_size)}) AS groups ON {matches} "
+            f"ORDER BY groups.n DESC, {self.key_list(key_columns, 'source.')} LIMIT {int(sample_size)}")
+
+
+class SqlCheckRunner:
+    """
+    Runs a CheckPlan inside Postgres through a PostgresConnectorContextManager (or any connection with
+    get_data_sql and the SQL dialect of compiler_class, e.g. DuckDBEngine) and returns its DatasetProfile,
+    so the DataQualityLibrary checks assert on it like on a profile computed in pandas.
+    Only the aggregates and, for failing checks, samples of at most sample_size rows are fetched.
+    """
+
+    def __init__(self, db_connection, sample_size: int = 20, compiler_class=SqlCheckCompiler):
+        self.db_connection = db_connection
+        self.sample_size = sample_size
+        self.compiler_class = compiler_class
+
+    def profile(self, plan: CheckPlan, source: str) -> DatasetProfile:
+        compiler = self.compiler_class(plan, source)
+        columns = list(self.db_connection.get_data_sql(compiler.with_source("SELECT * FROM source LIMIT 0")).columns)
+        query, fields = compiler.aggregate_query(columns)
+        totals = self.db_connection.get_data_sql(query).iloc[0]
+
+        null_counts: Dict[str, Optional[int]] = {name: None for name in plan.not_null_columns}
+        minimums, maximums, invalid_counts, duplicate_counts = {}, {}, {}, {}
+        row_count = 0
+        for alias, (kind, target) in fields.items():
+            value = totals[alias]
+            if kind == "row_count":
+                row_count = int(value)
+            elif kind == "nulls":
+                null_counts[target] = int(value)
+            elif kind == "min":
+                minimums[target] = value
+            elif kind == "max":
+                maximums[target] = value
+            elif kind == "invalid":
+                invalid_counts[target] = int(value)
+            else:
+                duplicate_counts.setdefault(target, {})[kind] = int(value)
+
+        invalid_rows = {}
+        for name, count in invalid_counts.items():
+            invalid_rows[name] = (self.db_connection.get_data_sql(compiler.violation_sample_query(name, self.sample_size))
+                                  if count else pd.DataFrame(columns=columns))
+
+        duplicate_reports = {}
+        for key, counts in duplicate_counts.items():
+            if counts["duplicate_groups"]:
+                sample = self.db_connection.get_data_sql(
+                    compiler.duplicate_sample_query(list(key) if key else columns, self.sample_size))
+            else:
+                sample = pd.DataFrame(columns=[*columns, GROUP_SIZE_COLUMN])
+            duplicate_reports[key] = DuplicateReport(sample=sample, **counts)
+
+        return DatasetProfile(
+            row_count=row_count,
+            columns=columns,
+            null_counts=null_counts,
+            duplicate_reports=duplicate_reports,
+            minimums=minimums,
+            maximums=maximums,
+            column_rules=dict(plan.column_rules),
+            invalid_rows=invalid_rows,
+            invalid_counts=invalid_counts,
+        )
@@ -1,7 +1,11 @@
 import pytest
-from src.connectors.postgres.postgres_connector import PostgresConnectorContextManager
+from src.connectors.postgres.postgres_connector import PostgresConnectionPool, PostgresConnectorContextManager
 from src.data_quality.data_quality_validation_library import DataQualityLibrary
 from src.connectors.file_system.parquet_reader import ParquetReader
+from src.connectors.file_system.duckdb_engine import DuckDBEngine
+from src.cache.arrow_ipc_cache import ArrowIPCCache
+from src.data_quality.reconciliation import PartitionedReconciler
+from src.data_quality.sql_checks import SqlCheckRunner
 
 
 def pytest_addoption(parser):
@@ -10,6 +14,18 @@ def pytest_addoption(parser):
     parser.addoption("--db_port", action="store", default="5434", help="Database port")
     parser.addoption("--db_user", action="store", default=None, help="Database user")
     parser.addoption("--db_password", action="store", default=None, help="Database password")
+    parser.addoption("--db_pool_size", action="store", default="4", help="Maximum number of pooled DB connections")
+    parser.addoption("--db_cache_dir", action="store", default="",
+                     help="Folder of the Arrow cache of source query results, e.g. .query_cache (disabled by default)")
+    parser.addoption("--db_cache_size_mb", action="store", default="1024", help="Maximum size of the cache")
+    parser.addoption("--reconcile_workers", action="store", default="2",
+                     help="Number of partitions compared in parallel by the partitioned reconciliation")
+    parser.addoption("--parquet_cache_dir", action="store", default="",
+                     help="Folder of the Arrow IPC cache of parquet reads, e.g. .parquet_cache (disabled by default)")
+    parser.addoption("--parquet_cache_size_mb", action="store", default="1024", help="Maximum size of the cache")
+    parser.addoption("--parquet_engine", action="store", default="pandas", choices=["pandas", "duckdb"],
+                     help="Engine of the parquet checks: pandas (ParquetReader) or duckdb (DuckDBEngine)")
+    parser.addoption("--duckdb_threads", action="store", default="0", help="DuckDB threads, 0 for all cores")
 
 
 def pytest_configure(config):
@@ -25,16 +41,30 @@ def pytest_configure(config):
 
 
 @pytest.fixture(scope='session')
-def db_connection(request):
+def db_pool(request):
     db_host = request.config.getoption("--db_host")
     db_name = request.config.getoption("--db_name")
     db_port = request.config.getoption("--db_port")
     db_user = request.config.getoption("--db_user")
     db_password = request.config.getoption("--db_password")
+    db_pool_size = int(request.config.getoption("--db_pool_size"))
     try:
-        with PostgresConnectorContextManager(
-                db_user=db_user, db_password=db_password, db_host=db_host,
-                db_name=db_name, db_port=db_port) as db_connector:
+        pool = PostgresConnectionPool(
+            db_user=db_user, db_password=db_password, db_host=db_host,
+            db_name=db_name, db_port=db_port, max_size=db_pool_size)
+    except Exception as e:
+        pytest.fail(f"Failed to initialize PostgresConnectionPool: {e}")
+    with pool:
+        yield pool
+
+
+@pytest.fixture(scope='session')
+def db_connection(request, db_pool):
+    cache_dir = request.config.getoption("--db_cache_dir")
+    cache_size_mb = int(request.config.getoption("--db_cache_size_mb"))
+    try:
+        cache = ArrowIPCCache(cache_dir, max_bytes=cache_size_mb * 1024 * 1024) if cache_dir else None
+        with PostgresConnectorContextManager(pool=db_pool, cache=cache) as db_connector:
             yield db_connector
     except Exception as e:
         pytest.fail(f"Failed to initialize PostgresConnectorContextManager: {e}")
@@ -42,13 +72,50 @@ def db_connection(request):
 
 @pytest.fixture(scope='session')
 def parquet_reader(request):
+    cache_dir = request.config.getoption("--parquet_cache_dir")
+    cache_size_mb = int(request.config.getoption("--parquet_cache_size_mb"))
     try:
-        reader = ParquetReader()
+        cache = ArrowIPCCache(cache_dir, max_bytes=cache_size_mb * 1024 * 1024) if cache_dir else None
+        reader = ParquetReader(cache=cache)
         yield reader
     except Exception as e:
         pytest.fail(f"Failed to initialize ParquetReader: {e}")
 
 
+@pytest.fixture(scope='session')
+def parquet_engine(request, parquet_reader):
+    """
+    The loader of the parquet targets: ParquetReader, or DuckDBEngine with --parquet_engine duckdb.
+    """
+    if request.config.getoption("--parquet_engine") == "pandas":
+        yield parquet_reader
+        return
+    threads = int(request.config.getoption("--duckdb_threads"))
+    try:
+        engine = DuckDBEngine(threads=threads or None)
+    except Exception as e:
+        pytest.fail(f"Failed to initialize DuckDBEngine: {e}")
+    with engine:
+        yield engine
+
+
+@pytest.fixture(scope='session')
+def partitioned_reconciler(request, db_connection, parquet_reader):
+    workers = int(request.config.getoption("--reconcile_workers"))
+    try:
+        yield PartitionedReconciler(db_connection, parquet_reader, workers=workers)
+    except Exception as e:
+        pytest.fail(f"Failed to initialize PartitionedReconciler: {e}")
+
+
+@pytest.fixture(scope='session')
+def sql_check_runner(db_connection):
+    try:
+        yield SqlCheckRunner(db_connection)
+    except Exception as e:
+        pytest.fail(f"Failed to initialize SqlCheckRunner: {e}")
+
+
 @pytest.fixture(scope='session')
 def data_quality_library():
     try:
@@ -4,45 +4,69 @@ Requirement(s): TICKET-2
 Author(s): Anton Birytski
 """
 
+import pyarrow.compute as pc
 import pytest
 
+from src.data_quality.check_plan import CheckPlan
+
+SOURCE_QUERY = """
+select 
+    f.facility_type,
+    v.visit_timestamp::date AS visit_date,
+    round(avg(v.duration_minutes), 2) as avg_time_spent
+from visits v
+join facilities f on f.id = v.facility_id
+group by
+    f.facility_type,
+    visit_date
+"""
+TARGET_LOCAL_PATH = r"C:/tmp/parquet_data/facility_type_avg_time_spent_per_visit_date"
+TARGET_JENKINS_PATH = r"/parquet_data/facility_type_avg_time_spent_per_visit_date"
+SOURCE_CHECK_PLAN = CheckPlan(column_rules={"avg_time_spent": {"scale": 2}})
+TARGET_COLUMNS = ['facility_type', 'visit_date', 'avg_time_spent']
+TARGET_CHECK_PLAN = CheckPlan(duplicate_keys=[None])
+
 
 @pytest.fixture(scope='module')
 def source_data(db_connection):
-    source_query = """
-    select 
-        f.facility_type,
-        v.visit_timestamp::date AS visit_date,
-        round(avg(v.duration_minutes), 2) as avg_time_spent
-    from visits v
-    join facilities f on f.id = v.facility_id
-    group by
-        f.facility_type,
-        visit_date
-    """
-    source_data = db_connection.get_data_sql(source_query)
+    source_data = db_connection.get_data_sql(SOURCE_QUERY)
     return source_data
 
 
 @pytest.fixture(scope='module')
-def target_data(parquet_reader):
-    local_path = r"C:/tmp/parquet_data/facility_type_avg_time_spent_per_visit_date"
-    jenkins_path = r"/parquet_data/facility_type_avg_time_spent_per_visit_date"
-    target_data = parquet_reader.load((local_path, jenkins_path), recursive=True)
+def source_profile(sql_check_runner):
+    return sql_check_runner.profile(SOURCE_CHECK_PLAN, SOURCE_QUERY)
+
+
+@pytest.fixture(scope='module')
+def target_data(parquet_engine):
+    target_data = parquet_engine.load((TARGET_LOCAL_PATH, TARGET_JENKINS_PATH), recursive=True,
+                                      columns=TARGET_COLUMNS)
     return target_data
 
 
+@pytest.fixture(scope='module')
+def target_profile(target_data):
+    return TARGET_CHECK_PLAN.profile(target_data)
+
+
+@pytest.fixture(scope='module')
+def target_statistics(parquet_reader):
+    return parquet_reader.read_statistics((TARGET_LOCAL_PATH, TARGET_JENKINS_PATH), recursive=True,
+                                          columns=TARGET_COLUMNS)
+
+
 @pytest.mark.parquet_data
 @pytest.mark.smoke
 @pytest.mark.facility_type_avg_time_spent_per_visit_date
-def test_check_dataset_is_not_empty(target_data, data_quality_library):
-    data_quality_library.check_dataset_is_not_empty(df=target_data)
+def test_check_dataset_is_not_empty(target_statistics, data_quality_library):
+    data_quality_library.check_dataset_is_not_empty(df=target_statistics)
 
 
 @pytest.mark.parquet_data
 @pytest.mark.facility_type_avg_time_spent_per_visit_date
-def test_check_count(source_data, target_data, data_quality_library):
-    data_quality_library.check_count(source_data, target_data, df1_name="Source data", df2_name="Target data")
+def test_check_count(source_profile, target_statistics, data_quality_library):
+    data_quality_library.check_count(source_profile, target_statistics, df1_name="Source data", df2_name="Target data")
 
 
 @pytest.mark.parquet_data
@@ -53,19 +77,37 @@ def test_check_data_completeness(source_data, target_data, data_quality_library)
 
 @pytest.mark.parquet_data
 @pytest.mark.facility_type_avg_time_spent_per_visit_date
-def test_check_uniqueness(target_data, data_quality_library):
-    data_quality_library.check_duplicates(df=target_data)
+def test_check_data_completeness_by_partition(partitioned_reconciler, data_quality_library):
+    report = partitioned_reconciler.reconcile(
+        source_query=SOURCE_QUERY,
+        target_path=(TARGET_LOCAL_PATH, TARGET_JENKINS_PATH),
+        partition_column="partition_date",
+        columns=TARGET_COLUMNS)
+    data_quality_library.check_partitions_reconciled(report)
+
+
+@pytest.mark.parquet_data
+@pytest.mark.facility_type_avg_time_spent_per_visit_date
+def test_check_data_completeness_of_facility_type(source_data, parquet_reader, data_quality_library):
+    facility_type = source_data["facility_type"].min()
+    target_data = parquet_reader.load((TARGET_LOCAL_PATH, TARGET_JENKINS_PATH), recursive=True,
+                                      columns=TARGET_COLUMNS, filters=pc.field("facility_type") == facility_type)
+    data_quality_library.check_data_completeness(df1=source_data[source_data["facility_type"] == facility_type],
+                                                 df2=target_data)
+
+
+@pytest.mark.parquet_data
+@pytest.mark.facility_type_avg_time_spent_per_visit_date
+def test_check_uniqueness(target_profile, data_quality_library):
+    data_quality_library.check_duplicates(df=target_profile)
 
 
 @pytest.mark.parquet_data
 @pytest.mark.facility_type_avg_time_spent_per_visit_date
-def test_check_not_null_values(target_data, data_quality_library):
-    data_quality_library.check_not_null_values(df=target_data,
-                                               column_names=['facility_type', 'visit_date', 'avg_time_spent'])
+def test_check_not_null_values(target_statistics, data_quality_library):
+    data_quality_library.check_not_null_values(df=target_statistics)
 
 @pytest.mark.parquet_data
 @pytest.mark.facility_type_avg_time_spent_per_visit_date
-def test_avg_time_spent_validity(source_data, data_quality_library):
-    data_quality_library.check_column_rules(df=source_data,
-                                            column_rules={"avg_time_spent": {
-                                                "condition": lambda row: round(row["avg_time_spent"], 2) == row["avg_time_spent"]}})
+def test_avg_time_spent_validity(source_profile, data_quality_library):
+    data_quality_library.check_column_rules(df=source_profile)
@@ -6,44 +6,68 @@ Author(s): Anton Birytski
 
 import pytest
 
+from src.data_quality.check_plan import CheckPlan
+
+SOURCE_QUERY = """
+select
+    f.facility_type,
+    concat(p.first_name, ' ', p.last_name) as full_name,
+    sum(v.treatment_cost) as sum_treatment_cost
+from visits v
+join facilities f on f.id = v.facility_id
+join patients p on p.id = v.patient_id
+group by
+    f.facility_type,
+    full_name
+"""
+TARGET_LOCAL_PATH = r"C:/tmp/parquet_data/patient_sum_treatment_cost_per_facility_type"
+TARGET_JENKINS_PATH = r"/parquet_data/patient_sum_treatment_cost_per_facility_type"
+SOURCE_CHECK_PLAN = CheckPlan()
+TARGET_COLUMNS = ['facility_type', 'full_name', 'sum_treatment_cost']
+TARGET_CHECK_PLAN = CheckPlan(duplicate_keys=[None])
+TARGET_COLUMN_RULES = {"sum_treatment_cost": {"min": 0}}
+
 
 @pytest.fixture(scope='module')
 def source_data(db_connection):
-    source_query = """
-    select
-        f.facility_type,
-        concat(p.first_name, ' ', p.last_name) as full_name,
-        sum(v.treatment_cost) as sum_treatment_cost
-    from visits v
-    join facilities f on f.id = v.facility_id
-    join patients p on p.id = v.patient_id
-    group by
-        f.facility_type,
-        full_name
-    """
-    source_data = db_connection.get_data_sql(source_query)
+    source_data = db_connection.get_data_sql(SOURCE_QUERY)
     return source_data
 
 
 @pytest.fixture(scope='module')
-def target_data(parquet_reader):
-    local_path = r"C:/tmp/parquet_data/patient_sum_treatment_cost_per_facility_type"
-    jenkins_path = r"/parquet_data/patient_sum_treatment_cost_per_facility_type"
-    target_data = parquet_reader.load((local_path, jenkins_path), recursive=True)
+def source_profile(sql_check_runner):
+    return sql_check_runner.profile(SOURCE_CHECK_PLAN, SOURCE_QUERY)
+
+
+@pytest.fixture(scope='module')
+def target_data(parquet_engine):
+    target_data = parquet_engine.load((TARGET_LOCAL_PATH, TARGET_JENKINS_PATH), recursive=True,
+                                      columns=TARGET_COLUMNS)
     return target_data
 
 
+@pytest.fixture(scope='module')
+def target_profile(target_data):
+    return TARGET_CHECK_PLAN.profile(target_data)
+
+
+@pytest.fixture(scope='module')
+def target_statistics(parquet_reader):
+    return parquet_reader.read_statistics((TARGET_LOCAL_PATH, TARGET_JENKINS_PATH), recursive=True,
+                                          columns=TARGET_COLUMNS)
+
+
 @pytest.mark.parquet_data
 @pytest.mark.smoke
 @pytest.mark.patient_sum_treatment_cost_per_facility_type
-def test_check_dataset_is_not_empty(target_data, data_quality_library):
-    data_quality_library.check_dataset_is_not_empty(df=target_data)
+def test_check_dataset_is_not_empty(target_statistics, data_quality_library):
+    data_quality_library.check_dataset_is_not_empty(df=target_statistics)
 
 
 @pytest.mark.parquet_data
 @pytest.mark.patient_sum_treatment_cost_per_facility_type
-def test_check_count(source_data, target_data, data_quality_library):
-    data_quality_library.check_count(df1=source_data, df2=target_data, df1_name="Source data", df2_name="Target data")
+def test_check_count(source_profile, target_statistics, data_quality_library):
+    data_quality_library.check_count(source_profile, target_statistics, df1_name="Source data", df2_name="Target data")
 
 
 @pytest.mark.parquet_data
@@ -54,18 +78,28 @@ def test_check_data_completeness(source_data, target_data, data_quality_library)
 
 @pytest.mark.parquet_data
 @pytest.mark.patient_sum_treatment_cost_per_facility_type
-def test_check_uniqueness(target_data, data_quality_library):
-    data_quality_library.check_duplicates(df=target_data)
+def test_check_data_completeness_by_partition(partitioned_reconciler, data_quality_library):
+    report = partitioned_reconciler.reconcile(
+        source_query=SOURCE_QUERY,
+        target_path=(TARGET_LOCAL_PATH, TARGET_JENKINS_PATH),
+        partition_column="facility_type_partition",
+        columns=TARGET_COLUMNS)
+    data_quality_library.check_partitions_reconciled(report)
+
+
+@pytest.mark.parquet_data
+@pytest.mark.patient_sum_treatment_cost_per_facility_type
+def test_check_uniqueness(target_profile, data_quality_library):
+    data_quality_library.check_duplicates(df=target_profile)
 
 
 @pytest.mark.parquet_data
 @pytest.mark.patient_sum_treatment_cost_per_facility_type
-def test_check_not_null_values(target_data, data_quality_library):
-    data_quality_library.check_not_null_values(df=target_data,
-                                               column_names=['facility_type', 'full_name', 'sum_treatment_cost'])
+def test_check_not_null_values(target_statistics, data_quality_library):
+    data_quality_library.check_not_null_values(df=target_statistics)
 
 
 @pytest.mark.parquet_data
 @pytest.mark.patient_sum_treatment_cost_per_facility_type
-def test_sum_treatment_cost_validity(target_data, data_quality_library):
-    data_quality_library.check_column_rules(df=target_data, column_rules={"sum_treatment_cost": {"min": 0}})
+def test_sum_treatment_cost_validity(target_statistics, data_quality_library):
+    data_quality_library.check_column_rules(df=target_statistics, column_rules=TARGET_COLUMN_RULES)
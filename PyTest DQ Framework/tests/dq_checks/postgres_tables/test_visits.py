@@ -0,0 +1,29 @@
+"""
+Description: Data Quality checks for the visits table
+Requirement(s): (facility_id, patient_id, visit_timestamp) is the merge key of visits and must be unique
+"""
+
+import pytest
+
+from src.data_quality.check_plan import CheckPlan
+
+VISITS_KEY_COLUMNS = ['facility_id', 'patient_id', 'visit_timestamp']
+VISITS_CHECK_PLAN = CheckPlan(not_null_columns=VISITS_KEY_COLUMNS)
+
+
+@pytest.fixture(scope='module')
+def visits_profile(sql_check_runner):
+    return sql_check_runner.profile(VISITS_CHECK_PLAN, "visits")
+
+
+@pytest.mark.postgres_data
+@pytest.mark.visits
+def test_check_visits_key_uniqueness(db_connection, data_quality_library):
+    chunks = db_connection.iter_data_sql(f"select {', '.join(VISITS_KEY_COLUMNS)} from visits", itersize=100000)
+    data_quality_library.check_duplicates_in_chunks(chunks=chunks, column_names=VISITS_KEY_COLUMNS)
+
+
+@pytest.mark.postgres_data
+@pytest.mark.visits
+def test_check_visits_key_not_null_values(visits_profile, data_quality_library):
+    data_quality_library.check_not_null_values(df=visits_profile)
@@ -0,0 +1,65 @@
+import gc
+import os
+
+import pyarrow as pa
+
+from src.cache.arrow_ipc_cache import ArrowIPCCache
+
+
+def table(rows=1000):
+    return pa.table({"id": list(range(rows)), "name": [f"name {i}" for i in range(rows)]})
+
+
+def test_get_misses_unknown_keys(tmp_path):
+    assert ArrowIPCCache(str(tmp_path)).get("missing") is None
+
+
+def test_put_then_get(tmp_path):
+    cache = ArrowIPCCache(str(tmp_path))
+    cache.put("key", table())
+
+    cached = cache.get("key")
+    gc.collect()
+
+    assert cached.equals(table())
+
+
+def test_make_key_changes_with_the_files_and_options(tmp_path):
+    path = tmp_path / "data.parquet"
+    path.write_bytes(b"one")
+    key = ArrowIPCCache.make_key([str(path)], columns=["id"])
+
+    assert ArrowIPCCache.make_key([str(path)], columns=["id"]) == key
+    assert ArrowIPCCache.make_key([str(path)], columns=["name"]) != key
+    path.write_bytes(b"other")
+    assert ArrowIPCCache.make_key([str(path)], columns=["id"]) != key
+
+
+def test_evict_drops_the_least_recently_used_entries(tmp_path):
+    cache = ArrowIPCCache(str(tmp_path))
+    cache.put("old", table())
+    cache.put("new", table())
+    os.utime(cache._path("old"), ns=(0, 0))
+    cache.max_bytes = os.path.getsize(cache._path("new"))
+
+    cache.evict()
+
+    assert cache.get("old") is None
+    assert cache.get("new") is not None
+
+
+def test_put_keeps_the_entry_it_stores(tmp_path):
+    cache = ArrowIPCCache(str(tmp_path), max_bytes=1)
+
+    cache.put("key", table())
+
+    assert cache.get("key") is not None
+
+
+def test_clear(tmp_path):
+    cache = ArrowIPCCache(str(tmp_path))
+    cache.put("key", table())
+
+    cache.clear()
+
+    assert cache.get("key") is None
@@ -0,0 +1,95 @@
+import pandas as pd
+import pytest
+
+from src.connectors.file_system.parquet_reader import ParquetStatistics
+from src.data_quality.check_plan import CheckPlan
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        "id": [1, 2, 2, 3],
+        "name": ["a", None, "b", "c"],
+        "cost": [10.0, -1.0, 5.0, 7.5],
+    })
+
+
+def statistics(df, minimums, maximums, loads):
+    """
+    Footer statistics of df, recording the columns every load reads.
+    """
+    def load(columns):
+        loads.append(columns)
+        return df[columns]
+    return ParquetStatistics(row_count=len(df), columns=list(df.columns), null_counts=df.isna().sum().to_dict(),
+                             minimums=minimums, maximums=maximums, load=load)
+
+
+def test_profile_computes_every_check_of_the_plan(df):
+    plan = CheckPlan(not_null_columns=["name", "missing"], duplicate_keys=[None, ["id"]],
+                     column_rules={"cost": {"min": 0}})
+
+    profile = plan.profile(df)
+
+    assert (profile.row_count, profile.columns, profile.empty) == (4, ["id", "name", "cost"], False)
+    assert profile.nulls() == {"name": 1, "missing": None}
+    assert profile.duplicates().empty
+    assert profile.duplicates(["id"]).duplicated_rows == 2
+    assert (profile.minimums, profile.maximums) == ({"cost": -1.0}, {"cost": 10.0})
+    assert profile.rule_violations()["cost"]["id"].tolist() == [2]
+    assert profile.invalid_counts == {"cost": 1}
+
+
+def test_profile_of_an_empty_frame(df):
+    profile = CheckPlan(not_null_columns=["name"], duplicate_keys=[None]).profile(df.iloc[:0])
+
+    assert profile.empty
+    assert profile.nulls() == {"name": 0}
+    assert profile.duplicates().empty
+
+
+def test_profile_rejects_rules_of_missing_columns(df):
+    with pytest.raises(ValueError, match="Column 'missing' not found"):
+        CheckPlan(column_rules={"missing": {"min": 0}}).profile(df)
+
+
+def test_profile_answers_only_planned_checks(df):
+    profile = CheckPlan(not_null_columns=["name"], column_rules={"cost": {"min": 0}}).profile(df)
+
+    with pytest.raises(ValueError, match="not in the check plan"):
+        profile.duplicates(["id"])
+    with pytest.raises(ValueError, match="not in the check plan"):
+        profile.nulls(["id"])
+    with pytest.raises(ValueError, match="not in the check plan"):
+        profile.rule_violations({"cost": {"min": 1}})
+
+
+def test_profile_delegates_to_other_engines(df):
+    plan = CheckPlan()
+
+    class Dataset:
+        def profile(self, check_plan):
+            return check_plan
+
+    assert plan.profile(Dataset()) is plan
+
+
+def test_profile_statistics_reads_only_undecided_columns(df):
+    loads = []
+    plan = CheckPlan(column_rules={"id": {"min": 1, "max": 3}, "cost": {"min": 0}})
+
+    profile = plan.profile_statistics(statistics(df, {"id": 1, "cost": -1.0}, {"id": 3, "cost": 10.0}, loads))
+
+    assert loads == [["id", "name", "cost"]]
+    assert profile.invalid_counts == {"id": 0, "cost": 1}
+    assert profile.rule_violations()["cost"]["id"].tolist() == [2]
+
+
+def test_profile_statistics_proven_by_the_footers_reads_no_rows(df):
+    loads = []
+    plan = CheckPlan(column_rules={"id": {"min": 1, "max": 3}})
+
+    profile = plan.profile_statistics(statistics(df, {"id": 1}, {"id": 3}, loads))
+
+    assert loads == []
+    assert (profile.row_count, profile.invalid_counts) == (4, {"id": 0})
@@ -0,0 +1,102 @@
+from datetime import date
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+from src.data_quality.check_plan import CheckPlan
+from src.data_quality.reconciliation import SIDE_COLUMN, HashReconciler
+
+pytest.importorskip("duckdb")
+
+from src.connectors.file_system.duckdb_engine import DuckDBEngine  # noqa: E402
+
+
+@pytest.fixture
+def engine():
+    with DuckDBEngine(threads=1) as engine:
+        yield engine
+
+
+@pytest.fixture
+def visits():
+    return pd.DataFrame({
+        "visit_date": pd.to_datetime(["2024-01-01", "2024-01-15", "2024-02-01", "2024-02-01"]),
+        "cost": [10.5, 20.0, 30.25, 30.25],
+        "duration": [30, 45, 60, 60],
+    })
+
+
+@pytest.fixture
+def export_path(tmp_path, visits):
+    """
+    visits exported like LoadParquet does, partitioned by partition_date.
+    """
+    visits.assign(partition_date=visits["visit_date"].dt.strftime("%Y-%m")).to_parquet(
+        tmp_path, partition_cols=["partition_date"], index=False)
+    return str(tmp_path)
+
+
+def test_load_leaves_out_the_hive_partitions_by_default(engine, export_path):
+    dataset = engine.load(export_path, recursive=True)
+
+    assert dataset.columns == ["visit_date", "cost", "duration"]
+    assert (len(dataset), dataset.empty) == (4, False)
+    assert engine.load(export_path, recursive=True, columns=["partition_date"]).columns == ["partition_date"]
+
+
+def test_register(engine, visits):
+    dataset = engine.register(visits.iloc[:0])
+
+    assert dataset.columns == ["visit_date", "cost", "duration"]
+    assert dataset.empty
+
+
+def test_profile_matches_the_pandas_profile(engine, export_path, visits):
+    plan = CheckPlan(not_null_columns=["cost"], duplicate_keys=[None],
+                     column_rules={"cost": {"min": 15, "scale": 1}, "duration": {"max": 50}})
+
+    profile = plan.profile(engine.load(export_path, recursive=True))
+    expected = plan.profile(visits)
+
+    assert profile.row_count == expected.row_count
+    assert profile.nulls() == expected.nulls() == {"cost": 0}
+    assert profile.duplicates().duplicated_rows == expected.duplicates().duplicated_rows == 2
+    assert profile.invalid_counts == expected.invalid_counts == {"cost": 3, "duration": 2}
+
+
+def test_scale_is_checked_on_the_column_type(engine):
+    dataset = engine.register(pd.DataFrame({"cost": [1.0001, 1.5]}))
+
+    profile = CheckPlan(column_rules={"cost": {"scale": 3}}).profile(dataset)
+
+    assert profile.invalid_counts == {"cost": 1}
+
+
+def test_diff_of_a_source_snapshot_and_its_export(engine, export_path):
+    # Postgres types: dates, NUMERIC Decimals and integers
+    source = pd.DataFrame({
+        "visit_date": [date(2024, 2, 1), date(2024, 1, 15), date(2024, 2, 1), date(2024, 1, 1)],
+        "cost": [Decimal("30.25"), Decimal("20.00"), Decimal("30.25"), Decimal("10.50")],
+        "duration": [60, 45, 60, 30],
+    })
+
+    assert engine.diff(source, engine.load(export_path, recursive=True)).empty
+
+
+def test_diff_matches_hash_reconciler(engine, visits):
+    source = visits.iloc[[0, 1, 2, 2, 2]]
+    target = visits.assign(duration=[30, 45, 60, 61])
+
+    diff = engine.diff(source, target, df1_name="source", df2_name="target")
+    expected = HashReconciler.diff(source, target, df1_name="source", df2_name="target")
+
+    assert diff[SIDE_COLUMN].value_counts().to_dict() == expected[SIDE_COLUMN].value_counts().to_dict() == {
+        "source": 2, "target": 1}
+    assert sorted(diff["duration"].tolist()) == sorted(expected["duration"].tolist()) == [60, 60, 61]
+
+
+def test_diff_unregisters_the_frames(engine, visits):
+    engine.diff(visits, visits)
+
+    assert engine.get_data_sql("select * from duckdb_views() where not internal").empty
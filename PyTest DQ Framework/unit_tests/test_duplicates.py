@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_quality.duplicates import GROUP_SIZE_COLUMN, HashDuplicateDetector
+
+
+def chunked(df, size):
+    return [df.iloc[start:start + size] for start in range(0, len(df), size)]
+
+
+def test_detect_counts_groups_of_entire_rows():
+    df = pd.DataFrame({"a": [1, 1, 2, 3, 3, 3], "b": ["x", "x", "y", "z", "z", "z"]})
+
+    report = HashDuplicateDetector().detect(df)
+
+    assert (report.duplicate_groups, report.duplicated_rows, report.largest_group) == (2, 5, 3)
+    # Largest groups first
+    assert report.sample[GROUP_SIZE_COLUMN].tolist() == [3, 3, 3, 2, 2]
+
+
+def test_detect_by_key_columns():
+    df = pd.DataFrame({"key": [1, 1, 2], "value": [10, 20, 30]})
+
+    assert HashDuplicateDetector().detect(df).empty
+    assert HashDuplicateDetector().detect(df, ["key"]).duplicated_rows == 2
+
+
+def test_detect_ignores_hash_collisions():
+    df = pd.DataFrame({"key": [1, 2, 3]})
+
+    report = HashDuplicateDetector().detect(df, hashes=np.zeros(3, dtype=np.uint64))
+
+    assert report.empty
+
+
+def test_detect_sample_is_bounded():
+    df = pd.DataFrame({"key": [1] * 50})
+
+    report = HashDuplicateDetector(sample_size=5).detect(df)
+
+    assert report.duplicated_rows == 50
+    assert len(report.sample) == 5
+
+
+def test_detect_chunks_matches_detect():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"a": rng.integers(0, 100, 2000), "b": rng.choice(["x", "y"], 2000)})
+    detector = HashDuplicateDetector(buckets=8)
+
+    chunked_report = detector.detect_chunks(chunked(df, 300))
+    report = detector.detect(df)
+
+    assert (chunked_report.duplicate_groups, chunked_report.duplicated_rows, chunked_report.largest_group) == (
+        report.duplicate_groups, report.duplicated_rows, report.largest_group)
+
+
+def test_detect_chunks_finds_duplicates_across_chunks():
+    chunks = [pd.DataFrame({"key": [1, 2]}), pd.DataFrame({"key": [3, 1]})]
+
+    report = HashDuplicateDetector(buckets=4).detect_chunks(chunks)
+
+    assert (report.duplicate_groups, report.duplicated_rows) == (1, 2)
+
+
+def test_detect_chunks_of_no_rows():
+    report = HashDuplicateDetector().detect_chunks([pd.DataFrame({"key": []})], ["key"])
+
+    assert report.empty
+
+
+@pytest.mark.parametrize("first, later", [
+    (pd.DataFrame({"key": [None, None]}, dtype=object), pd.DataFrame({"key": ["x", "x"]})),
+    (pd.DataFrame({"key": [1, 2, 3]}), pd.DataFrame({"key": [1.0, 2.5, 2.5]})),
+])
+def test_detect_chunks_widens_the_key_type(first, later):
+    report = HashDuplicateDetector(buckets=4).detect_chunks([first, later])
+
+    expected = HashDuplicateDetector().detect(pd.concat([first.astype(object), later.astype(object)],
+                                                        ignore_index=True))
+    assert report.duplicated_rows == expected.duplicated_rows
+
+
+def test_detect_chunks_widens_the_key_type_of_every_bucket():
+    rng = np.random.default_rng(0)
+    chunks = [pd.DataFrame({"key": rng.integers(0, 500, 1000)}),
+              pd.DataFrame({"key": rng.integers(0, 500, 1000).astype(float)})]
+
+    report = HashDuplicateDetector(buckets=8).detect_chunks(chunks)
+
+    keys = pd.concat(chunks, ignore_index=True)
+    assert report.duplicated_rows == HashDuplicateDetector().detect(keys).duplicated_rows
@@ -0,0 +1,145 @@
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.connectors.file_system.parquet_reader import ParquetReader
+from src.data_quality.reconciliation import SIDE_COLUMN, HashReconciler, PartitionedReconciler
+
+
+class FakeSourceConnection:
+    """
+    Streams the rows of a DataFrame in chunks like PostgresConnectorContextManager.iter_data_sql.
+    The rows are expected in the order of the query.
+    """
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.queries = []
+
+    def iter_data_sql(self, sql, itersize=10000):
+        self.queries.append(sql)
+        for start in range(0, len(self.df), itersize):
+            yield self.df.iloc[start:start + itersize].reset_index(drop=True)
+
+
+def visits(dates, values):
+    return pd.DataFrame({"visit_date": pd.to_datetime(dates), "value": values})
+
+
+@pytest.fixture
+def target_path(tmp_path):
+    """
+    A target dataset partitioned by partition_date, like the parquet exports.
+    """
+    df = visits(["2024-01-01", "2024-01-15", "2024-02-01", "2024-03-01"], [1, 2, 3, 4])
+    df.assign(partition_date=df["visit_date"].dt.strftime("%Y-%m")).to_parquet(
+        tmp_path, partition_cols=["partition_date"], index=False)
+    return str(tmp_path)
+
+
+def test_diff_of_equal_frames_in_another_order_is_empty():
+    df1 = pd.DataFrame({"id": [1, 2, 3], "name": ["a", "b", "c"]})
+    df2 = df1.iloc[::-1].reset_index(drop=True)
+
+    diff = HashReconciler.diff(df1, df2)
+
+    assert diff.empty
+    assert list(diff.columns) == ["id", "name", SIDE_COLUMN]
+
+
+def test_diff_returns_the_unmatched_rows_of_both_sides():
+    df1 = pd.DataFrame({"id": [1, 2, 3], "name": ["a", "b", "c"]})
+    df2 = pd.DataFrame({"id": [1, 2, 4], "name": ["a", "x", "d"]})
+
+    diff = HashReconciler.diff(df1, df2, df1_name="source", df2_name="target")
+
+    assert diff.sort_values(["id", "name"]).values.tolist() == [
+        [2, "b", "source"], [2, "x", "target"], [3, "c", "source"], [4, "d", "target"]]
+
+
+def test_diff_counts_duplicated_rows():
+    df1 = pd.DataFrame({"id": [1, 1, 1, 2]})
+    df2 = pd.DataFrame({"id": [1, 2, 2]})
+
+    diff = HashReconciler.diff(df1, df2)
+
+    assert diff.sort_values("id").values.tolist() == [[1, "df1"], [1, "df1"], [2, "df2"]]
+
+
+def test_diff_compares_the_given_columns_only():
+    df1 = pd.DataFrame({"id": [1, 2], "loaded_at": ["today", "today"]})
+    df2 = pd.DataFrame({"id": [2, 1], "loaded_at": ["yesterday", "yesterday"]})
+
+    assert HashReconciler.diff(df1, df2, columns=["id"]).empty
+    assert len(HashReconciler.diff(df1, df2)) == 4
+
+
+def test_diff_normalizes_the_source_and_parquet_representations():
+    # Postgres rows (dates, Decimals, integers with nulls) against the parquet export of the same rows
+    df1 = pd.DataFrame({
+        "visit_date": [date(2024, 1, 1), date(2024, 1, 2)],
+        "cost": [Decimal("10.50"), Decimal("0")],
+        "duration": pd.array([30, None], dtype="Int64"),
+    })
+    df2 = pd.DataFrame({
+        "visit_date": pd.to_datetime(["2024-01-02", "2024-01-01"]),
+        "cost": [-0.0, 10.5],
+        "duration": [np.nan, 30.0],
+    })
+
+    assert HashReconciler.diff(df1, df2).empty
+
+
+def test_diff_of_categorical_and_plain_strings():
+    df1 = pd.DataFrame({"facility_type": pd.Categorical(["Clinic", "Hospital"])})
+    df2 = pd.DataFrame({"facility_type": ["Hospital", "Clinic"]})
+
+    assert HashReconciler.diff(df1, df2).empty
+
+
+def test_partition_keys():
+    chunk = visits(["2024-01-31", None, "2024-02-01"], [1, 2, 3])
+
+    keys = PartitionedReconciler.partition_keys(chunk, "partition_date")
+
+    assert keys.tolist() == ["2024-01", None, "2024-02"]
+
+
+def test_target_partitions(target_path):
+    assert PartitionedReconciler.target_partitions(target_path, "partition_date") == ["2024-01", "2024-02", "2024-03"]
+
+
+def test_iter_source_partitions_joins_partitions_split_across_chunks():
+    source = FakeSourceConnection(visits(["2024-01-01", "2024-01-02", "2024-01-03", "2024-02-01"], [1, 2, 3, 4]))
+    reconciler = PartitionedReconciler(source, ParquetReader(), itersize=2)
+
+    partitions = list(reconciler.iter_source_partitions("select * from visits;", "partition_date"))
+
+    assert [(key, len(rows)) for key, rows in partitions] == [("2024-01", 3), ("2024-02", 1)]
+    assert source.queries == ["select * from (select * from visits) as source order by visit_date"]
+
+
+def test_iter_source_partitions_rejects_unordered_rows():
+    source = FakeSourceConnection(visits(["2024-01-01", "2024-02-01", "2024-01-02"], [1, 2, 3]))
+    reconciler = PartitionedReconciler(source, ParquetReader(), itersize=1)
+
+    with pytest.raises(ValueError, match="not contiguous"):
+        list(reconciler.iter_source_partitions("select * from visits", "partition_date"))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_reconcile_reports_every_partition(target_path, workers):
+    # 2024-01 matches, 2024-02 differs, 2024-03 has no source rows and 2024-04 no target rows
+    source = FakeSourceConnection(visits(["2024-01-15", "2024-01-01", "2024-02-01", "2024-04-01"], [2, 1, 30, 5]))
+    reconciler = PartitionedReconciler(source, ParquetReader(), workers=workers, itersize=2)
+
+    report = reconciler.reconcile("select visit_date, value from visits", target_path, "partition_date")
+
+    assert report.values.tolist() == [
+        ["2024-01", 2, 2, 0, 0, True],
+        ["2024-02", 1, 1, 1, 1, False],
+        ["2024-03", 0, 1, 0, 1, False],
+        ["2024-04", 1, 0, 1, 0, False],
+    ]
@@ -0,0 +1,102 @@
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_quality.rule_engine import RuleEngine
+
+
+def invalid(df, column, rules):
+    return RuleEngine.invalid_mask(df, column, rules).tolist()
+
+
+def test_range_rules_let_nulls_pass():
+    df = pd.DataFrame({"value": [0, 5, 10, np.nan]})
+
+    assert invalid(df, "value", {"min": 1, "max": 9}) == [True, False, True, False]
+
+
+def test_expected_and_forbidden_values():
+    df = pd.DataFrame({"status": ["open", "closed", "lost", None]})
+
+    assert invalid(df, "status", {"expected_values": ["open", "closed"]}) == [False, False, True, True]
+    assert invalid(df, "status", {"forbidden_values": ["lost"]}) == [False, False, True, False]
+
+
+def test_regex_matches_the_whole_string():
+    df = pd.DataFrame({"code": ["AB12", "AB123", "ab12", None]})
+
+    assert invalid(df, "code", {"regex": r"[A-Z]{2}\d{2}"}) == [False, True, True, False]
+
+
+def test_regex_unsupported_by_arrow_falls_back_to_python():
+    df = pd.DataFrame({"code": ["aa", "ab", None]})
+
+    assert invalid(df, "code", {"regex": r"(\w)\1"}) == [False, True, False]
+
+
+def test_length_rules_of_non_string_values():
+    df = pd.DataFrame({"code": ["a", "abc", 12345, None]}, dtype=object)
+
+    assert invalid(df, "code", {"min_length": 2, "max_length": 4}) == [True, False, True, False]
+
+
+@pytest.mark.parametrize("values", [
+    [1.5, 1.25, 123.0, None],
+    [Decimal("1.5"), Decimal("1.25"), Decimal("123"), None],
+])
+def test_scale_and_precision(values):
+    df = pd.DataFrame({"cost": values})
+
+    assert invalid(df, "cost", {"scale": 1}) == [False, True, False, False]
+    assert invalid(df, "cost", {"precision": 3, "scale": 1}) == [False, True, True, False]
+
+
+def test_column_comparison():
+    df = pd.DataFrame({"start": [1, 5, 3, None], "end": [2, 4, 3, 1]})
+
+    assert invalid(df, "start", {"less_or_equal": "end"}) == [False, True, False, False]
+    assert invalid(df, "start", {"less_than": "end"}) == [False, True, True, False]
+
+
+def test_not_null():
+    df = pd.DataFrame({"value": [1, None]})
+
+    assert invalid(df, "value", {"not_null": True}) == [False, True]
+    assert invalid(df, "value", {"not_null": False}) == [False, False]
+
+
+def test_expression_and_condition():
+    df = pd.DataFrame({"cost": [10, 20], "duration": [5, 1]})
+
+    assert invalid(df, "cost", {"expression": "cost / duration < 5"}) == [False, True]
+    assert invalid(df, "cost", {"condition": lambda row: row["cost"] < row["duration"] * 5}) == [False, True]
+
+
+def test_rules_are_combined():
+    df = pd.DataFrame({"value": [0, 5, None]})
+
+    assert invalid(df, "value", {"min": 1, "not_null": True}) == [True, False, True]
+
+
+def test_rule_masks_are_reported_per_rule():
+    df = pd.DataFrame({"value": [0, 5, 10]})
+
+    masks = RuleEngine.rule_masks(df, "value", {"min": 1, "max": 9})
+
+    assert {name: mask.tolist() for name, mask in masks.items()} == {
+        "min": [True, False, False], "max": [False, False, True]}
+
+
+@pytest.mark.parametrize("column, rules, message", [
+    ("missing", {"min": 1}, "Column 'missing' not found"),
+    ("value", {"between": [1, 2]}, "Unknown rule"),
+    ("value", {"less_than": "missing"}, "Column 'missing' compared with 'value' not found"),
+    ("value", {"expression": "missing > 1"}, "Error evaluating expression"),
+])
+def test_invalid_rules_raise(column, rules, message):
+    df = pd.DataFrame({"value": [1]})
+
+    with pytest.raises(ValueError, match=message):
+        RuleEngine.invalid_mask(df, column, rules)
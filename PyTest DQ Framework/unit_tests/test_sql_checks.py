@@ -0,0 +1,117 @@
+import datetime
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+from src.data_quality.check_plan import CheckPlan
+from src.data_quality.sql_checks import SqlCheckCompiler, SqlCheckRunner, quote_identifier, quote_literal
+
+
+class DuckDBConnection:
+    """
+    An in-memory DuckDB database with get_data_sql, standing in for a PostgresConnectorContextManager.
+    """
+    def __init__(self, **tables):
+        duckdb = pytest.importorskip("duckdb")
+        self.connection = duckdb.connect()
+        for name, df in tables.items():
+            self.connection.register(name, df)
+
+    def get_data_sql(self, sql):
+        return self.connection.execute(sql).df()
+
+
+@pytest.fixture
+def visits():
+    return pd.DataFrame({
+        "id": [1, 2, 2, 3, 4],
+        "status": ["open", "closed", "closed", "lost", None],
+        "cost": [10.0, -1.0, -1.0, 5.0, None],
+        "paid": [10.0, 0.0, 0.0, 6.0, 1.0],
+    })
+
+
+@pytest.mark.parametrize("value, literal", [
+    (None, "NULL"),
+    (True, "TRUE"),
+    (3, "3"),
+    (2.5, "2.5"),
+    (Decimal("1.10"), "1.10"),
+    (datetime.date(2024, 1, 31), "'2024-01-31'"),
+    ("it's", "'it''s'"),
+])
+def test_quote_literal(value, literal):
+    assert quote_literal(value) == literal
+
+
+def test_quote_identifier():
+    assert quote_identifier('visit "date"') == '"visit ""date"""'
+
+
+@pytest.mark.parametrize("source, relation", [
+    ("visits", 'select * from "visits"'),
+    ("public.visits", 'select * from "public"."visits"'),
+    ("  SELECT id FROM visits;", "SELECT id FROM visits"),
+])
+def test_compiler_source(source, relation):
+    assert SqlCheckCompiler(CheckPlan(), source).source == relation
+
+
+@pytest.mark.parametrize("rule, value, predicate", [
+    ("min", 0, '"cost" < 0'),
+    ("expected_values", ["open", None], "(\"status\" IS NOT NULL AND NOT \"status\" = ANY(ARRAY['open']))"),
+    ("forbidden_values", [], "FALSE"),
+    ("regex", r"\d+", "\"status\"::text !~ '^(?:\\d+)$'"),
+    ("not_null", False, "FALSE"),
+    ("less_or_equal", "paid", 'NOT ("cost" <= "paid")'),
+])
+def test_violation(rule, value, predicate):
+    column = "status" if rule in ("expected_values", "regex") else "cost"
+
+    assert SqlCheckCompiler.violation(column, rule, value, {rule: value}) == predicate
+
+
+@pytest.mark.parametrize("rule", ["expression", "condition", "between"])
+def test_violation_of_rules_without_sql(rule):
+    with pytest.raises(ValueError, match="'cost'"):
+        SqlCheckCompiler.violation("cost", rule, None, {})
+
+
+def test_aggregate_query_rejects_rules_of_missing_columns():
+    compiler = SqlCheckCompiler(CheckPlan(column_rules={"missing": {"min": 0}}), "visits")
+
+    with pytest.raises(ValueError, match="Column 'missing' not found"):
+        compiler.aggregate_query(["id"])
+
+
+def test_runner_profile_matches_the_pandas_profile(visits):
+    plan = CheckPlan(not_null_columns=["status", "missing"], duplicate_keys=[None, ["id"]],
+                     column_rules={"cost": {"min": 0, "less_or_equal": "paid"},
+                                   "status": {"expected_values": ["open", "closed"]}})
+    runner = SqlCheckRunner(DuckDBConnection(visits=visits), sample_size=10)
+
+    profile = runner.profile(plan, "visits")
+    expected = plan.profile(visits)
+
+    assert (profile.row_count, profile.columns) == (expected.row_count, expected.columns)
+    assert profile.nulls() == expected.nulls()
+    assert profile.invalid_counts == expected.invalid_counts == {"cost": 2, "status": 2}
+    assert (profile.minimums, profile.maximums) == ({"cost": -1.0}, {"cost": 10.0})
+    for key in (None, ["id"]):
+        report, expected_report = profile.duplicates(key), expected.duplicates(key)
+        assert (report.duplicate_groups, report.duplicated_rows, report.largest_group) == (
+            expected_report.duplicate_groups, expected_report.duplicated_rows, expected_report.largest_group)
+        assert report.sample["id"].tolist() == [2, 2]
+    assert sorted(profile.rule_violations()["status"]["id"]) == [3, 4]
+
+
+def test_runner_fetches_no_samples_of_passing_checks(visits):
+    plan = CheckPlan(duplicate_keys=[["status", "cost", "id"]], column_rules={"id": {"max": 4}})
+    runner = SqlCheckRunner(DuckDBConnection(visits=visits.drop_duplicates()))
+
+    profile = runner.profile(plan, "select * from visits")
+
+    assert profile.duplicates(["status", "cost", "id"]).empty
+    assert profile.rule_violations()["id"].empty
+    assert profile.nulls() == {}
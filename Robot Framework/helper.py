@@ -1,4 +1,5 @@
 import pandas as pd
+import pyarrow.dataset as ds
 from selenium.webdriver.common.by import By
 
 
@@ -28,15 +29,17 @@ def read_table(table, filter_visit_date=None):
 
 
 def read_parquet(path, filter_visit_date=None):
-    df = pd.read_parquet(path)
-    column = ['partition_date']
-    df = df.drop(columns=column)
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    columns = [name for name in dataset.schema.names if name != "partition_date"]
 
-    # Apply filtering on dataframe if any
+    # Push the filter down: only the month partition of the date is opened, and only its matching row groups read
+    filter_expression = None
     if filter_visit_date is not None:
-        df = df[df["visit_date"] == filter_visit_date]
+        visit_date = pd.Timestamp(filter_visit_date)
+        filter_expression = ((ds.field("partition_date") == visit_date.strftime("%Y-%m"))
+                             & (ds.field("visit_date") == visit_date))
 
-    return df
+    return dataset.to_table(columns=columns, filter=filter_expression).to_pandas()
 
 
 def normalize_dataframe(df):
@@ -0,0 +1,148 @@
+"""
+Benchmark of the visits merges with and without the indexes provisioned by NF3Loader.
+
+For every volume a scratch schema is filled with facilities, patients and src visits, and all visits
+except the newest fraction are preloaded into the 3NF visits table. Both the full MERGE_VISITS_QUERY and
+the incremental MERGE_VISITS_INCREMENTAL_QUERY (merging only the newest slice) are timed twice: on bare
+tables and after NF3Loader.provision_schema. Every run is rolled back, so all runs start from the same state.
+
+Usage (from the repository root, with PYTHONPATH set to it):
+    python data_dev/benchmarks/benchmark_merge_indexes.py --rows 10000 100000 1000000 --new-fraction 0.01
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from data_dev.src.connectors.postgre_connector import PostgresConnectorContextManager
+from data_dev.src.data.nf3_loader import NF3Loader
+from data_dev.queries import (CREATE_SRC_GENERATED_FACILITIES_TABLE_QUERY,
+                              CREATE_SRC_GENERATED_PATIENTS_TABLE_QUERY,
+                              CREATE_SRC_GENERATED_VISITS_TABLE_QUERY,
+                              CREATE_FACILITIES_TABLE_QUERY,
+                              CREATE_PATIENTS_TABLE_QUERY,
+                              CREATE_VISITS_TABLE_QUERY,
+                              ANALYZE_NF3_TABLES_QUERY,
+                              MERGE_VISITS_QUERY,
+                              MERGE_VISITS_INCREMENTAL_QUERY)
+
+BENCHMARK_SCHEMA = 'merge_benchmark'
+FIRST_VISIT_TIMESTAMP = datetime(2000, 1, 1)
+
+POPULATE_QUERIES = [
+    """
+    INSERT INTO facilities (external_id, facility_name, facility_type, address, city, state)
+    SELECT i, 'Facility ' || i, 'Hospital', 'Address', 'City', 'State'
+    FROM generate_series(1, 4) AS i;
+    """,
+    """
+    INSERT INTO patients (external_id, first_name, last_name, date_of_birth, address)
+    SELECT i, 'First name', 'Last name', DATE '1970-01-01', 'Address'
+    FROM generate_series(1, %(patients)s) AS i;
+    """,
+    """
+    INSERT INTO src_generated_visits (patient_id, facility_id, visit_timestamp, treatment_cost, duration_minutes)
+    SELECT 1 + i %% %(patients)s, 1 + i %% 4, %(first_visit_timestamp)s + i * INTERVAL '1 minute', 100, 30
+    FROM generate_series(1, %(rows)s) AS i;
+    """,
+    """
+    INSERT INTO visits (facility_id, patient_id, visit_timestamp, treatment_cost, duration_minutes)
+    SELECT f.id, p.id, sgv.visit_timestamp, sgv.treatment_cost, sgv.duration_minutes
+    FROM src_generated_visits sgv
+    JOIN facilities f ON f.external_id = sgv.facility_id
+    JOIN patients p ON p.external_id = sgv.patient_id
+    WHERE sgv.visit_timestamp <= %(preloaded_until)s;
+    """
+]
+
+
+def prepare_schema(connection, rows, patients, preloaded_until):
+    """
+    Recreate the benchmark schema and fill it with the given volume of visits.
+
+    Args:
+        connection: A psycopg2 database connection object.
+        rows (int): The number of src visits.
+        patients (int): The number of patients.
+        preloaded_until (datetime): The src visits up to this timestamp are preloaded into visits.
+    """
+    cursor = connection.cursor()
+    cursor.execute(f"DROP SCHEMA IF EXISTS {BENCHMARK_SCHEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {BENCHMARK_SCHEMA}")
+    cursor.execute(f"SET search_path TO {BENCHMARK_SCHEMA}")
+    cursor.execute(CREATE_SRC_GENERATED_FACILITIES_TABLE_QUERY)
+    cursor.execute(CREATE_SRC_GENERATED_PATIENTS_TABLE_QUERY)
+    cursor.execute(CREATE_SRC_GENERATED_VISITS_TABLE_QUERY)
+    cursor.execute(CREATE_FACILITIES_TABLE_QUERY)
+    cursor.execute(CREATE_PATIENTS_TABLE_QUERY)
+    cursor.execute(CREATE_VISITS_TABLE_QUERY)
+    for query in POPULATE_QUERIES:
+        cursor.execute(query, {'rows': rows, 'patients': patients, 'first_visit_timestamp': FIRST_VISIT_TIMESTAMP,
+                               'preloaded_until': preloaded_until})
+    connection.commit()
+    cursor.close()
+
+
+def time_merge(connection, query, params, with_indexes):
+    """
+    Time a merge query inside a transaction that is rolled back afterwards.
+
+    Args:
+        connection: A psycopg2 database connection object.
+        query (str): The merge query.
+        params (dict): The parameters of the merge query.
+        with_indexes (bool): Provision the NF3Loader indexes and constraints before the merge.
+
+    Returns:
+        Tuple[float, int]: The duration of the merge in seconds and the number of merged rows.
+    """
+    cursor = connection.cursor()
+    try:
+        if with_indexes:
+            NF3Loader.provision_schema(cursor)
+        cursor.execute(ANALYZE_NF3_TABLES_QUERY)
+        start = time.perf_counter()
+        cursor.execute(query, params)
+        return time.perf_counter() - start, cursor.rowcount
+    finally:
+        connection.rollback()
+        cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the visits merges with and without indexes.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help="Volumes of src visits to benchmark")
+    parser.add_argument('--patients', type=int, default=1000, help="Number of patients")
+    parser.add_argument('--new-fraction', type=float, default=0.01,
+                        help="Fraction of the newest src visits that are not preloaded into visits")
+    args = parser.parse_args()
+
+    print(f"{'src rows':>10} | {'merge':>11} | {'merged rows':>11} | {'no indexes, s':>13} | {'indexes, s':>10} | "
+          f"{'speed-up':>8}")
+    with PostgresConnectorContextManager() as connection_object:
+        connection = connection_object.get_connection()
+        try:
+            for rows in args.rows:
+                preloaded_until = FIRST_VISIT_TIMESTAMP + timedelta(minutes=int(rows * (1 - args.new_fraction)))
+                prepare_schema(connection, rows, args.patients, preloaded_until)
+                merges = {
+                    'full': (MERGE_VISITS_QUERY, {'date_scope': '2999-12-31'}),
+                    'incremental': (MERGE_VISITS_INCREMENTAL_QUERY, {
+                        'last_loaded_timestamp': preloaded_until,
+                        'lookback_days': 0,
+                        'high_watermark': FIRST_VISIT_TIMESTAMP + timedelta(minutes=rows)
+                    })
+                }
+                for merge, (query, params) in merges.items():
+                    without_indexes, merged_rows = time_merge(connection, query, params, with_indexes=False)
+                    with_indexes, _ = time_merge(connection, query, params, with_indexes=True)
+                    print(f"{rows:>10} | {merge:>11} | {merged_rows:>11} | {without_indexes:>13.3f} | "
+                          f"{with_indexes:>10.3f} | {without_indexes / with_indexes:>7.1f}x")
+        finally:
+            connection.cursor().execute(f"DROP SCHEMA IF EXISTS {BENCHMARK_SCHEMA} CASCADE")
+            connection.commit()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from datetime import datetime
 
 
@@ -14,12 +14,18 @@ class PostgresConfig:
         db (str): The name of the database to connect to.
         port (int): The port number on which the PostgreSQL server is running.
         host (str): The hostname or IP address of the PostgreSQL server.
+        min_pool_size (int): The number of connections opened upfront by PostgresConnectionPool.
+        max_pool_size (int): The maximum number of connections PostgresConnectionPool keeps open at once.
+        pool_timeout (float): Seconds a checkout waits for a connection when all of them are in use.
     """
     user: str
     password: str
     db: str
     port: int
     host: str
+    min_pool_size: int = 1
+    max_pool_size: int = 4
+    pool_timeout: float = 300
 
 
 @dataclass
@@ -34,6 +40,15 @@ class DataGeneratorConfig:
         date_format (str): The format of the date strings (e.g., '%Y-%m-%d').
         facility_types (List[str]): A list of facility types (e.g., "Hospital", "Clinic").
         visits_per_day (Tuple[int, int]): A tuple specifying the range (min, max) of visits per day.
+        seed (Optional[int]): A seed for the random generators, so repeated runs produce the same data.
+                              None means a different dataset on every run.
+        vectorized (bool): Generate visits in bulk with NumPy as a columnar Arrow table instead of
+                           a list of dictionaries. Intended for large synthetic volumes.
+        window_days (int): The number of days of visits generated and loaded per batch, which bounds
+                           the memory used while seeding long date ranges.
+        workers (int): The number of worker processes generating patient and visit shards in parallel.
+                       The generated data does not depend on this value.
+        patients_per_shard (int): The number of patients generated per shard.
     """
     num_patients: int
     start_date: str
@@ -41,6 +56,11 @@ class DataGeneratorConfig:
     date_format: str
     facility_types: List[str]
     visits_per_day: Tuple[int, int]
+    seed: Optional[int] = None
+    vectorized: bool = False
+    window_days: int = 365
+    workers: int = 1
+    patients_per_shard: int = 10000
 
 
 @dataclass
@@ -61,17 +81,79 @@ class ParquetStorageConfig:
     storage_path_facility_name_min_time_spent_per_visit_date: str
 
 
+@dataclass
+class ParquetExportConfig:
+    """
+    Configuration class for the export of the 3NF transformations into Parquet files.
+
+    Attributes:
+        chunk_size (int): The number of rows fetched from the database through a server-side cursor
+                          and written to the Parquet dataset at a time. Bounds the memory used by the export.
+        parallel (bool): Run the transformations concurrently on a thread pool, each on its own connection.
+        workers (int): The number of transformations running at once in parallel mode.
+        incremental (bool): Rewrite only the partitions whose row checksums changed since the last export,
+                            tracked in the _export_manifest.json file of every dataset.
+        compression (str): The Parquet compression codec ('snappy', 'zstd', 'gzip', 'brotli', 'lz4' or 'none').
+        compression_level (Optional[int]): The level of the compression codec; None uses the codec default.
+        row_group_size (int): The maximum number of rows per Parquet row group.
+        max_rows_per_file (int): The maximum number of rows per Parquet file; 0 means no limit.
+        use_dictionary (bool): Dictionary-encode the columns of the Parquet files.
+    """
+    chunk_size: int
+    parallel: bool = False
+    workers: int = 3
+    incremental: bool = False
+    compression: str = 'snappy'
+    compression_level: Optional[int] = None
+    row_group_size: int = 1024 * 1024
+    max_rows_per_file: int = 0
+    use_dictionary: bool = True
+
+
+@dataclass
+class InjectionConfig:
+    """
+    InjectionConfig is a configuration class used to define how generated data is written into the src layer.
+
+    Attributes:
+        mode (str): The ingest mode used for the src_generated_* tables:
+                    'copy' - stream rows with PostgreSQL COPY FROM STDIN (falls back to 'execute_values' on error),
+                    'execute_values' - batched multi-row INSERT statements,
+                    'insert' - one INSERT statement per row.
+        batch_size (int): The number of rows sent to the database in a single COPY / execute_values batch.
+    """
+    mode: str
+    batch_size: int
+
+
 @dataclass
 class LoadConfig:
     """
     LoadConfig is a configuration class used to store config related to data loading processes.
 
     Attributes:
-        last_date (str): The last date for which data should be successfully loaded.
-                         This is typically used to track the progress of incremental data loads.
-                         The date should be in the format 'YYYY-MM-DD'.
+        date_scope (str): The last date for which data should be successfully loaded.
+                          This is typically used to track the progress of incremental data loads.
+                          The date should be in the format 'YYYY-MM-DD'.
+        incremental (bool): Merge only the source rows above the watermarks persisted in the
+                            nf3_load_state table, instead of the full src_generated_* tables.
+                            Facilities and patients are sliced by their src id (id > watermark).
+                            Visits are sliced by visit_timestamp inclusively (visit_timestamp >= watermark
+                            - visits_lookback_days); the rows merged before are skipped by the merge key
+                            (facility_id, patient_id, visit_timestamp), so visits arriving later with the
+                            watermark timestamp are still loaded. The visits watermark is not advanced past
+                            the first visit whose facility or patient is not loaded yet, so such visits are
+                            retried on the next load instead of being dropped by the join.
+        visits_lookback_days (int): How many days below the visits watermark are re-read on every incremental
+                                    load, to pick up visits arriving late with an older visit_timestamp.
+        partition_visits (bool): Create src_generated_visits and visits as tables partitioned by month
+                                 on visit_timestamp, and create the partitions of new months on every load.
+                                 Only applies when the tables are created; existing tables are not converted.
     """
     date_scope: str
+    incremental: bool = False
+    visits_lookback_days: int = 0
+    partition_visits: bool = False
 
 
 @dataclass
@@ -90,7 +172,10 @@ class ReportGeneratorConfig:
 
 # Instance of LoadConfig
 load_config = LoadConfig(
-    date_scope=datetime.now().date().strftime('%Y-%m-%d')  # Example: '2025-01-01'
+    date_scope=datetime.now().date().strftime('%Y-%m-%d'),  # Example: '2025-01-01'
+    incremental=False,
+    visits_lookback_days=0,
+    partition_visits=False
 )
 
 # Instance of PostgresConfig
@@ -99,7 +184,10 @@ postgres_config = PostgresConfig(
     password='mypassword',
     db='mydatabase',
     port=5432,  # localhost:5434,  podman_network:5432
-    host='postgres'  # localhost:localhost, podman_network:postgres
+    host='postgres',  # localhost:localhost, podman_network:postgres
+    min_pool_size=1,
+    max_pool_size=4,
+    pool_timeout=300
 )
 
 # Instance of GeneratorConfig
@@ -109,7 +197,18 @@ data_generator_config = DataGeneratorConfig(
     end_date='2030-01-01',
     date_format='%Y-%m-%d',
     facility_types=['Hospital', 'Clinic', 'Urgent Care', 'Specialty Center'],
-    visits_per_day=(7, 10)
+    visits_per_day=(7, 10),
+    seed=None,
+    vectorized=False,
+    window_days=365,
+    workers=1,
+    patients_per_shard=10000
+)
+
+# Instance of InjectionConfig
+injection_config = InjectionConfig(
+    mode='copy',  # copy, execute_values, insert
+    batch_size=10000
 )
 
 # Instance of ParquetStorageConfig
@@ -122,6 +221,19 @@ parquet_storage_config = ParquetStorageConfig(
                                                              'facility_name_min_time_spent_per_visit_date'
 )
 
+# Instance of ParquetExportConfig
+parquet_export_config = ParquetExportConfig(
+    chunk_size=100000,
+    parallel=False,
+    workers=3,
+    incremental=False,
+    compression='snappy',  # snappy, zstd, gzip, brotli, lz4, none
+    compression_level=None,
+    row_group_size=1024 * 1024,
+    max_rows_per_file=0,
+    use_dictionary=True
+)
+
 # Instance of ReportGeneratorConfig
 report_generator_config = ReportGeneratorConfig(
     storage_path='/generated_report',
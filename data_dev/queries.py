@@ -32,6 +32,16 @@ CREATE TABLE IF NOT EXISTS src_generated_visits (
 );
 """
 
+CREATE_SRC_GENERATED_VISITS_PARTITIONED_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS src_generated_visits (
+    patient_id INT NOT NULL, 
+    facility_id INT NOT NULL, 
+    visit_timestamp TIMESTAMP NOT NULL, 
+    treatment_cost NUMERIC(10, 2) NOT NULL, 
+    duration_minutes INT NOT NULL
+) PARTITION BY RANGE (visit_timestamp);
+"""
+
 INSERT_SRC_GENERATED_FACILITIES_QUERY = """
 INSERT INTO src_generated_facilities (facility_id, facility_name, facility_type, address, city, state)
 VALUES (%(facility_id)s, %(facility_name)s, %(facility_type)s, %(address)s, %(city)s, %(state)s)
@@ -47,6 +57,36 @@ INSERT INTO src_generated_visits (patient_id, facility_id, visit_timestamp, trea
 VALUES (%(patient_id)s, %(facility_id)s, %(visit_timestamp)s, %(treatment_cost)s, %(duration_minutes)s)
 """
 
+INSERT_SRC_GENERATED_FACILITIES_VALUES_QUERY = """
+INSERT INTO src_generated_facilities (facility_id, facility_name, facility_type, address, city, state)
+VALUES %s
+"""
+
+INSERT_SRC_GENERATED_PATIENTS_VALUES_QUERY = """
+INSERT INTO src_generated_patients (patient_id, first_name, last_name, date_of_birth, address)
+VALUES %s
+"""
+
+INSERT_SRC_GENERATED_VISITS_VALUES_QUERY = """
+INSERT INTO src_generated_visits (patient_id, facility_id, visit_timestamp, treatment_cost, duration_minutes)
+VALUES %s
+"""
+
+COPY_SRC_GENERATED_FACILITIES_QUERY = """
+COPY src_generated_facilities (facility_id, facility_name, facility_type, address, city, state)
+FROM STDIN WITH (FORMAT csv)
+"""
+
+COPY_SRC_GENERATED_PATIENTS_QUERY = """
+COPY src_generated_patients (patient_id, first_name, last_name, date_of_birth, address)
+FROM STDIN WITH (FORMAT csv)
+"""
+
+COPY_SRC_GENERATED_VISITS_QUERY = """
+COPY src_generated_visits (patient_id, facility_id, visit_timestamp, treatment_cost, duration_minutes)
+FROM STDIN WITH (FORMAT csv)
+"""
+
 # 3NF LAYER
 
 
@@ -86,6 +126,20 @@ CREATE TABLE IF NOT EXISTS visits (
 );
 """
 
+CREATE_VISITS_PARTITIONED_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS visits (
+    id SERIAL, -- Auto-incrementing id
+    patient_id INT NOT NULL, -- Foreign key referencing the patients table
+    facility_id INT NOT NULL, -- Foreign key referencing the facilities table
+    visit_timestamp TIMESTAMP NOT NULL, -- Timestamp of the visit, the partition key
+    treatment_cost NUMERIC(10, 2) NOT NULL, -- Cost of the treatment
+    duration_minutes INT NOT NULL, -- Duration of the visit in minutes
+    PRIMARY KEY (id, visit_timestamp), -- The primary key of a partitioned table must contain the partition key
+    FOREIGN KEY (patient_id) REFERENCES patients(id) ON DELETE CASCADE,
+    FOREIGN KEY (facility_id) REFERENCES facilities(id) ON DELETE CASCADE
+) PARTITION BY RANGE (visit_timestamp);
+"""
+
 MERGE_FACILITIES_QUERY = """
 MERGE INTO facilities AS target
 USING public.src_generated_facilities AS source
@@ -121,7 +175,241 @@ WITH src_visits AS (
         ON sgv.facility_id = f.external_id 
     JOIN patients p
         ON sgv.patient_id = p.external_id 
-    WHERE visit_timestamp::date <= %(date_scope)s
+    WHERE sgv.visit_timestamp < %(date_scope)s::DATE + 1
+)
+MERGE INTO visits AS target
+USING src_visits AS source
+ON target.facility_id = source.facility_id
+   AND target.patient_id = source.patient_id
+   AND target.visit_timestamp = source.visit_timestamp
+WHEN MATCHED THEN
+    DO NOTHING
+WHEN NOT MATCHED THEN
+    INSERT (facility_id, patient_id, visit_timestamp, treatment_cost, duration_minutes)
+    VALUES (source.facility_id, source.patient_id, source.visit_timestamp, source.treatment_cost, source.duration_minutes);
+"""
+
+# INDEXES AND CONSTRAINTS
+
+
+CREATE_SRC_GENERATED_FACILITIES_ID_INDEX_QUERY = """
+CREATE INDEX IF NOT EXISTS src_generated_facilities_facility_id_idx
+ON src_generated_facilities (facility_id);
+"""
+
+CREATE_SRC_GENERATED_PATIENTS_ID_INDEX_QUERY = """
+CREATE INDEX IF NOT EXISTS src_generated_patients_patient_id_idx
+ON src_generated_patients (patient_id);
+"""
+
+CREATE_SRC_GENERATED_VISITS_TIMESTAMP_INDEX_QUERY = """
+CREATE INDEX IF NOT EXISTS src_generated_visits_visit_timestamp_idx
+ON src_generated_visits (visit_timestamp);
+"""
+
+ADD_FACILITIES_EXTERNAL_ID_UNIQUE_CONSTRAINT_QUERY = """
+DO $$
+DECLARE
+    duplicates BIGINT;
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'facilities_external_id_key' AND conrelid = 'facilities'::regclass
+    ) THEN
+        SELECT count(*) INTO duplicates
+        FROM (SELECT external_id FROM facilities WHERE external_id IS NOT NULL
+              GROUP BY external_id HAVING count(*) > 1) AS duplicated;
+        IF duplicates > 0 THEN
+            -- Existing data breaks the constraint: report it instead of failing the load
+            RAISE WARNING 'facilities.external_id has % duplicated value(s), facilities_external_id_key not created', duplicates;
+        ELSE
+            ALTER TABLE facilities ADD CONSTRAINT facilities_external_id_key UNIQUE (external_id);
+        END IF;
+    END IF;
+END $$;
+"""
+
+ADD_PATIENTS_EXTERNAL_ID_UNIQUE_CONSTRAINT_QUERY = """
+DO $$
+DECLARE
+    duplicates BIGINT;
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'patients_external_id_key' AND conrelid = 'patients'::regclass
+    ) THEN
+        SELECT count(*) INTO duplicates
+        FROM (SELECT external_id FROM patients WHERE external_id IS NOT NULL
+              GROUP BY external_id HAVING count(*) > 1) AS duplicated;
+        IF duplicates > 0 THEN
+            -- Existing data breaks the constraint: report it instead of failing the load
+            RAISE WARNING 'patients.external_id has % duplicated value(s), patients_external_id_key not created', duplicates;
+        ELSE
+            ALTER TABLE patients ADD CONSTRAINT patients_external_id_key UNIQUE (external_id);
+        END IF;
+    END IF;
+END $$;
+"""
+
+CREATE_VISITS_MERGE_KEY_INDEX_QUERY = """
+CREATE INDEX IF NOT EXISTS visits_facility_id_patient_id_visit_timestamp_idx
+ON visits (facility_id, patient_id, visit_timestamp);
+"""
+
+ANALYZE_SRC_TABLES_QUERY = """
+ANALYZE src_generated_facilities, src_generated_patients, src_generated_visits;
+"""
+
+ANALYZE_NF3_TABLES_QUERY = """
+ANALYZE facilities, patients, visits;
+"""
+
+# PARTITIONING
+
+
+IS_TABLE_PARTITIONED_QUERY = """
+SELECT EXISTS (
+    SELECT 1
+    FROM pg_partitioned_table
+    WHERE partrelid = to_regclass(%(table_name)s)
+);
+"""
+
+SELECT_TABLE_PARTITIONS_QUERY = """
+SELECT c.relname
+FROM pg_inherits i
+JOIN pg_class c
+    ON c.oid = i.inhrelid
+WHERE i.inhparent = to_regclass(%(table_name)s);
+"""
+
+# {partition} and {table} are identifiers filled in with psycopg2.sql
+CREATE_MONTHLY_PARTITION_QUERY = """
+CREATE TABLE IF NOT EXISTS {partition}
+PARTITION OF {table}
+FOR VALUES FROM (%(month_start)s) TO (%(month_end)s);
+"""
+
+SELECT_SRC_VISITS_TIMESTAMP_RANGE_QUERY = """
+SELECT MIN(visit_timestamp), MAX(visit_timestamp)
+FROM src_generated_visits
+WHERE visit_timestamp < %(date_scope)s::DATE + 1;
+"""
+
+# INCREMENTAL 3NF LOAD
+
+
+CREATE_NF3_LOAD_STATE_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS nf3_load_state (
+    entity VARCHAR(50) PRIMARY KEY, -- Loaded entity (facilities, patients, visits)
+    last_loaded_id INT, -- Highest source id merged so far (facilities, patients)
+    last_loaded_timestamp TIMESTAMP, -- Latest source visit_timestamp merged so far (visits)
+    rows_merged INT NOT NULL, -- Number of rows inserted by the last run
+    duration_seconds NUMERIC(10, 3) NOT NULL, -- Duration of the last run
+    loaded_at TIMESTAMP NOT NULL DEFAULT now() -- When the last run finished
+);
+"""
+
+SELECT_NF3_LOAD_STATE_QUERY = """
+SELECT last_loaded_id, last_loaded_timestamp
+FROM nf3_load_state
+WHERE entity = %(entity)s;
+"""
+
+UPSERT_NF3_LOAD_STATE_QUERY = """
+INSERT INTO nf3_load_state (entity, last_loaded_id, last_loaded_timestamp, rows_merged, duration_seconds, loaded_at)
+VALUES (%(entity)s, %(last_loaded_id)s, %(last_loaded_timestamp)s, %(rows_merged)s, %(duration_seconds)s, now())
+ON CONFLICT (entity) DO UPDATE SET
+    last_loaded_id = EXCLUDED.last_loaded_id,
+    last_loaded_timestamp = EXCLUDED.last_loaded_timestamp,
+    rows_merged = EXCLUDED.rows_merged,
+    duration_seconds = EXCLUDED.duration_seconds,
+    loaded_at = EXCLUDED.loaded_at;
+"""
+
+SELECT_SRC_FACILITIES_HIGH_WATERMARK_QUERY = """
+SELECT MAX(facility_id) AS high_watermark, MAX(facility_id) AS next_watermark
+FROM src_generated_facilities
+WHERE facility_id > COALESCE(%(last_loaded_id)s, 0);
+"""
+
+SELECT_SRC_PATIENTS_HIGH_WATERMARK_QUERY = """
+SELECT MAX(patient_id) AS high_watermark, MAX(patient_id) AS next_watermark
+FROM src_generated_patients
+WHERE patient_id > COALESCE(%(last_loaded_id)s, 0);
+"""
+
+SELECT_SRC_VISITS_HIGH_WATERMARK_QUERY = """
+WITH src_slice AS (
+    SELECT
+        sgv.visit_timestamp,
+        f.id IS NULL OR p.id IS NULL AS is_orphan
+    FROM src_generated_visits sgv
+    LEFT JOIN facilities f
+        ON sgv.facility_id = f.external_id
+    LEFT JOIN patients p
+        ON sgv.patient_id = p.external_id
+    WHERE sgv.visit_timestamp >= COALESCE(
+              %(last_loaded_timestamp)s::TIMESTAMP - make_interval(days => %(lookback_days)s),
+              '-infinity'::TIMESTAMP)
+      AND sgv.visit_timestamp < %(date_scope)s::DATE + 1
+)
+SELECT
+    MAX(visit_timestamp) AS high_watermark,
+    LEAST(MAX(visit_timestamp), MIN(visit_timestamp) FILTER (WHERE is_orphan)) AS next_watermark,
+    COUNT(*) FILTER (WHERE is_orphan) AS orphans
+FROM src_slice;
+"""
+
+MERGE_FACILITIES_INCREMENTAL_QUERY = """
+MERGE INTO facilities AS target
+USING (
+    SELECT *
+    FROM public.src_generated_facilities
+    WHERE facility_id > COALESCE(%(last_loaded_id)s, 0)
+      AND facility_id <= %(high_watermark)s
+) AS source
+ON target.external_id = source.facility_id
+WHEN MATCHED THEN
+    DO NOTHING
+WHEN NOT MATCHED THEN
+    INSERT (external_id, facility_name, facility_type, address, city, state)
+    VALUES (source.facility_id, source.facility_name, source.facility_type, source.address, source.city, source.state);
+"""
+
+MERGE_PATIENTS_INCREMENTAL_QUERY = """
+MERGE INTO patients AS target
+USING (
+    SELECT *
+    FROM public.src_generated_patients
+    WHERE patient_id > COALESCE(%(last_loaded_id)s, 0)
+      AND patient_id <= %(high_watermark)s
+) AS source
+ON target.external_id = source.patient_id
+WHEN MATCHED THEN
+    DO NOTHING
+WHEN NOT MATCHED THEN
+    INSERT (external_id, first_name, last_name, date_of_birth, address)
+    VALUES (source.patient_id, source.first_name, source.last_name, source.date_of_birth, source.address);
+"""
+
+MERGE_VISITS_INCREMENTAL_QUERY = """
+WITH src_visits AS (
+    SELECT
+        f.id AS facility_id,
+        p.id AS patient_id,
+        sgv.visit_timestamp,
+        sgv.treatment_cost,
+        sgv.duration_minutes
+    FROM src_generated_visits sgv
+    JOIN facilities f
+        ON sgv.facility_id = f.external_id
+    JOIN patients p
+        ON sgv.patient_id = p.external_id
+    WHERE sgv.visit_timestamp >= COALESCE(
+              %(last_loaded_timestamp)s::TIMESTAMP - make_interval(days => %(lookback_days)s),
+              '-infinity'::TIMESTAMP)
+      AND sgv.visit_timestamp <= %(high_watermark)s
 )
 MERGE INTO visits AS target
 USING src_visits AS source
@@ -208,3 +496,21 @@ GROUP BY
     f.facility_name,
     visit_date;
 """
+
+# INCREMENTAL PARQUET EXPORT
+
+# {query} is a transformation query, {partition_expression} the SQL expression of its partition column
+SELECT_PARTITION_CHECKSUMS_QUERY = """
+SELECT
+    {partition_expression} AS partition_value,
+    COUNT(*) AS row_count,
+    MD5(STRING_AGG(MD5(q::TEXT), '' ORDER BY MD5(q::TEXT))) AS checksum
+FROM ({query}) AS q
+GROUP BY 1;
+"""
+
+SELECT_PARTITIONS_QUERY = """
+SELECT *
+FROM ({query}) AS q
+WHERE {partition_expression} = ANY(%(partition_values)s);
+"""
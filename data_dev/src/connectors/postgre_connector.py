@@ -1,12 +1,210 @@
-from typing import Optional
+import io
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Union
+from uuid import uuid4
 import psycopg2
-from psycopg2.extensions import connection
+from psycopg2.extensions import connection, TRANSACTION_STATUS_IDLE
+from psycopg2.pool import PoolError, ThreadedConnectionPool
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 from pandas import DataFrame
 
 from data_dev.config import postgres_config
 
+# Arrow types of the PostgreSQL type OIDs returned in cursor.description.
+# Integers are read as int64 and NUMERIC as float64, like pd.read_sql does, so the exported parquet schemas
+# match the ones written through pandas; unlisted types are inferred by Arrow.
+POSTGRES_OID_TO_ARROW_TYPE = {
+    16: pa.bool_(),                       # boolean
+    20: pa.int64(),                       # bigint
+    21: pa.int64(),                       # smallint
+    23: pa.int64(),                       # integer
+    25: pa.string(),                      # text
+    700: pa.float32(),                    # real
+    701: pa.float64(),                    # double precision
+    1042: pa.string(),                    # char
+    1043: pa.string(),                    # varchar
+    1082: pa.date32(),                    # date
+    1114: pa.timestamp('us'),             # timestamp
+    1184: pa.timestamp('us', tz='UTC'),   # timestamptz
+    1700: pa.float64(),                   # numeric
+}
+NUMERIC_OID = 1700
+
+
+def rows_to_record_batch(rows, description) -> pa.RecordBatch:
+    """
+    Build an Arrow record batch from rows fetched by a psycopg2 cursor.
+
+    Args:
+        rows (list): The fetched rows.
+        description (tuple): The cursor description of the rows.
+
+    Returns:
+        pa.RecordBatch: The rows as a record batch typed by the column type OIDs. Columns of other types
+        are inferred by Arrow, as strings when they hold no values, so no column is of the null type.
+    """
+    arrays = []
+    for column, values in zip(description, zip(*rows) if rows else [()] * len(description)):
+        arrow_type = POSTGRES_OID_TO_ARROW_TYPE.get(column.type_code)
+        if arrow_type is None:
+            array = pa.array(values)
+            arrays.append(array.cast(pa.string()) if pa.types.is_null(array.type) else array)
+        elif pa.types.is_floating(arrow_type):
+            # Decimals are not converted to floats implicitly
+            arrays.append(pa.array([None if value is None else float(value) for value in values], type=arrow_type))
+        else:
+            arrays.append(pa.array(values, type=arrow_type))
+    return pa.RecordBatch.from_arrays(arrays, names=[column.name for column in description])
+
+
+class PostgresConnectionPool:
+    """
+    Thread-safe pool of PostgreSQL connections.
+
+    Connections are opened once and reused, so parallel stages and transforms each get their own
+    connection without paying the connect latency on every use. Every checkout is health checked,
+    and broken connections are replaced transparently. When all connections are checked out, checkout
+    waits for one to be returned (psycopg2 would raise PoolError right away), so the pool bounds the
+    number of threads working on the database.
+
+    Attributes:
+        pool (ThreadedConnectionPool): The underlying psycopg2 pool.
+        available (threading.BoundedSemaphore): The number of connections that can still be checked out.
+    """
+
+    def __init__(self, min_size: Optional[int] = None, max_size: Optional[int] = None):
+        """
+        Open the pool.
+
+        Args:
+            min_size (Optional[int]): The number of connections opened upfront.
+                                      Defaults to postgres_config.min_pool_size.
+            max_size (Optional[int]): The maximum number of open connections.
+                                      Defaults to postgres_config.max_pool_size.
+        """
+        max_size = postgres_config.max_pool_size if max_size is None else max_size
+        self.pool = ThreadedConnectionPool(
+            minconn=postgres_config.min_pool_size if min_size is None else min_size,
+            maxconn=max_size,
+            host=postgres_config.host,
+            port=postgres_config.port,
+            database=postgres_config.db,
+            user=postgres_config.user,
+            password=postgres_config.password
+        )
+        self.available = threading.BoundedSemaphore(max_size)
+
+    def __enter__(self):
+        """
+        Enter the context manager.
+
+        Returns:
+            PostgresConnectionPool: The pool instance.
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        """
+        Exit the context manager and close all pooled connections.
+
+        Args:
+            exc_type (type): The type of exception raised, if any.
+            exc_value (Exception): The exception instance raised, if any.
+            exc_tb (traceback): The traceback object associated with the exception, if any.
+        """
+        self.close()
+
+    @staticmethod
+    def is_healthy(conn: connection) -> bool:
+        """
+        Check that a connection is open and answers a trivial query.
+
+        Args:
+            conn (connection): The connection to check.
+
+        Returns:
+            bool: True if the connection can be used.
+        """
+        if conn.closed:
+            return False
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def checkout(self, autocommit: bool = False, timeout: Optional[float] = None) -> connection:
+        """
+        Take a healthy connection from the pool, waiting for one if all of them are checked out.
+
+        Args:
+            autocommit (bool): The autocommit mode of the returned connection.
+            timeout (Optional[float]): Seconds to wait for a connection. Defaults to postgres_config.pool_timeout.
+
+        Returns:
+            connection: A connection that must be returned with checkin.
+
+        Raises:
+            psycopg2.pool.PoolError: If no connection was returned to the pool within the timeout.
+        """
+        timeout = postgres_config.pool_timeout if timeout is None else timeout
+        if not self.available.acquire(timeout=timeout):
+            raise PoolError(f"No pooled connection available within {timeout}s")
+        try:
+            conn = self.pool.getconn()
+            if not self.is_healthy(conn):
+                self.pool.putconn(conn, close=True)
+                conn = self.pool.getconn()
+            conn.autocommit = autocommit
+        except Exception:
+            self.available.release()
+            raise
+        return conn
+
+    def checkin(self, conn: connection):
+        """
+        Return a connection to the pool, rolling back any transaction left open on it.
+
+        Args:
+            conn (connection): A connection taken with checkout.
+        """
+        try:
+            if not conn.closed and conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            self.pool.putconn(conn, close=bool(conn.closed))
+        finally:
+            self.available.release()
+
+    @contextmanager
+    def connection(self, autocommit: bool = False) -> Iterator[connection]:
+        """
+        Check out a connection for the duration of a with block.
+
+        Args:
+            autocommit (bool): The autocommit mode of the connection.
+
+        Yields:
+            connection: A healthy pooled connection.
+        """
+        conn = self.checkout(autocommit=autocommit)
+        try:
+            yield conn
+        finally:
+            self.checkin(conn)
+
+    def close(self):
+        """
+        Close all connections of the pool.
+        """
+        if not self.pool.closed:
+            self.pool.closeall()
+
 
 class PostgresConnectorContextManager:
     """
@@ -23,16 +221,19 @@ class PostgresConnectorContextManager:
         user (str): Username for authentication.
         password (str): Password for authentication.
         autocommit (bool): Whether to enable autocommit mode for the connection.
+        pool (Optional[PostgresConnectionPool]): The pool the connection is checked out from, if any.
         connection (Optional[connection]): The active database connection object.
     """
 
-    def __init__(self, autocommit: bool = False):
+    def __init__(self, autocommit: bool = False, pool: Optional[PostgresConnectionPool] = None):
         """
         Initialize the database context manager.
 
         Args:
             autocommit (bool): Enable or disable autocommit mode for the connection.
                                Defaults to False.
+            pool (Optional[PostgresConnectionPool]): Check the connection out of this pool and return it
+                                                     on exit, instead of opening and closing a new one.
         """
         self.host = postgres_config.host
         self.port = postgres_config.port
@@ -40,6 +241,7 @@ class PostgresConnectorContextManager:
         self.user = postgres_config.user
         self.password = postgres_config.password
         self.autocommit = autocommit
+        self.pool = pool
         self.connection: Optional[connection] = None
 
     def __enter__(self):
@@ -49,6 +251,9 @@ class PostgresConnectorContextManager:
         Returns:
             PostgresConnectorContextManager: The context manager instance with an active connection.
         """
+        if self.pool:
+            self.connection = self.pool.checkout(autocommit=self.autocommit)
+            return self
         self.connection = psycopg2.connect(
             host=self.host,
             port=self.port,
@@ -61,14 +266,17 @@ class PostgresConnectorContextManager:
 
     def __exit__(self, exc_type, exc_value, exc_tb):
         """
-        Exit the context manager and close the database connection.
+        Exit the context manager and close the database connection, or return it to the pool.
 
         Args:
             exc_type (type): The type of exception raised, if any.
             exc_value (Exception): The exception instance raised, if any.
             exc_tb (traceback): The traceback object associated with the exception, if any.
         """
-        if self.connection:
+        if self.connection and self.pool:
+            self.pool.checkin(self.connection)
+            self.connection = None
+        elif self.connection:
             self.connection.close()
 
     def get_connection(self) -> Optional[connection]:
@@ -99,3 +307,114 @@ class PostgresConnectorContextManager:
         except Exception as e:
             print(f'Failed to receive data from DB\nError: {e}\n')
             raise
+
+    def iter_data_sql(self, query: str, itersize: int = 10000, as_arrow: bool = False,
+                      params: Optional[dict] = None) -> Iterator[Union[DataFrame, pa.RecordBatch]]:
+        """
+        Execute a SQL query and stream the results in chunks through a server-side cursor.
+
+        Only one chunk of rows is held in client memory at a time, so results larger than RAM
+        can be processed. In autocommit mode the cursor is declared WITH HOLD, so it outlives the
+        implicit transaction of the query. At least one chunk is yielded, so the columns are known
+        even for an empty result; no other chunk is empty.
+
+        Args:
+            query (str): The SQL query to execute.
+            itersize (int): The number of rows fetched from the server per chunk.
+            as_arrow (bool): Yield Arrow record batches with a stable schema instead of pandas DataFrames.
+            params (Optional[dict]): The parameters of the query.
+
+        Yields:
+            Union[DataFrame, pa.RecordBatch]: The next chunk of the query results.
+
+        Raises:
+            Exception: If the query execution fails, an exception is raised with the error message.
+        """
+        cursor = self.connection.cursor(name=f'stream_{uuid4().hex}', withhold=self.autocommit)
+        cursor.itersize = itersize
+        try:
+            cursor.execute(query, params)
+            chunks = 0
+            while True:
+                rows = cursor.fetchmany(itersize)
+                # The empty fetch after an exact multiple of itersize rows only ends the stream
+                if rows or not chunks:
+                    if as_arrow:
+                        yield rows_to_record_batch(rows, cursor.description)
+                    else:
+                        yield pd.DataFrame.from_records(rows, columns=[column.name for column in cursor.description],
+                                                        coerce_float=True)
+                    chunks += 1
+                if len(rows) < itersize:
+                    break
+        except Exception as e:
+            print(f'Failed to receive data from DB\nError: {e}\n')
+            raise
+        finally:
+            cursor.close()
+
+    def get_arrow_column_types(self, query: str) -> Dict[str, pa.DataType]:
+        """
+        Resolve the Arrow type of every result column of a query from a LIMIT 0 run of it.
+
+        NUMERIC columns with a declared precision of up to 38 digits are typed as decimals, other NUMERIC
+        columns as float64. Types missing from POSTGRES_OID_TO_ARROW_TYPE are read as strings.
+
+        Args:
+            query (str): The SQL query.
+
+        Returns:
+            Dict[str, pa.DataType]: The Arrow type of every result column, by column name.
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"SELECT * FROM ({query.strip().rstrip(';')}) AS q LIMIT 0")
+            column_types = {}
+            for column in cursor.description:
+                if column.type_code == NUMERIC_OID and column.precision is not None and column.precision <= 38:
+                    column_types[column.name] = pa.decimal128(column.precision, column.scale)
+                else:
+                    column_types[column.name] = POSTGRES_OID_TO_ARROW_TYPE.get(column.type_code, pa.string())
+            return column_types
+
+    def get_data_sql_copy(self, query: str, as_arrow: bool = False) -> Union[DataFrame, pa.Table]:
+        """
+        Execute a SQL query through COPY (query) TO STDOUT and parse the result straight into Arrow.
+
+        The CSV stream is parsed by the multithreaded Arrow CSV reader with the column types resolved
+        by get_arrow_column_types, so no Python object is created per cell. The DataFrame is converted
+        from the Arrow table with split blocks and self-destruct, avoiding a second full copy.
+
+        Args:
+            query (str): The SQL query to execute.
+            as_arrow (bool): Return the Arrow table instead of a pandas DataFrame.
+
+        Returns:
+            Union[DataFrame, pa.Table]: The query results.
+
+        Raises:
+            Exception: If the query execution fails, an exception is raised with the error message.
+        """
+        try:
+            column_types = self.get_arrow_column_types(query)
+            buffer = io.BytesIO()
+            with self.connection.cursor() as cursor:
+                cursor.copy_expert(f"COPY ({query.strip().rstrip(';')}) TO STDOUT WITH (FORMAT csv, HEADER)", buffer)
+            buffer.seek(0)
+            table = pa_csv.read_csv(
+                buffer,
+                convert_options=pa_csv.ConvertOptions(
+                    column_types=column_types,
+                    true_values=['t'],
+                    false_values=['f'],
+                    # NULL is an unquoted empty field, an empty string is quoted
+                    null_values=[''],
+                    strings_can_be_null=True,
+                    quoted_strings_can_be_null=False
+                )
+            )
+        except Exception as e:
+            print(f'Failed to receive data from DB\nError: {e}\n')
+            raise
+        if as_arrow:
+            return table
+        return table.to_pandas(split_blocks=True, self_destruct=True)
@@ -1,9 +1,51 @@
 import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+import numpy as np
+import pyarrow as pa
 from faker import Faker
 from datetime import datetime, timedelta
 
 from data_dev.config import data_generator_config
 
+# Spawn keys separating the seed streams of the different shard kinds
+PATIENTS_SHARD_KEY = 0
+VISITS_SHARD_KEY = 1
+
+
+def generate_patient_shard(generator_config, first_patient_id, num_patients):
+    """
+    Generates one shard of patients. Runs in a worker process of the generation pool.
+
+    Args:
+        generator_config (DataGeneratorConfig): The generator configuration, carrying the shard seed.
+        first_patient_id (int): The ID of the first patient in the shard.
+        num_patients (int): The number of patients in the shard.
+
+    Returns:
+        List[dict]: A list of patient data dictionaries.
+    """
+    return DataGenerator(generator_config).generate_patients(first_patient_id, num_patients)
+
+
+def generate_visit_shard(generator_config, start_date, end_date):
+    """
+    Generates the visits of one date window. Runs in a worker process of the generation pool.
+
+    Args:
+        generator_config (DataGeneratorConfig): The generator configuration, carrying the shard seed.
+        start_date (datetime): The first day of the window.
+        end_date (datetime): The last day of the window.
+
+    Returns:
+        List[dict] or pyarrow.Table: The visits of the window.
+    """
+    dg = DataGenerator(generator_config)
+    if dg.vectorized:
+        return dg.generate_visits_vectorized(start_date, end_date)
+    return dg.generate_visits(start_date, end_date)
+
 
 class DataGenerator:
     """
@@ -17,31 +59,63 @@ class DataGenerator:
         date_format (str): The format of the date strings, sourced from generator_config.date_format.
         visits_per_day (Tuple[int, int]): The range (min, max) of visits per day, sourced from generator_config.visits_per_day.
         facility_types (List[str]): A list of facility types, sourced from generator_config.facility_types.
+        seed (Optional[int]): The seed for all random generators, sourced from generator_config.seed.
+        vectorized (bool): Whether visits are generated in bulk as an Arrow table, sourced from
+                           generator_config.vectorized.
+        random (random.Random): The random generator used by the row-wise visit generation.
+        rng (numpy.random.Generator): The NumPy random generator used by the vectorized visit generation.
+        window_days (int): The number of days of visits per batch yielded by iter_visit_batches,
+                           sourced from generator_config.window_days.
+        workers (int): The number of worker processes used by the sharded generation, sourced from
+                       generator_config.workers.
+        patients_per_shard (int): The number of patients per shard yielded by iter_patient_batches,
+                                  sourced from generator_config.patients_per_shard.
+        seed_sequence (numpy.random.SeedSequence): The root of the per-shard seeds. Its entropy is random
+                                                   when no seed is configured, but shared by all shards.
         patients (List[dict] or None): A list of generated patient data, initialized as None.
         facilities (List[dict] or None): A list of generated facility data, initialized as None.
-        visits (List[dict] or None): A list of generated visit data, initialized as None.
+        visits (List[dict], pyarrow.Table or None): The generated visit data, initialized as None.
     """
 
-    def __init__(self):
+    def __init__(self, generator_config=None):
         """
         Initializes the DataGenerator class with configuration values and sets up Faker.
+
+        Args:
+            generator_config (DataGeneratorConfig, optional): The configuration to use.
+                                                              Defaults to data_generator_config.
         """
+        self.generator_config = generator_config or data_generator_config
+        self.seed = self.generator_config.seed
+        self.vectorized = self.generator_config.vectorized
         self.fake = Faker()
-        self.num_patients = data_generator_config.num_patients
-        self.start_date = data_generator_config.start_date
-        self.end_date = data_generator_config.end_date
-        self.date_format = data_generator_config.date_format
-        self.visits_per_day = data_generator_config.visits_per_day
-        self.facility_types = data_generator_config.facility_types
+        if self.seed is not None:
+            self.fake.seed_instance(self.seed)
+        self.random = random.Random(self.seed)
+        self.rng = np.random.default_rng(self.seed)
+        self.seed_sequence = np.random.SeedSequence(self.seed)
+        self.num_patients = self.generator_config.num_patients
+        self.start_date = self.generator_config.start_date
+        self.end_date = self.generator_config.end_date
+        self.date_format = self.generator_config.date_format
+        self.visits_per_day = self.generator_config.visits_per_day
+        self.facility_types = self.generator_config.facility_types
+        self.window_days = self.generator_config.window_days
+        self.workers = self.generator_config.workers
+        self.patients_per_shard = self.generator_config.patients_per_shard
 
         self.patients = None
         self.facilities = None
         self.visits = None
 
-    def generate_patients(self):
+    def generate_patients(self, first_patient_id=1, num_patients=None):
         """
         Generates a list of synthetic patient data.
 
+        Args:
+            first_patient_id (int): The ID of the first generated patient. Defaults to 1.
+            num_patients (int, optional): The number of patients to generate. Defaults to the configured num_patients.
+
         Returns:
             List[dict]: A list of dictionaries, each representing a patient with attributes:
                 - first_name (str): The first name of the patient.
@@ -49,10 +123,11 @@ class DataGenerator:
                 - date_of_birth (str): The date of birth of the patient in the configured date format.
                 - address (str): The address of the patient.
         """
+        num_patients = self.num_patients if num_patients is None else num_patients
         patients = []
-        for i in range(0, self.num_patients):
+        for i in range(0, num_patients):
             patients.append({
-                "patient_id": i + 1,
+                "patient_id": first_patient_id + i,
                 "first_name": self.fake.first_name(),
                 "last_name": self.fake.last_name(),
                 "date_of_birth": self.fake.date_of_birth(minimum_age=18, maximum_age=100).strftime(self.date_format),
@@ -86,10 +161,14 @@ class DataGenerator:
             })
         return facilities
 
-    def generate_visits(self):
+    def generate_visits(self, start_date=None, end_date=None):
         """
         Generates a list of synthetic visit data.
 
+        Args:
+            start_date (datetime, optional): The first day to generate visits for. Defaults to the configured start_date.
+            end_date (datetime, optional): The last day to generate visits for. Defaults to the configured end_date.
+
         Returns:
             List[dict]: A list of dictionaries, each representing a visit with attributes:
                 - patient_id (int): The ID of the patient (randomly assigned).
@@ -99,16 +178,16 @@ class DataGenerator:
                 - treatment_cost (float): The cost of the treatment (randomly generated).
                 - duration_minutes (int): The duration of the visit in minutes (randomly generated).
         """
+        start_date = start_date or datetime.strptime(self.start_date, self.date_format)
+        end_date = end_date or datetime.strptime(self.end_date, self.date_format)
         visits = []
-        date_list = [(datetime.strptime(self.end_date, self.date_format) - timedelta(days=i)) for i in
-                     range((datetime.strptime(self.end_date, self.date_format)
-                            - datetime.strptime(self.start_date, self.date_format)).days + 1)]
+        date_list = [(end_date - timedelta(days=i)) for i in range((end_date - start_date).days + 1)]
         for date in date_list:
-            num_visits_per_day = random.randint(self.visits_per_day[0], self.visits_per_day[1])
+            num_visits_per_day = self.random.randint(self.visits_per_day[0], self.visits_per_day[1])
             for _ in range(num_visits_per_day):
-                random_hour = random.randint(0, 23)
-                random_minute = random.randint(0, 59)
-                random_second = random.randint(0, 59)
+                random_hour = self.random.randint(0, 23)
+                random_minute = self.random.randint(0, 59)
+                random_second = self.random.randint(0, 59)
                 visit_timestamp = datetime(
                     year=date.year,
                     month=date.month,
@@ -118,28 +197,166 @@ class DataGenerator:
                     second=random_second
                 )
                 visits.append({
-                    "patient_id": random.randint(1, self.num_patients),
-                    "facility_id": random.randint(1, len(self.facility_types)),
+                    "patient_id": self.random.randint(1, self.num_patients),
+                    "facility_id": self.random.randint(1, len(self.facility_types)),
                     "visit_timestamp": visit_timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-                    "treatment_cost": round(random.uniform(50, 5000), 2),
-                    "duration_minutes": random.randint(15, 60)
+                    "treatment_cost": round(self.random.uniform(50, 5000), 2),
+                    "duration_minutes": self.random.randint(15, 60)
                 })
         return visits
 
-    def generate_data(self):
+    def generate_visits_vectorized(self, start_date=None, end_date=None):
         """
-        Generates synthetic data for patients, facilities, and visits, and stores them in the class attributes.
+        Generates synthetic visit data in bulk as a columnar Arrow table.
+
+        Uses the same distributions as generate_visits: a uniform number of visits per day within
+        visits_per_day, a uniform time of day, uniform patient and facility ids, a treatment cost
+        uniform in [50, 5000] rounded to 2 decimals and a duration uniform in [15, 60] minutes.
+        All values are drawn with a few NumPy calls instead of per-visit Python calls.
+
+        Args:
+            start_date (datetime, optional): The first day to generate visits for. Defaults to the configured start_date.
+            end_date (datetime, optional): The last day to generate visits for. Defaults to the configured end_date.
+
+        Returns:
+            pyarrow.Table: A table with the columns:
+                - patient_id (int32): The ID of the patient (randomly assigned).
+                - facility_id (int32): The ID of the facility (randomly assigned).
+                - visit_timestamp (timestamp[s]): The timestamp of the visit.
+                - treatment_cost (float64): The cost of the treatment (randomly generated).
+                - duration_minutes (int32): The duration of the visit in minutes (randomly generated).
+        """
+        start_date = start_date or datetime.strptime(self.start_date, self.date_format)
+        end_date = end_date or datetime.strptime(self.end_date, self.date_format)
+        days = np.arange(np.datetime64(start_date.date(), 'D'), np.datetime64(end_date.date(), 'D') + 1)
+
+        visits_per_day = self.rng.integers(self.visits_per_day[0], self.visits_per_day[1], size=len(days),
+                                           endpoint=True)
+        num_visits = int(visits_per_day.sum())
+        visit_days = np.repeat(days, visits_per_day).astype('datetime64[s]')
+        seconds_of_day = self.rng.integers(0, 24 * 60 * 60, size=num_visits).astype('timedelta64[s]')
+
+        return pa.table({
+            "patient_id": self.rng.integers(1, self.num_patients, size=num_visits, endpoint=True, dtype=np.int32),
+            "facility_id": self.rng.integers(1, len(self.facility_types), size=num_visits, endpoint=True,
+                                             dtype=np.int32),
+            "visit_timestamp": visit_days + seconds_of_day,
+            "treatment_cost": np.round(self.rng.uniform(50, 5000, size=num_visits), 2),
+            "duration_minutes": self.rng.integers(15, 60, size=num_visits, endpoint=True, dtype=np.int32)
+        })
+
+    def iter_date_windows(self):
+        """
+        Splits the configured date range into consecutive windows of window_days days.
+
+        Yields:
+            Tuple[datetime, datetime]: The first and the last day of each window (both inclusive).
+        """
+        start_date = datetime.strptime(self.start_date, self.date_format)
+        end_date = datetime.strptime(self.end_date, self.date_format)
+        while start_date <= end_date:
+            window_end = min(start_date + timedelta(days=self.window_days - 1), end_date)
+            yield start_date, window_end
+            start_date = window_end + timedelta(days=1)
+
+    def shard_config(self, shard_key, shard_index):
+        """
+        Builds the configuration of one shard, with a seed derived from the root seed and the shard position.
+
+        The seed depends only on the root seed, the shard kind and the shard index, so every shard
+        produces the same data regardless of the number of workers or the order in which shards run.
+
+        Args:
+            shard_key (int): The shard kind (PATIENTS_SHARD_KEY or VISITS_SHARD_KEY).
+            shard_index (int): The position of the shard.
+
+        Returns:
+            DataGeneratorConfig: A copy of the configuration with the shard seed.
+        """
+        shard_seed_sequence = np.random.SeedSequence(self.seed_sequence.entropy, spawn_key=(shard_key, shard_index))
+        return replace(self.generator_config, seed=int(shard_seed_sequence.generate_state(1)[0]))
+
+    def run_shards(self, function, shards):
+        """
+        Runs the shards in order, in a process pool when more than one worker is configured.
+
+        At most two shards per worker are in flight, and results are yielded in shard order as soon as
+        they are ready, so the caller can load one shard while the following ones are still generated.
+
+        Args:
+            function (Callable): A module level function generating one shard.
+            shards (Iterable[tuple]): The arguments of every shard.
+
+        Yields:
+            The result of the function for each shard, in shard order.
+        """
+        if self.workers <= 1:
+            for shard in shards:
+                yield function(*shard)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            for shard in shards:
+                pending.append(executor.submit(function, *shard))
+                if len(pending) >= 2 * self.workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def iter_patient_batches(self):
+        """
+        Generates synthetic patient data in shards of patients_per_shard patients, each with its own seed.
+
+        Yields:
+            List[dict]: The patients of one shard.
+        """
+        shards = (
+            (self.shard_config(PATIENTS_SHARD_KEY, index), first_patient_id,
+             min(self.patients_per_shard, self.num_patients - first_patient_id + 1))
+            for index, first_patient_id in enumerate(range(1, self.num_patients + 1, self.patients_per_shard))
+        )
+        yield from self.run_shards(generate_patient_shard, shards)
+
+    def iter_visit_batches(self):
+        """
+        Generates synthetic visit data window by window, so only one window of visits is held in memory.
+
+        Every window is a shard with its own seed. Visits are generated with generate_visits_vectorized
+        when the generator is configured as vectorized.
+
+        Yields:
+            List[dict] or pyarrow.Table: The visits of one date window.
+        """
+        shards = (
+            (self.shard_config(VISITS_SHARD_KEY, index), window_start, window_end)
+            for index, (window_start, window_end) in enumerate(self.iter_date_windows())
+        )
+        yield from self.run_shards(generate_visit_shard, shards)
+
+    def generate_reference_data(self):
+        """
+        Generates synthetic data for patients and facilities, and stores them in the class attributes.
         """
         self.patients = self.generate_patients()
         self.facilities = self.generate_facilities()
-        self.visits = self.generate_visits()
+
+    def generate_data(self):
+        """
+        Generates synthetic data for patients, facilities, and visits, and stores them in the class attributes.
+
+        Visits are generated with generate_visits_vectorized when the generator is configured as vectorized.
+        All visits are kept in memory; use iter_visit_batches for large date ranges.
+        """
+        self.generate_reference_data()
+        self.visits = self.generate_visits_vectorized() if self.vectorized else self.generate_visits()
 
     def get_visits(self):
         """
         Retrieves the generated visit data.
 
         Returns:
-            List[dict]: A list of visit data dictionaries.
+            List[dict] or pyarrow.Table: A list of visit data dictionaries, or an Arrow table in vectorized mode.
         """
         return self.visits
 
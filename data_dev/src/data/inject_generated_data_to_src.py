@@ -1,13 +1,59 @@
+import csv
+import io
+import logging
+import time
+from itertools import islice
+
+import psycopg2
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from psycopg2.extras import execute_values
+
+from datetime import datetime
+
 from data_dev.src.data.data_generator import DataGenerator
+from data_dev.src.data.partition_manager import MonthlyPartitionManager
+from data_dev.config import injection_config, load_config
 from data_dev.queries import (
     CREATE_SRC_GENERATED_FACILITIES_TABLE_QUERY,
     CREATE_SRC_GENERATED_PATIENTS_TABLE_QUERY,
     CREATE_SRC_GENERATED_VISITS_TABLE_QUERY,
+    CREATE_SRC_GENERATED_VISITS_PARTITIONED_TABLE_QUERY,
     INSERT_SRC_GENERATED_FACILITIES_QUERY,
     INSERT_SRC_GENERATED_PATIENTS_QUERY,
-    INSERT_SRC_GENERATED_VISITS_QUERY
+    INSERT_SRC_GENERATED_VISITS_QUERY,
+    INSERT_SRC_GENERATED_FACILITIES_VALUES_QUERY,
+    INSERT_SRC_GENERATED_PATIENTS_VALUES_QUERY,
+    INSERT_SRC_GENERATED_VISITS_VALUES_QUERY,
+    COPY_SRC_GENERATED_FACILITIES_QUERY,
+    COPY_SRC_GENERATED_PATIENTS_QUERY,
+    COPY_SRC_GENERATED_VISITS_QUERY
 )
 
+# Column order and load queries of every src table, shared by all ingest modes
+SRC_TABLES = {
+    'src_generated_facilities': {
+        'columns': ('facility_id', 'facility_name', 'facility_type', 'address', 'city', 'state'),
+        'insert_query': INSERT_SRC_GENERATED_FACILITIES_QUERY,
+        'insert_values_query': INSERT_SRC_GENERATED_FACILITIES_VALUES_QUERY,
+        'copy_query': COPY_SRC_GENERATED_FACILITIES_QUERY
+    },
+    'src_generated_patients': {
+        'columns': ('patient_id', 'first_name', 'last_name', 'date_of_birth', 'address'),
+        'insert_query': INSERT_SRC_GENERATED_PATIENTS_QUERY,
+        'insert_values_query': INSERT_SRC_GENERATED_PATIENTS_VALUES_QUERY,
+        'copy_query': COPY_SRC_GENERATED_PATIENTS_QUERY
+    },
+    'src_generated_visits': {
+        'columns': ('patient_id', 'facility_id', 'visit_timestamp', 'treatment_cost', 'duration_minutes'),
+        'insert_query': INSERT_SRC_GENERATED_VISITS_QUERY,
+        'insert_values_query': INSERT_SRC_GENERATED_VISITS_VALUES_QUERY,
+        'copy_query': COPY_SRC_GENERATED_VISITS_QUERY
+    }
+}
+
+INGEST_MODES = ('copy', 'execute_values', 'insert')
+
 
 class GeneratedDataLoader:
     """
@@ -16,10 +62,23 @@ class GeneratedDataLoader:
     Attributes:
         conn (object): A database connection object.
         dg (DataGenerator): An instance of the DataGenerator class for generating synthetic data.
+        mode (str): The ingest mode ('copy', 'execute_values' or 'insert'), sourced from injection_config.mode.
+        batch_size (int): The number of rows per COPY / execute_values batch, sourced from injection_config.batch_size.
+        partition_visits (bool): Whether src_generated_visits is partitioned by month, sourced from
+                                 load_config.partition_visits.
+        partition_manager (MonthlyPartitionManager): Creates the monthly partitions of src_generated_visits.
 
     Methods:
         - is_table_empty(cursor, table_name): Checks if a given table is empty.
         - inject_data_into_table(cursor, data, query): Inserts data into a table using a specified query.
+        - execute_values_into_table(cursor, data, query, columns, batch_size): Inserts data with batched
+          multi-row INSERT statements.
+        - copy_data_into_table(cursor, data, query, columns, batch_size): Streams data into a table with COPY.
+        - copy_arrow_into_table(cursor, table, query, columns, batch_size): Streams an Arrow table into
+          a table with COPY.
+        - iter_records(data, batch_size): Iterates over data as dictionaries, whether it is a list or an Arrow table.
+        - load_table(cursor, table_name, data): Loads data into a src table using the configured ingest mode.
+        - ensure_visits_partitions(cursor): Creates the monthly partitions of src_generated_visits.
         - inject_data(): Creates tables (if not exist) and injects generated data into the database.
     """
 
@@ -29,9 +88,19 @@ class GeneratedDataLoader:
 
         Args:
             conn (object): A database connection object.
+
+        Raises:
+            ValueError: If the configured ingest mode is not supported.
         """
         self.conn = conn
         self.dg = DataGenerator()
+        self.mode = injection_config.mode
+        self.batch_size = injection_config.batch_size
+        self.partition_visits = load_config.partition_visits
+        self.partition_manager = MonthlyPartitionManager()
+
+        if self.mode not in INGEST_MODES:
+            raise ValueError(f"Unsupported ingest mode '{self.mode}'. Expected one of: {', '.join(INGEST_MODES)}")
 
     @staticmethod
     def is_table_empty(cursor, table_name):
@@ -58,20 +127,196 @@ class GeneratedDataLoader:
             cursor (object): A database cursor object.
             data (list): A list of data to be inserted.
             query (str): The SQL query for inserting data.
+
+        Returns:
+            int: The number of inserted rows.
         """
+        rows = 0
         for params in data:
             cursor.execute(query, params)
+            rows += 1
+        return rows
+
+    @staticmethod
+    def execute_values_into_table(cursor, data, query, columns, batch_size):
+        """
+        Inserts data into a table using batched multi-row INSERT statements.
+
+        Args:
+            cursor (object): A database cursor object.
+            data (Iterable[dict]): The dictionaries to be inserted.
+            query (str): The SQL query with a single VALUES %s placeholder.
+            columns (tuple): The column names, in the order used by the query.
+            batch_size (int): The number of rows sent in a single INSERT statement.
+
+        Returns:
+            int: The number of inserted rows.
+        """
+        rows = 0
+        records = iter(data)
+        while True:
+            batch = [tuple(record[column] for column in columns) for record in islice(records, batch_size)]
+            if not batch:
+                break
+            execute_values(cursor, query, batch, page_size=batch_size)
+            rows += len(batch)
+        return rows
+
+    @staticmethod
+    def copy_data_into_table(cursor, data, query, columns, batch_size):
+        """
+        Streams data into a table using PostgreSQL COPY FROM STDIN in CSV format.
+
+        Data is serialized in batches, so only one batch of CSV text is held in memory at a time.
+
+        Args:
+            cursor (object): A database cursor object.
+            data (Iterable[dict]): The dictionaries to be copied.
+            query (str): The COPY ... FROM STDIN query.
+            columns (tuple): The column names, in the order used by the query.
+            batch_size (int): The number of rows sent in a single COPY statement.
+
+        Returns:
+            int: The number of copied rows.
+        """
+        rows = 0
+        records = iter(data)
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator='\n')
+            writer.writerows(tuple(record[column] for column in columns) for record in batch)
+            buffer.seek(0)
+            cursor.copy_expert(query, buffer)
+            rows += len(batch)
+        return rows
+
+    @staticmethod
+    def copy_arrow_into_table(cursor, table, query, columns, batch_size):
+        """
+        Streams an Arrow table into a table using PostgreSQL COPY FROM STDIN in CSV format.
+
+        Record batches are serialized to CSV by Arrow, without creating Python objects per value.
+
+        Args:
+            cursor (object): A database cursor object.
+            table (pyarrow.Table): The data to be copied.
+            query (str): The COPY ... FROM STDIN query.
+            columns (tuple): The column names, in the order used by the query.
+            batch_size (int): The number of rows sent in a single COPY statement.
+
+        Returns:
+            int: The number of copied rows.
+        """
+        write_options = pa_csv.WriteOptions(include_header=False)
+        for batch in table.select(list(columns)).to_batches(max_chunksize=batch_size):
+            buffer = io.BytesIO()
+            pa_csv.write_csv(batch, buffer, write_options=write_options)
+            buffer.seek(0)
+            cursor.copy_expert(query, buffer)
+        return table.num_rows
+
+    @staticmethod
+    def iter_records(data, batch_size):
+        """
+        Iterates over data as dictionaries.
+
+        Args:
+            data (list or pyarrow.Table): A list of dictionaries or an Arrow table.
+            batch_size (int): The number of rows converted to Python objects at a time for Arrow tables.
+
+        Yields:
+            dict: One row of data.
+        """
+        if isinstance(data, pa.Table):
+            for batch in data.to_batches(max_chunksize=batch_size):
+                yield from batch.to_pylist()
+        else:
+            yield from data
+
+    def load_table(self, cursor, table_name, data):
+        """
+        Loads data into a src table using the configured ingest mode and logs the achieved throughput.
+
+        In 'copy' mode the load runs inside a savepoint: if COPY fails, the savepoint is rolled back and
+        the data is loaded with batched execute_values instead (and the loader stays in that mode).
+
+        Args:
+            cursor (object): A database cursor object.
+            table_name (str): The name of the src table (a key of SRC_TABLES).
+            data (list or pyarrow.Table): A list of dictionaries or an Arrow table to be loaded.
+
+        Returns:
+            int: The number of loaded rows.
+        """
+        table = SRC_TABLES[table_name]
+        start = time.perf_counter()
+
+        if self.mode == 'copy':
+            cursor.execute("SAVEPOINT src_copy")
+            try:
+                if isinstance(data, pa.Table):
+                    rows = self.copy_arrow_into_table(
+                        cursor, data, table['copy_query'], table['columns'], self.batch_size
+                    )
+                else:
+                    rows = self.copy_data_into_table(
+                        cursor, data, table['copy_query'], table['columns'], self.batch_size
+                    )
+                cursor.execute("RELEASE SAVEPOINT src_copy")
+            except psycopg2.Error as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT src_copy")
+                logging.warning(f"COPY into {table_name} failed, falling back to execute_values: {e}")
+                self.mode = 'execute_values'
+        if self.mode == 'execute_values':
+            rows = self.execute_values_into_table(
+                cursor, self.iter_records(data, self.batch_size), table['insert_values_query'], table['columns'],
+                self.batch_size
+            )
+        elif self.mode == 'insert':
+            rows = self.inject_data_into_table(cursor, self.iter_records(data, self.batch_size), table['insert_query'])
+
+        elapsed = time.perf_counter() - start
+        logging.info(f"Loaded {rows} rows into {table_name} using '{self.mode}' in {elapsed:.2f}s "
+                     f"({rows / elapsed if elapsed else rows:.0f} rows/sec)")
+        return rows
+
+    def ensure_visits_partitions(self, cursor):
+        """
+        Creates the monthly partitions of src_generated_visits covering the generated date range.
+
+        Does nothing when partitioning is disabled, or when the existing table is not partitioned.
+
+        Args:
+            cursor (object): A database cursor object.
+        """
+        if not self.partition_visits:
+            return
+        if not self.partition_manager.is_partitioned(cursor, 'src_generated_visits'):
+            logging.warning("src_generated_visits already exists and is not partitioned, skipping partitioning")
+            return
+        self.partition_manager.ensure_partitions(
+            cursor,
+            table_name='src_generated_visits',
+            start=datetime.strptime(self.dg.start_date, self.dg.date_format),
+            end=datetime.strptime(self.dg.end_date, self.dg.date_format)
+        )
 
     def inject_data(self):
         """
         Creates tables (if they don't exist) and injects generated data into the database.
 
         This method:
-        1. Creates the `src_generated_facilities`, `src_generated_patients`, and 
-           `src_generated_visits` tables if they do not already exist.
+        1. Creates the `src_generated_facilities`, `src_generated_patients`, and
+           `src_generated_visits` tables if they do not already exist (`src_generated_visits`
+           partitioned by month when partition_visits is enabled).
         2. Checks if the `src_generated_visits` table is empty.
-        3. If the table is empty, generates synthetic data for facilities, patients, and visits.
-        4. Inserts the generated data into the respective tables.
+        3. If the table is empty, generates synthetic data for facilities and loads it.
+        4. Generates patients shard by shard and visits window by window and loads each batch as soon
+           as it is ready (shards are generated in parallel when several workers are configured),
+           so memory usage does not grow with the number of patients or the date range.
         5. Commits the transaction if successful, or rolls back in case of an error.
         """
         cursor = self.conn.cursor()
@@ -79,26 +324,26 @@ class GeneratedDataLoader:
             # Create tables if they do not exist
             cursor.execute(CREATE_SRC_GENERATED_FACILITIES_TABLE_QUERY)
             cursor.execute(CREATE_SRC_GENERATED_PATIENTS_TABLE_QUERY)
-            cursor.execute(CREATE_SRC_GENERATED_VISITS_TABLE_QUERY)
+            if self.partition_visits:
+                cursor.execute(CREATE_SRC_GENERATED_VISITS_PARTITIONED_TABLE_QUERY)
+            else:
+                cursor.execute(CREATE_SRC_GENERATED_VISITS_TABLE_QUERY)
 
-            # Generate and insert data if the visits table is empty
+            # Generate and load data if the visits table is empty
             if self.is_table_empty(cursor=cursor, table_name='src_generated_visits'):
-                self.dg.generate_data()
-                self.inject_data_into_table(
-                    cursor=cursor,
-                    data=self.dg.get_facilities(),
-                    query=INSERT_SRC_GENERATED_FACILITIES_QUERY
-                )
-                self.inject_data_into_table(
-                    cursor=cursor,
-                    data=self.dg.get_patients(),
-                    query=INSERT_SRC_GENERATED_PATIENTS_QUERY
-                )
-                self.inject_data_into_table(
-                    cursor=cursor,
-                    data=self.dg.get_visits(),
-                    query=INSERT_SRC_GENERATED_VISITS_QUERY
-                )
+                self.ensure_visits_partitions(cursor)
+                self.load_table(cursor=cursor, table_name='src_generated_facilities',
+                                data=self.dg.generate_facilities())
+                for patients in self.dg.iter_patient_batches():
+                    self.load_table(cursor=cursor, table_name='src_generated_patients', data=patients)
+
+                start = time.perf_counter()
+                rows = 0
+                for visits in self.dg.iter_visit_batches():
+                    rows += self.load_table(cursor=cursor, table_name='src_generated_visits', data=visits)
+                elapsed = time.perf_counter() - start
+                logging.info(f"Generated and loaded {rows} visits in {elapsed:.2f}s "
+                             f"({rows / elapsed if elapsed else rows:.0f} rows/sec)")
                 self.conn.commit()
         except Exception as e:
             # Rollback the transaction in case of an error
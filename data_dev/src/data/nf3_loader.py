@@ -1,22 +1,61 @@
+import logging
+import time
+
+from data_dev.src.data.partition_manager import MonthlyPartitionManager
 from data_dev.queries import (CREATE_FACILITIES_TABLE_QUERY,
                               CREATE_PATIENTS_TABLE_QUERY,
-                              CREATE_VISITS_TABLE_QUERY)
+                              CREATE_VISITS_TABLE_QUERY,
+                              CREATE_VISITS_PARTITIONED_TABLE_QUERY,
+                              CREATE_NF3_LOAD_STATE_TABLE_QUERY,
+                              SELECT_SRC_VISITS_TIMESTAMP_RANGE_QUERY)
+from data_dev.queries import (CREATE_SRC_GENERATED_FACILITIES_ID_INDEX_QUERY,
+                              CREATE_SRC_GENERATED_PATIENTS_ID_INDEX_QUERY,
+                              CREATE_SRC_GENERATED_VISITS_TIMESTAMP_INDEX_QUERY,
+                              ADD_FACILITIES_EXTERNAL_ID_UNIQUE_CONSTRAINT_QUERY,
+                              ADD_PATIENTS_EXTERNAL_ID_UNIQUE_CONSTRAINT_QUERY,
+                              CREATE_VISITS_MERGE_KEY_INDEX_QUERY,
+                              ANALYZE_SRC_TABLES_QUERY,
+                              ANALYZE_NF3_TABLES_QUERY)
 from data_dev.queries import (MERGE_PATIENTS_QUERY,
                               MERGE_VISITS_QUERY,
                               MERGE_FACILITIES_QUERY)
+from data_dev.queries import (MERGE_FACILITIES_INCREMENTAL_QUERY,
+                              MERGE_PATIENTS_INCREMENTAL_QUERY,
+                              MERGE_VISITS_INCREMENTAL_QUERY,
+                              SELECT_SRC_FACILITIES_HIGH_WATERMARK_QUERY,
+                              SELECT_SRC_PATIENTS_HIGH_WATERMARK_QUERY,
+                              SELECT_SRC_VISITS_HIGH_WATERMARK_QUERY,
+                              SELECT_NF3_LOAD_STATE_QUERY,
+                              UPSERT_NF3_LOAD_STATE_QUERY)
 from data_dev.config import load_config
 
+# Incremental merge of every entity: the watermark column in nf3_load_state, the query computing
+# the high watermark of the source slice and the next watermark, and the query merging the slice
+INCREMENTAL_ENTITIES = {
+    'facilities': ('last_loaded_id', SELECT_SRC_FACILITIES_HIGH_WATERMARK_QUERY, MERGE_FACILITIES_INCREMENTAL_QUERY),
+    'patients': ('last_loaded_id', SELECT_SRC_PATIENTS_HIGH_WATERMARK_QUERY, MERGE_PATIENTS_INCREMENTAL_QUERY),
+    'visits': ('last_loaded_timestamp', SELECT_SRC_VISITS_HIGH_WATERMARK_QUERY, MERGE_VISITS_INCREMENTAL_QUERY)
+}
+
 
 class NF3Loader:
     """
     A class to handle the loading and transformation of data into a 3NF (Third Normal Form) database schema.
 
     This class is responsible for:
-    1. Creating the necessary database tables if they do not already exist.
+    1. Creating the necessary database tables, indexes and constraints if they do not already exist.
     2. Merging data into the 3NF tables using predefined SQL queries.
+    3. Refreshing planner statistics of the src and 3NF tables around the merge.
+    4. In incremental mode, merging only the source rows above the persisted watermarks and
+       recording every run in the nf3_load_state table.
+    5. With partitioning enabled, creating visits as a table partitioned by month and creating
+       the partitions of new months before every merge.
 
     Attributes:
         conn: A psycopg2 database connection object used to interact with the database.
+        incremental (bool): Whether the incremental mode is used, sourced from load_config.incremental.
+        partition_visits (bool): Whether visits is partitioned by month, sourced from load_config.partition_visits.
+        partition_manager (MonthlyPartitionManager): Creates the monthly partitions of visits.
     """
 
     def __init__(self, conn):
@@ -27,16 +66,141 @@ class NF3Loader:
             conn: A psycopg2 database connection object.
         """
         self.conn = conn
+        self.incremental = load_config.incremental
+        self.partition_visits = load_config.partition_visits
+        self.partition_manager = MonthlyPartitionManager()
+
+    @staticmethod
+    def provision_schema(cursor, partition_visits=False):
+        """
+        Create the 3NF tables and the indexes and constraints used by the merges, if they do not already exist.
+
+        Creates:
+        - unique constraints on facilities.external_id and patients.external_id (the merge keys of both tables),
+        - an index on visits (facility_id, patient_id, visit_timestamp), the merge key of visits,
+        - indexes on the src ids and on src_generated_visits.visit_timestamp (the incremental slice).
+
+        Every statement is idempotent, so the method is safe to run on every load. A unique constraint is
+        not created while the table holds duplicated external_ids; the duplicates are reported as a warning.
+
+        Args:
+            cursor: A psycopg2 cursor object.
+            partition_visits (bool): Create visits as a table partitioned by month on visit_timestamp.
+        """
+        cursor.execute(CREATE_FACILITIES_TABLE_QUERY)
+        cursor.execute(CREATE_PATIENTS_TABLE_QUERY)
+        cursor.execute(CREATE_VISITS_PARTITIONED_TABLE_QUERY if partition_visits else CREATE_VISITS_TABLE_QUERY)
+        cursor.execute(CREATE_NF3_LOAD_STATE_TABLE_QUERY)
+
+        notices = len(cursor.connection.notices)
+        cursor.execute(ADD_FACILITIES_EXTERNAL_ID_UNIQUE_CONSTRAINT_QUERY)
+        cursor.execute(ADD_PATIENTS_EXTERNAL_ID_UNIQUE_CONSTRAINT_QUERY)
+        for notice in cursor.connection.notices[notices:]:
+            logging.warning(notice.split(":", 1)[-1].strip())
+        cursor.execute(CREATE_VISITS_MERGE_KEY_INDEX_QUERY)
+
+        cursor.execute(CREATE_SRC_GENERATED_FACILITIES_ID_INDEX_QUERY)
+        cursor.execute(CREATE_SRC_GENERATED_PATIENTS_ID_INDEX_QUERY)
+        cursor.execute(CREATE_SRC_GENERATED_VISITS_TIMESTAMP_INDEX_QUERY)
+
+    def ensure_visits_partitions(self, cursor):
+        """
+        Create the monthly partitions of visits covering the src visits within date_scope.
+
+        Does nothing when partitioning is disabled, or when the existing visits table is not partitioned.
+
+        Args:
+            cursor: A psycopg2 cursor object.
+        """
+        if not self.partition_visits:
+            return
+        if not self.partition_manager.is_partitioned(cursor, 'visits'):
+            logging.warning("visits already exists and is not partitioned, skipping partitioning")
+            return
+        cursor.execute(SELECT_SRC_VISITS_TIMESTAMP_RANGE_QUERY, {'date_scope': load_config.date_scope})
+        first_visit, last_visit = cursor.fetchone()
+        if first_visit is not None:
+            self.partition_manager.ensure_partitions(cursor, table_name='visits', start=first_visit, end=last_visit)
+
+    @staticmethod
+    def merge_full(cursor):
+        """
+        Merge the full src_generated_* tables into the 3NF tables.
+
+        Args:
+            cursor: A psycopg2 cursor object.
+        """
+        cursor.execute(MERGE_FACILITIES_QUERY)
+        cursor.execute(MERGE_PATIENTS_QUERY)
+        cursor.execute(MERGE_VISITS_QUERY, {'date_scope': load_config.date_scope})
+
+    @staticmethod
+    def merge_incremental(cursor, entity):
+        """
+        Merge the source slice of an entity that is newer than its persisted watermark.
+
+        The slice is bounded by the current high watermark of the source table (and by date_scope
+        for visits), the rows are merged and the next watermark, the number of merged rows and
+        the duration of the run are stored in nf3_load_state. The visits slice starts at the watermark
+        itself (less visits_lookback_days) and the next watermark is held at the first visit whose
+        facility or patient is not loaded yet, see LoadConfig.incremental.
+
+        Args:
+            cursor: A psycopg2 cursor object.
+            entity (str): The entity to merge (a key of INCREMENTAL_ENTITIES).
+
+        Returns:
+            int: The number of rows inserted into the 3NF table.
+        """
+        watermark_column, high_watermark_query, merge_query = INCREMENTAL_ENTITIES[entity]
+        start = time.perf_counter()
+
+        cursor.execute(SELECT_NF3_LOAD_STATE_QUERY, {'entity': entity})
+        state = cursor.fetchone()
+        watermarks = {
+            'last_loaded_id': state[0] if state else None,
+            'last_loaded_timestamp': state[1] if state else None
+        }
+        params = {**watermarks, 'date_scope': load_config.date_scope,
+                  'lookback_days': load_config.visits_lookback_days}
+
+        cursor.execute(high_watermark_query, params)
+        high_watermark, next_watermark, *orphans = cursor.fetchone()
+        if orphans and orphans[0]:
+            logging.warning(f"{orphans[0]} {entity} rows reference rows that are not loaded yet, "
+                            f"they are retried from {next_watermark} on the next load")
+
+        rows_merged = 0
+        if high_watermark is not None:
+            cursor.execute(merge_query, {**params, 'high_watermark': high_watermark})
+            rows_merged = cursor.rowcount
+            watermarks[watermark_column] = next_watermark
+
+        duration = time.perf_counter() - start
+        cursor.execute(UPSERT_NF3_LOAD_STATE_QUERY, {
+            'entity': entity,
+            **watermarks,
+            'rows_merged': rows_merged,
+            'duration_seconds': round(duration, 3)
+        })
+        logging.info(f"Merged {rows_merged} new {entity} rows in {duration:.2f}s "
+                     f"(watermark: {watermarks[watermark_column]})")
+        return rows_merged
 
     def load_data(self):
         """
         Load and transform data into the 3NF database schema.
 
         This method performs the following steps:
-        1. Creates the necessary tables (facilities, patients, visits) if they do not already exist.
-        2. Merges data into the 3NF tables using predefined SQL queries.
-        3. Commits the transaction if all operations succeed.
-        4. Rolls back the transaction and prints the error if any operation fails.
+        1. Creates the necessary tables (facilities, patients, visits, nf3_load_state), indexes and
+           constraints if they do not already exist.
+        2. Analyzes the src tables, so the planner knows about freshly bulk-loaded data.
+           Creates the monthly partitions of visits for new months when partitioning is enabled.
+        3. Merges data into the 3NF tables using predefined SQL queries - the full source tables,
+           or only the slices above the persisted watermarks in incremental mode.
+        4. Analyzes the 3NF tables, so the following transformations are planned on current statistics.
+        5. Commits the transaction if all operations succeed.
+        6. Rolls back the transaction and prints the error if any operation fails.
 
         Raises:
             Exception: If any SQL execution fails, the exception is caught, the transaction is rolled back,
@@ -44,15 +208,18 @@ class NF3Loader:
         """
         cursor = self.conn.cursor()
         try:
-            # Create tables if they do not exist
-            cursor.execute(CREATE_FACILITIES_TABLE_QUERY)
-            cursor.execute(CREATE_PATIENTS_TABLE_QUERY)
-            cursor.execute(CREATE_VISITS_TABLE_QUERY)
+            # Create tables, indexes and constraints if they do not exist
+            self.provision_schema(cursor, partition_visits=self.partition_visits)
+            cursor.execute(ANALYZE_SRC_TABLES_QUERY)
+            self.ensure_visits_partitions(cursor)
 
             # Merge data into 3NF tables
-            cursor.execute(MERGE_FACILITIES_QUERY)
-            cursor.execute(MERGE_PATIENTS_QUERY)
-            cursor.execute(MERGE_VISITS_QUERY, {'date_scope': load_config.date_scope})
+            if self.incremental:
+                for entity in INCREMENTAL_ENTITIES:
+                    self.merge_incremental(cursor, entity)
+            else:
+                self.merge_full(cursor)
+            cursor.execute(ANALYZE_NF3_TABLES_QUERY)
 
             # Commit the transaction
             self.conn.commit()
@@ -0,0 +1,304 @@
+"""
+Compaction of the Parquet datasets exported by LoadParquet.
+
+compact rewrites every partition directory of a dataset in place into as few files as the target file size
+allows, with the configured row group size, compression codec and dictionary encoding. It only merges the files
+within a partition, so a dataset holding one small file per month partition keeps one file per month.
+
+coalesce merges the small files across partitions: it writes a copy of the dataset partitioned by year
+(partition_year, from the monthly partition_date) or not partitioned at all. The former partition columns are
+kept as data columns, so readers can still select and filter on them. The export tree itself is left unchanged,
+since the incremental export and the report generator work on its monthly partition directories.
+File counts and bytes are reported before and after.
+
+Usage (from the repository root, with PYTHONPATH set to it):
+    python -m data_dev.src.data.parquet_compactor /parquet_data/facility_type_avg_time_spent_per_visit_date \
+        --target-file-size-mb 128 --row-group-size 131072 --compression zstd
+    python -m data_dev.src.data.parquet_compactor /parquet_data/facility_type_avg_time_spent_per_visit_date \
+        --coalesce year --output /parquet_data_coalesced
+"""
+
+import argparse
+import logging
+import os
+import shutil
+from uuid import uuid4
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from data_dev.config import parquet_export_config
+from data_dev.src.data.parquet_loader import dataset_write_options
+
+# Temporary directory inside a partition; the leading dot makes Parquet dataset readers skip it
+COMPACTION_DIRECTORY = '.compaction'
+# Coarser partitionings of coalesce: the monthly partition_date ('YYYY-MM') by year, or no partitions
+COALESCE_GRANULARITIES = ('year', 'none')
+
+
+class ParquetCompactor:
+    """
+    A class to compact the partition directories of a Parquet dataset.
+
+    Attributes:
+        target_file_size (int): The target size of a compacted file in bytes; 0 writes one file per partition.
+        row_group_size (int): The maximum number of rows per row group.
+        compression (str): The compression codec of the compacted files.
+        compression_level (Optional[int]): The level of the compression codec.
+        use_dictionary (bool): Whether the columns of the compacted files are dictionary-encoded.
+        min_files (int): Partitions with fewer Parquet files are only rewritten when force is set.
+        force (bool): Rewrite every partition, e.g. to apply a different codec or row group size.
+
+    Methods:
+        - iter_partitions(storage_path): Iterates over the directories of a dataset that hold Parquet files.
+        - compact_partition(directory, files): Rewrites the Parquet files of a partition directory.
+        - compact(storage_path): Compacts every partition of a dataset and reports file counts and bytes.
+        - coalesce(storage_path, output_path, granularity): Writes a copy of a dataset with coarser partitions.
+    """
+
+    def __init__(self, target_file_size=128 * 1024 * 1024, row_group_size=None, compression=None,
+                 compression_level=None, use_dictionary=None, min_files=2, force=False):
+        """
+        Initializes the compactor; the options left as None are taken from parquet_export_config.
+
+        Args:
+            target_file_size (int): The target size of a compacted file in bytes; 0 writes one file per partition.
+            row_group_size (Optional[int]): The maximum number of rows per row group.
+            compression (Optional[str]): The compression codec of the compacted files.
+            compression_level (Optional[int]): The level of the compression codec.
+            use_dictionary (Optional[bool]): Whether the columns of the compacted files are dictionary-encoded.
+            min_files (int): Partitions with fewer Parquet files are only rewritten when force is set.
+            force (bool): Rewrite every partition.
+        """
+        self.target_file_size = target_file_size
+        self.row_group_size = row_group_size or parquet_export_config.row_group_size
+        self.compression = compression or parquet_export_config.compression
+        self.compression_level = (parquet_export_config.compression_level
+                                  if compression_level is None else compression_level)
+        self.use_dictionary = parquet_export_config.use_dictionary if use_dictionary is None else use_dictionary
+        self.min_files = min_files
+        self.force = force
+
+    @staticmethod
+    def iter_partitions(storage_path):
+        """
+        Iterates over the directories of a dataset that hold Parquet files.
+
+        Args:
+            storage_path (str): The root directory of the dataset.
+
+        Yields:
+            Tuple[str, List[str]]: A directory and the paths of its Parquet files.
+        """
+        for directory, subdirectories, files in os.walk(storage_path):
+            # Skip hidden and underscore directories, like Parquet dataset readers do
+            subdirectories[:] = sorted(d for d in subdirectories if not d.startswith(('.', '_')))
+            parquet_files = sorted(os.path.join(directory, f) for f in files
+                                   if f.endswith('.parquet') and not f.startswith(('.', '_')))
+            if parquet_files:
+                yield directory, parquet_files
+
+    def compact_partition(self, directory, files):
+        """
+        Rewrites the Parquet files of a partition directory into files of about target_file_size bytes.
+
+        The new files are written to a temporary directory and moved in before the old files are deleted,
+        so readers never see a partition without data.
+
+        Args:
+            directory (str): The partition directory.
+            files (List[str]): The Parquet files of the partition.
+
+        Returns:
+            List[str]: The paths of the compacted files.
+        """
+        dataset = ds.dataset(files, format='parquet')
+        max_rows_per_file = self.max_rows_per_file(dataset.count_rows(), sum(os.path.getsize(f) for f in files))
+
+        temporary_directory = os.path.join(directory, COMPACTION_DIRECTORY)
+        shutil.rmtree(temporary_directory, ignore_errors=True)
+        ds.write_dataset(
+            dataset,
+            temporary_directory,
+            format='parquet',
+            basename_template=f'{uuid4().hex}-{{i}}.parquet',
+            **dataset_write_options(
+                compression=self.compression,
+                compression_level=self.compression_level,
+                use_dictionary=self.use_dictionary,
+                row_group_size=self.row_group_size,
+                max_rows_per_file=max_rows_per_file
+            )
+        )
+
+        compacted_files = []
+        for name in sorted(os.listdir(temporary_directory)):
+            compacted_file = os.path.join(directory, name)
+            os.replace(os.path.join(temporary_directory, name), compacted_file)
+            compacted_files.append(compacted_file)
+        for file in files:
+            os.remove(file)
+        os.rmdir(temporary_directory)
+        return compacted_files
+
+    def compact(self, storage_path):
+        """
+        Compacts every partition of a dataset and reports file counts and bytes before and after.
+
+        Args:
+            storage_path (str): The root directory of the dataset.
+
+        Returns:
+            dict: Numbers of partitions, compacted partitions, files and bytes before and after the compaction.
+        """
+        stats = {'partitions': 0, 'compacted_partitions': 0,
+                 'files_before': 0, 'bytes_before': 0, 'files_after': 0, 'bytes_after': 0}
+        for directory, files in self.iter_partitions(storage_path):
+            stats['partitions'] += 1
+            stats['files_before'] += len(files)
+            stats['bytes_before'] += sum(os.path.getsize(f) for f in files)
+            if self.force or len(files) >= self.min_files:
+                files = self.compact_partition(directory, files)
+                stats['compacted_partitions'] += 1
+            stats['files_after'] += len(files)
+            stats['bytes_after'] += sum(os.path.getsize(f) for f in files)
+
+        logging.info(f"Compacted {stats['compacted_partitions']} of {stats['partitions']} partition(s) of "
+                     f"{storage_path}: {stats['files_before']} -> {stats['files_after']} file(s), "
+                     f"{stats['bytes_before']} -> {stats['bytes_after']} bytes")
+        return stats
+
+    def max_rows_per_file(self, rows, size):
+        """
+        Returns the number of rows of a file of about target_file_size bytes, 0 when all rows fit in one file.
+
+        Args:
+            rows (int): The number of rows written.
+            size (int): The size of the rows in bytes, in the current files.
+
+        Returns:
+            int: The maximum number of rows per file.
+        """
+        if not self.target_file_size or not rows:
+            return 0
+        max_rows_per_file = max(1, int(self.target_file_size / (size / rows)))
+        return 0 if max_rows_per_file >= rows else max_rows_per_file
+
+    def coalesce(self, storage_path, output_path, granularity='year'):
+        """
+        Writes a copy of a dataset with coarser partitions, merging the small files of its partitions.
+
+        With granularity 'year' the monthly partition_date partitions become partition_year partitions,
+        with 'none' the copy is not partitioned. The partition columns of the dataset are kept as data
+        columns of the copy. The copy is written to a temporary directory next to output_path and
+        replaces output_path when it is complete.
+
+        Args:
+            storage_path (str): The root directory of the dataset.
+            output_path (str): The root directory of the copy.
+            granularity (str): One of COALESCE_GRANULARITIES.
+
+        Returns:
+            dict: Numbers of partitions, files and bytes before and after.
+
+        Raises:
+            ValueError: If the granularity is unknown, or 'year' is used on a dataset without partition_date.
+        """
+        if granularity not in COALESCE_GRANULARITIES:
+            raise ValueError(f"Unknown granularity {granularity!r}, expected one of {COALESCE_GRANULARITIES}")
+        files = [f for _, partition_files in self.iter_partitions(storage_path) for f in partition_files]
+        # Partition values as plain strings, so they are written as string columns
+        discovered = ds.dataset(files, format='parquet', partitioning='hive', partition_base_dir=storage_path)
+        partition_columns = discovered.partitioning.schema.names if discovered.partitioning else []
+        partitioning = ds.partitioning(pa.schema([(name, pa.string()) for name in partition_columns]), flavor='hive')
+        dataset = ds.dataset(files, format='parquet', partitioning=partitioning, partition_base_dir=storage_path)
+
+        columns = {name: pc.field(name) for name in dataset.schema.names}
+        output_partitioning = None
+        if granularity == 'year':
+            if 'partition_date' not in partition_columns:
+                raise ValueError(f"{storage_path} is not partitioned by partition_date")
+            columns['partition_year'] = pc.utf8_slice_codeunits(pc.field('partition_date'), 0, 4)
+            output_partitioning = ds.partitioning(pa.schema([('partition_year', pa.string())]), flavor='hive')
+        scanner = dataset.scanner(columns=columns)
+
+        bytes_before = sum(os.path.getsize(f) for f in files)
+        temporary_path = f"{output_path.rstrip(os.sep)}.{uuid4().hex}.tmp"
+        ds.write_dataset(
+            scanner,
+            temporary_path,
+            format='parquet',
+            partitioning=output_partitioning,
+            basename_template=f'{uuid4().hex}-{{i}}.parquet',
+            **dataset_write_options(
+                compression=self.compression,
+                compression_level=self.compression_level,
+                use_dictionary=self.use_dictionary,
+                row_group_size=self.row_group_size,
+                max_rows_per_file=self.max_rows_per_file(dataset.count_rows(), bytes_before)
+            )
+        )
+        shutil.rmtree(output_path, ignore_errors=True)
+        os.replace(temporary_path, output_path)
+
+        coalesced_partitions = list(self.iter_partitions(output_path))
+        coalesced_files = [f for _, partition_files in coalesced_partitions for f in partition_files]
+        stats = {'partitions': len({os.path.dirname(f) for f in files}),
+                 'compacted_partitions': len(coalesced_partitions),
+                 'files_before': len(files), 'bytes_before': bytes_before,
+                 'files_after': len(coalesced_files), 'bytes_after': sum(os.path.getsize(f) for f in coalesced_files)}
+        logging.info(f"Coalesced {stats['partitions']} partition(s) of {storage_path} into "
+                     f"{stats['compacted_partitions']} partition(s) of {output_path} by {granularity}: "
+                     f"{stats['files_before']} -> {stats['files_after']} file(s), "
+                     f"{stats['bytes_before']} -> {stats['bytes_after']} bytes")
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact the partitions of Parquet datasets exported by LoadParquet.")
+    parser.add_argument('storage_paths', nargs='+', help="Root directories of the datasets")
+    parser.add_argument('--target-file-size-mb', type=float, default=128,
+                        help="Target size of a compacted file; 0 writes one file per partition")
+    parser.add_argument('--row-group-size', type=int, default=None, help="Maximum number of rows per row group")
+    parser.add_argument('--compression', default=None,
+                        choices=['snappy', 'zstd', 'gzip', 'brotli', 'lz4', 'none'], help="Compression codec")
+    parser.add_argument('--compression-level', type=int, default=None, help="Level of the compression codec")
+    parser.add_argument('--no-dictionary', action='store_true', help="Disable dictionary encoding")
+    parser.add_argument('--min-files', type=int, default=2,
+                        help="Only compact partitions with at least this number of files")
+    parser.add_argument('--force', action='store_true',
+                        help="Rewrite every partition, e.g. to apply a different codec or row group size")
+    parser.add_argument('--coalesce', choices=COALESCE_GRANULARITIES, default=None,
+                        help="Merge the files across partitions into a copy partitioned by year, or not partitioned")
+    parser.add_argument('--output', default=None,
+                        help="Folder of the coalesced copies, one subfolder per dataset (required with --coalesce)")
+    args = parser.parse_args()
+    if args.coalesce and not args.output:
+        parser.error("--coalesce requires --output")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    compactor = ParquetCompactor(
+        target_file_size=int(args.target_file_size_mb * 1024 * 1024),
+        row_group_size=args.row_group_size,
+        compression=args.compression,
+        compression_level=args.compression_level,
+        use_dictionary=False if args.no_dictionary else None,
+        min_files=args.min_files,
+        force=args.force
+    )
+
+    print(f"{'dataset':<60} | {'partitions':>10} | {'files before':>12} | {'files after':>11} | "
+          f"{'bytes before':>12} | {'bytes after':>11}")
+    for storage_path in args.storage_paths:
+        if args.coalesce:
+            output_path = os.path.join(args.output, os.path.basename(os.path.normpath(storage_path)))
+            stats = compactor.coalesce(storage_path, output_path, granularity=args.coalesce)
+        else:
+            stats = compactor.compact(storage_path)
+        print(f"{storage_path:<60} | {stats['partitions']:>10} | {stats['files_before']:>12} | "
+              f"{stats['files_after']:>11} | {stats['bytes_before']:>12} | {stats['bytes_after']:>11}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,100 @@
+import json
+import logging
 import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional
+from uuid import uuid4
+
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
 
 from data_dev.queries import (
     TRANSFORM_PATIENT_SUM_TREATMENT_COST_PER_FACILITY_TYPE_SQL,
     TRANSFORM_FACILITY_NAME_MIN_TIME_SPENT_PER_VISIT_DATE_SQL,
-    TRANSFORM_FACILITY_TYPE_AVG_TIME_SPENT_PER_VISIT_DATE_SQL
+    TRANSFORM_FACILITY_TYPE_AVG_TIME_SPENT_PER_VISIT_DATE_SQL,
+    SELECT_PARTITION_CHECKSUMS_QUERY,
+    SELECT_PARTITIONS_QUERY
 )
-from data_dev.config import parquet_storage_config
+from data_dev.config import parquet_storage_config, parquet_export_config
+from data_dev.src.connectors.postgre_connector import PostgresConnectorContextManager
+
+
+# Manifest of the incremental export, stored in the root of every dataset.
+# The leading underscore makes Parquet dataset readers skip the file.
+EXPORT_MANIFEST_FILE = '_export_manifest.json'
+# Rows buffered per open partition before a row group is written
+MIN_ROWS_PER_GROUP = 64 * 1024
+
+
+def dataset_write_options(compression, compression_level, use_dictionary, row_group_size, max_rows_per_file):
+    """
+    Builds the file layout and encoding arguments of pyarrow.dataset.write_dataset for Parquet.
+
+    Parameters:
+    -----------
+    compression : str
+        Compression codec.
+    compression_level : int or None
+        Level of the compression codec; None uses the codec default.
+    use_dictionary : bool
+        Whether the columns are dictionary-encoded.
+    row_group_size : int
+        Maximum number of rows per row group.
+    max_rows_per_file : int
+        Maximum number of rows per file; 0 means no limit.
+
+    Returns:
+    --------
+    dict
+        Keyword arguments of pyarrow.dataset.write_dataset.
+    """
+    row_group_size = min(row_group_size, max_rows_per_file) if max_rows_per_file else row_group_size
+    return {
+        'file_options': ds.ParquetFileFormat().make_write_options(
+            compression=compression,
+            compression_level=compression_level,
+            use_dictionary=use_dictionary
+        ),
+        'max_rows_per_group': row_group_size,
+        # Buffer small chunks into larger row groups, but only up to a small bound per open partition,
+        # so the memory held by the writer stays independent of the row group size
+        'min_rows_per_group': min(row_group_size, MIN_ROWS_PER_GROUP),
+        'max_rows_per_file': max_rows_per_file
+    }
+
+
+@dataclass
+class ParquetTransform:
+    """
+    A transformation exported by LoadParquet: an SQL extract written to a partitioned Parquet dataset.
+
+    Attributes:
+    -----------
+    name : str
+        Unique name of the transformation, used in logs and failure reports.
+    query : str
+        SQL query extracting the data.
+    prepare : Callable[[DataFrame], DataFrame]
+        Function adding the derived and partition columns to a chunk of the extract.
+    storage_path : str
+        Path to store the Parquet dataset.
+    partition_columns : List[str]
+        Columns to partition the Parquet dataset by.
+    partition_expression : str, optional
+        SQL expression over the query columns that yields the value of the (single) partition column.
+        Required for the incremental export; transformations without it are always fully rewritten.
+    """
+    name: str
+    query: str
+    prepare: Callable
+    storage_path: str
+    partition_columns: List[str]
+    partition_expression: Optional[str] = None
 
 
 class LoadParquet:
@@ -23,31 +111,70 @@ class LoadParquet:
         Path to store the Parquet file for patient sum treatment cost per facility type.
     storage_path_facility_name_min_time_spent_per_visit_date : str
         Path to store the Parquet file for facility name minimum time spent per visit date.
+    chunk_size : int
+        Number of rows streamed from the database and written to Parquet at a time.
+    parallel : bool
+        Whether the transformations run concurrently, each on its own connection.
+    workers : int
+        Number of transformations running at once in parallel mode.
+    pool : PostgresConnectionPool or None
+        Pool the connections of parallel transformations are checked out from; new connections are opened without it.
+    incremental : bool
+        Whether only the partitions whose checksum changed since the last export are rewritten.
+    transforms : dict
+        Registered ParquetTransform objects by name, in registration order.
 
     Methods:
     --------
     read_data(query):
         Executes the given SQL query and returns the result as a DataFrame.
+    read_data_chunks(query):
+        Executes the given SQL query and streams the result as Arrow record batches.
     to_parquet(df, storage_path, partition_columns):
         Writes the given DataFrame to a Parquet file at the specified storage path, partitioned by the given columns.
+    to_parquet_chunks(batches, prepare, storage_path, partition_columns):
+        Prepares streamed record batches chunk by chunk and writes them to a partitioned Parquet dataset.
+    prepare_facility_type_avg_time_spent_per_visit_date(df):
+        Adds the derived columns of facility type average time spent per visit date to a chunk.
+    prepare_patient_sum_treatment_cost_per_facility_type(df):
+        Adds the derived columns of patient sum treatment cost per facility type to a chunk.
+    prepare_facility_name_min_time_spent_per_visit_date(df):
+        Adds the derived columns of facility name minimum time spent per visit date to a chunk.
     transform_facility_type_avg_time_spent_per_visit_date():
         Transforms data for facility type average time spent per visit date and writes it to a Parquet file.
     transform_patient_sum_treatment_cost_per_facility_type():
         Transforms data for patient sum treatment cost per facility type and writes it to a Parquet file.
     transform_facility_name_min_time_spent_per_visit_date():
         Transforms data for facility name minimum time spent per visit date and writes it to a Parquet file.
+    register_transform(transform):
+        Registers a transformation executed by load_parquet.
+    read_partition_checksums(transform, connection_object):
+        Computes the row count and checksum of every partition of a transformation in the database.
+    read_manifest(storage_path):
+        Reads the export manifest of a dataset.
+    write_manifest(storage_path, transform, partitions):
+        Writes the export manifest of a dataset.
+    export_changed_partitions(transform, connection_object):
+        Rewrites only the partitions of a transformation that changed since the last export.
+    run_transform(transform, connection_object):
+        Executes a single transformation on the given connection object and returns its duration.
+    run_transform_on_own_connection(transform):
+        Executes a single transformation on a connection of its own.
     load_parquet():
-        Executes all transformations and loads the results into Parquet files.
+        Executes all registered transformations and loads the results into Parquet files.
     """
 
-    def __init__(self, connection_object):
+    def __init__(self, connection_object, pool=None):
         """
-        Initializes the LoadParquet class with a database connection object and storage paths.
+        Initializes the LoadParquet class with a database connection object and storage paths,
+        and registers the built-in transformations.
 
         Parameters:
         -----------
         connection_object : object
             Database connection object used to execute SQL queries.
+        pool : PostgresConnectionPool, optional
+            Pool the connections of parallel transformations are checked out from.
         """
         self.connection_object = connection_object
         self.storage_path_facility_type_avg_time_spent_per_visit_date = (
@@ -59,6 +186,37 @@ class LoadParquet:
         self.storage_path_facility_name_min_time_spent_per_visit_date = (
             parquet_storage_config.storage_path_facility_name_min_time_spent_per_visit_date
         )
+        self.chunk_size = parquet_export_config.chunk_size
+        self.parallel = parquet_export_config.parallel
+        self.workers = parquet_export_config.workers
+        self.incremental = parquet_export_config.incremental
+        self.pool = pool
+
+        self.transforms = {}
+        self.register_transform(ParquetTransform(
+            name='facility_type_avg_time_spent_per_visit_date',
+            query=TRANSFORM_FACILITY_TYPE_AVG_TIME_SPENT_PER_VISIT_DATE_SQL,
+            prepare=self.prepare_facility_type_avg_time_spent_per_visit_date,
+            storage_path=self.storage_path_facility_type_avg_time_spent_per_visit_date,
+            partition_columns=['partition_date'],
+            partition_expression="TO_CHAR(visit_date, 'YYYY-MM')"
+        ))
+        self.register_transform(ParquetTransform(
+            name='patient_sum_treatment_cost_per_facility_type',
+            query=TRANSFORM_PATIENT_SUM_TREATMENT_COST_PER_FACILITY_TYPE_SQL,
+            prepare=self.prepare_patient_sum_treatment_cost_per_facility_type,
+            storage_path=self.storage_path_patient_sum_treatment_cost_per_facility_type,
+            partition_columns=['facility_type_partition'],
+            partition_expression="REPLACE(facility_type, ' ', '_')"
+        ))
+        self.register_transform(ParquetTransform(
+            name='facility_name_min_time_spent_per_visit_date',
+            query=TRANSFORM_FACILITY_NAME_MIN_TIME_SPENT_PER_VISIT_DATE_SQL,
+            prepare=self.prepare_facility_name_min_time_spent_per_visit_date,
+            storage_path=self.storage_path_facility_name_min_time_spent_per_visit_date,
+            partition_columns=['partition_date'],
+            partition_expression="TO_CHAR(visit_date, 'YYYY-MM')"
+        ))
 
     def read_data(self, query):
         """
@@ -97,52 +255,400 @@ class LoadParquet:
             engine='pyarrow',
             partition_cols=partition_columns,
             index=False,
-            existing_data_behavior='delete_matching'
+            existing_data_behavior='delete_matching',
+            compression=parquet_export_config.compression,
+            compression_level=parquet_export_config.compression_level,
+            use_dictionary=parquet_export_config.use_dictionary,
+            row_group_size=parquet_export_config.row_group_size
         )
 
-    def transform_facility_type_avg_time_spent_per_visit_date(self):
+    def read_data_chunks(self, query, connection_object=None):
         """
-        Transforms data for facility type average time spent per visit date and writes it to a Parquet file.
+        Executes the given SQL query and streams the result as Arrow record batches of chunk_size rows.
+
+        Parameters:
+        -----------
+        query : str
+            SQL query to execute.
+        connection_object : object, optional
+            Database connection object to use instead of the one of the instance.
+
+        Returns:
+        --------
+        Iterator[pa.RecordBatch]
+            Chunks of the resulting data, typed by the column types of the query.
+        """
+        connection_object = connection_object or self.connection_object
+        return connection_object.iter_data_sql(query=query, itersize=self.chunk_size, as_arrow=True)
+
+    @staticmethod
+    def to_parquet_chunks(batches, prepare, storage_path, partition_columns):
+        """
+        Prepares streamed record batches chunk by chunk and writes them to a partitioned Parquet dataset.
+
+        The schema of the dataset is taken from the first prepared chunk, which may be empty. Source columns
+        whose type depends on the nulls of that chunk (entirely null columns, integers turned into floats
+        by pandas) take their type from the source batch, typed by the cursor description of the query.
+        Derived columns without values in that chunk, e.g. the partition columns of an empty chunk,
+        are strings. So every later chunk fits the schema.
+        Only one chunk is held in memory at a time. Compression, dictionary encoding, row group and file sizes
+        follow parquet_export_config.
+
+        Parameters:
+        -----------
+        batches : Iterator[pa.RecordBatch]
+            Source data chunks; at least one (possibly empty) chunk is expected.
+        prepare : Callable[[DataFrame], DataFrame]
+            Function adding the derived and partition columns to a chunk.
+        storage_path : str
+            Path to store the Parquet dataset.
+        partition_columns : list
+            Columns to partition the Parquet dataset by.
+        """
+        batches = iter(batches)
+        first_batch = next(batches)
+        first_chunk = pa.RecordBatch.from_pandas(prepare(first_batch.to_pandas()), preserve_index=False)
+        fields = []
+        for field in first_chunk.schema:
+            source_type = (first_batch.schema.field(field.name).type
+                           if field.name in first_batch.schema.names else None)
+            if source_type is not None and (
+                    pa.types.is_null(field.type)
+                    or (pa.types.is_floating(field.type) and pa.types.is_integer(source_type))):
+                field = field.with_type(source_type)
+            elif pa.types.is_null(field.type):
+                field = field.with_type(pa.string())
+            fields.append(field)
+        schema = pa.schema(fields, metadata=first_chunk.schema.metadata)
+
+        def prepared_chunks():
+            yield first_chunk.cast(schema)
+            for batch in batches:
+                yield pa.RecordBatch.from_pandas(prepare(batch.to_pandas()), preserve_index=False).cast(schema)
+
+        os.makedirs(storage_path, exist_ok=True)
+        ds.write_dataset(
+            prepared_chunks(),
+            storage_path,
+            schema=schema,
+            format='parquet',
+            partitioning=ds.partitioning(schema.empty_table().select(partition_columns).schema, flavor='hive'),
+            basename_template=f'{uuid4().hex}-{{i}}.parquet',
+            existing_data_behavior='delete_matching',
+            **dataset_write_options(
+                compression=parquet_export_config.compression,
+                compression_level=parquet_export_config.compression_level,
+                use_dictionary=parquet_export_config.use_dictionary,
+                row_group_size=parquet_export_config.row_group_size,
+                max_rows_per_file=parquet_export_config.max_rows_per_file
+            )
+        )
+
+    @staticmethod
+    def prepare_facility_type_avg_time_spent_per_visit_date(df):
+        """
+        Adds the derived columns of facility type average time spent per visit date to a chunk.
+
+        Parameters:
+        -----------
+        df : DataFrame
+            Chunk of the transformation query result.
+
+        Returns:
+        --------
+        DataFrame
+            The chunk with visit_date as datetime and the partition_date column.
         """
-        df = self.read_data(TRANSFORM_FACILITY_TYPE_AVG_TIME_SPENT_PER_VISIT_DATE_SQL)
         df['visit_date'] = pd.to_datetime(df['visit_date'])
         df['partition_date'] = df['visit_date'].dt.to_period('M').astype(str)
-        self.to_parquet(
-            df=df,
-            storage_path=self.storage_path_facility_type_avg_time_spent_per_visit_date,
-            partition_columns=['partition_date']
-        )
+        return df
 
     # TODO: do better approach for: df['facility_type_partition'] = df['facility_type'] - workaround,
-    def transform_patient_sum_treatment_cost_per_facility_type(self):
+    @staticmethod
+    def prepare_patient_sum_treatment_cost_per_facility_type(df):
         """
-        Transforms data for patient sum treatment cost per facility type and writes it to a Parquet file.
+        Adds the derived columns of patient sum treatment cost per facility type to a chunk.
+
+        Parameters:
+        -----------
+        df : DataFrame
+            Chunk of the transformation query result.
+
+        Returns:
+        --------
+        DataFrame
+            The chunk with the facility_type_partition column.
         """
-        df = self.read_data(TRANSFORM_PATIENT_SUM_TREATMENT_COST_PER_FACILITY_TYPE_SQL)
         df['facility_type_partition'] = df['facility_type'].str.replace(" ", "_")
-        self.to_parquet(
-            df=df,
-            storage_path=self.storage_path_patient_sum_treatment_cost_per_facility_type,
-            partition_columns=['facility_type_partition']
-        )
+        return df
 
-    def transform_facility_name_min_time_spent_per_visit_date(self):
+    @staticmethod
+    def prepare_facility_name_min_time_spent_per_visit_date(df):
         """
-        Transforms data for facility name minimum time spent per visit date and writes it to a Parquet file.
+        Adds the derived columns of facility name minimum time spent per visit date to a chunk.
+
+        Parameters:
+        -----------
+        df : DataFrame
+            Chunk of the transformation query result.
+
+        Returns:
+        --------
+        DataFrame
+            The chunk with visit_date as datetime and the partition_date column.
         """
-        df = self.read_data(TRANSFORM_FACILITY_NAME_MIN_TIME_SPENT_PER_VISIT_DATE_SQL)
         df['visit_date'] = pd.to_datetime(df['visit_date'])
         df['partition_date'] = df['visit_date'].dt.to_period('M').astype(str)
-        self.to_parquet(
-            df=df,
-            storage_path=self.storage_path_facility_name_min_time_spent_per_visit_date,
-            partition_columns=['partition_date']
+        return df
+
+    def register_transform(self, transform):
+        """
+        Registers a transformation executed by load_parquet.
+
+        Parameters:
+        -----------
+        transform : ParquetTransform
+            The transformation; a registered transformation with the same name is replaced.
+        """
+        self.transforms[transform.name] = transform
+
+    @staticmethod
+    def read_partition_checksums(transform, connection_object):
+        """
+        Computes the row count and checksum of every partition of a transformation in the database.
+
+        The checksum is the MD5 of the sorted MD5s of the rows of the partition, so it only depends on the content.
+
+        Parameters:
+        -----------
+        transform : ParquetTransform
+            The transformation, with a partition_expression.
+        connection_object : object
+            Database connection object used to execute the query.
+
+        Returns:
+        --------
+        dict
+            {partition value: {'rows': int, 'checksum': str}}
+        """
+        query = SELECT_PARTITION_CHECKSUMS_QUERY.format(
+            partition_expression=transform.partition_expression,
+            query=transform.query.strip().rstrip(';')
         )
+        df = connection_object.get_data_sql_copy(query)
+        return {
+            str(row.partition_value): {'rows': int(row.row_count), 'checksum': row.checksum}
+            for row in df.itertuples(index=False)
+        }
+
+    @staticmethod
+    def read_manifest(storage_path):
+        """
+        Reads the export manifest of a dataset.
+
+        Parameters:
+        -----------
+        storage_path : str
+            Path of the Parquet dataset.
+
+        Returns:
+        --------
+        dict
+            The manifest, or an empty dict if the dataset has none.
+        """
+        manifest_path = os.path.join(storage_path, EXPORT_MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return {}
+        with open(manifest_path) as manifest_file:
+            return json.load(manifest_file)
+
+    @staticmethod
+    def write_manifest(storage_path, transform, partitions):
+        """
+        Writes the export manifest of a dataset.
+
+        Parameters:
+        -----------
+        storage_path : str
+            Path of the Parquet dataset.
+        transform : ParquetTransform
+            The exported transformation.
+        partitions : dict
+            Row count and checksum of every exported partition, as returned by read_partition_checksums.
+        """
+        manifest = {
+            'transform': transform.name,
+            'partition_column': transform.partition_columns[0],
+            'exported_at': datetime.now().isoformat(timespec='seconds'),
+            'partitions': partitions
+        }
+        manifest_path = os.path.join(storage_path, EXPORT_MANIFEST_FILE)
+        with open(f'{manifest_path}.tmp', 'w') as manifest_file:
+            json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+        os.replace(f'{manifest_path}.tmp', manifest_path)
+
+    def export_changed_partitions(self, transform, connection_object):
+        """
+        Rewrites only the partitions of a transformation that changed since the last export.
+
+        The row count and checksum of every partition are computed in the database and compared with
+        the manifest of the last export. New and changed partitions, and partitions whose directory is
+        missing, are re-extracted and rewritten; partitions that no longer exist are deleted. The manifest
+        is updated after the data is written, so an interrupted export is redone by the next run.
+
+        Parameters:
+        -----------
+        transform : ParquetTransform
+            The transformation, with a partition_expression.
+        connection_object : object
+            Database connection object used to execute the queries.
+        """
+        partition_column = transform.partition_columns[0]
+        exported = self.read_manifest(transform.storage_path).get('partitions', {})
+        current = self.read_partition_checksums(transform, connection_object)
+
+        changed = sorted(
+            value for value, partition in current.items()
+            if exported.get(value) != partition
+            or not os.path.isdir(os.path.join(transform.storage_path, f'{partition_column}={value}'))
+        )
+        removed = sorted(set(exported) - set(current))
+
+        if changed:
+            query = SELECT_PARTITIONS_QUERY.format(
+                partition_expression=transform.partition_expression,
+                query=transform.query.strip().rstrip(';').replace('%', '%%')
+            )
+            self.to_parquet_chunks(
+                batches=connection_object.iter_data_sql(query=query, itersize=self.chunk_size, as_arrow=True,
+                                                        params={'partition_values': changed}),
+                prepare=transform.prepare,
+                storage_path=transform.storage_path,
+                partition_columns=transform.partition_columns
+            )
+        for value in removed:
+            shutil.rmtree(os.path.join(transform.storage_path, f'{partition_column}={value}'), ignore_errors=True)
+
+        os.makedirs(transform.storage_path, exist_ok=True)
+        self.write_manifest(transform.storage_path, transform, current)
+        logging.info(f"Transformation {transform.name}: rewrote {len(changed)} of {len(current)} partition(s), "
+                     f"removed {len(removed)}")
+
+    def run_transform(self, transform, connection_object):
+        """
+        Executes a single transformation on the given connection object.
+
+        In incremental mode only the changed partitions of transformations with a partition_expression are
+        rewritten, otherwise the whole dataset is.
+
+        Parameters:
+        -----------
+        transform : ParquetTransform
+            The transformation to execute.
+        connection_object : object
+            Database connection object used to execute the query.
+
+        Returns:
+        --------
+        float
+            Wall-clock duration of the transformation in seconds.
+        """
+        start = time.perf_counter()
+        if self.incremental and transform.partition_expression:
+            self.export_changed_partitions(transform, connection_object)
+        else:
+            self.to_parquet_chunks(
+                batches=self.read_data_chunks(transform.query, connection_object=connection_object),
+                prepare=transform.prepare,
+                storage_path=transform.storage_path,
+                partition_columns=transform.partition_columns
+            )
+            # A full export does not maintain the manifest, so the next incremental export starts from scratch
+            manifest_path = os.path.join(transform.storage_path, EXPORT_MANIFEST_FILE)
+            if os.path.exists(manifest_path):
+                os.remove(manifest_path)
+        duration = time.perf_counter() - start
+        logging.info(f"Transformation {transform.name} completed in {duration:.2f}s")
+        return duration
+
+    def run_transform_on_own_connection(self, transform):
+        """
+        Executes a single transformation on a connection of its own, checked out of the pool if there is one.
+
+        Parameters:
+        -----------
+        transform : ParquetTransform
+            The transformation to execute.
+
+        Returns:
+        --------
+        float
+            Wall-clock duration of the transformation in seconds.
+        """
+        with PostgresConnectorContextManager(pool=self.pool) as connection_object:
+            return self.run_transform(transform, connection_object)
+
+    def transform_facility_type_avg_time_spent_per_visit_date(self):
+        """
+        Transforms data for facility type average time spent per visit date and writes it to a Parquet file.
+        """
+        self.run_transform(self.transforms['facility_type_avg_time_spent_per_visit_date'], self.connection_object)
+
+    def transform_patient_sum_treatment_cost_per_facility_type(self):
+        """
+        Transforms data for patient sum treatment cost per facility type and writes it to a Parquet file.
+        """
+        self.run_transform(self.transforms['patient_sum_treatment_cost_per_facility_type'], self.connection_object)
+
+    def transform_facility_name_min_time_spent_per_visit_date(self):
+        """
+        Transforms data for facility name minimum time spent per visit date and writes it to a Parquet file.
+        """
+        self.run_transform(self.transforms['facility_name_min_time_spent_per_visit_date'], self.connection_object)
 
     def load_parquet(self):
         """
-        Executes all transformations and loads the results into Parquet files.
+        Executes all registered transformations and loads the results into Parquet files.
+
+        Sequentially, every transformation runs on the connection of the instance. In parallel mode the
+        transformations run on a thread pool of `workers` threads, each on its own connection, so the
+        export takes about as long as its slowest transformation. In both modes a failing transformation
+        does not stop the others; failures are collected and raised together at the end.
+
+        Returns:
+        --------
+        dict
+            Wall-clock duration in seconds of every successful transformation, by name.
+
+        Raises:
+        -------
+        RuntimeError
+            If any transformation failed, listing the failed transformations and their errors.
         """
-        self.transform_facility_type_avg_time_spent_per_visit_date()
-        self.transform_patient_sum_treatment_cost_per_facility_type()
-        self.transform_facility_name_min_time_spent_per_visit_date()
+        start = time.perf_counter()
+        durations, failures = {}, {}
+        if self.parallel:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='parquet_transform') as executor:
+                futures = {name: executor.submit(self.run_transform_on_own_connection, transform)
+                           for name, transform in self.transforms.items()}
+                for name, future in futures.items():
+                    try:
+                        durations[name] = future.result()
+                    except Exception as e:
+                        failures[name] = e
+        else:
+            for name, transform in self.transforms.items():
+                try:
+                    durations[name] = self.run_transform(transform, self.connection_object)
+                except Exception as e:
+                    failures[name] = e
+                    # Clear the aborted transaction, so the remaining transformations can use the connection
+                    self.connection_object.get_connection().rollback()
+
+        logging.info(f"{len(durations)} of {len(self.transforms)} transformations completed "
+                     f"in {time.perf_counter() - start:.2f}s ({'parallel' if self.parallel else 'sequential'})")
+        if failures:
+            for name, error in failures.items():
+                logging.error(f"Transformation {name} failed: {error}")
+            raise RuntimeError(f"Failed transformations: {', '.join(failures)}")
+        return durations
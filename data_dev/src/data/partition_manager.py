@@ -0,0 +1,116 @@
+import logging
+from datetime import date, datetime
+
+from psycopg2 import sql
+
+from data_dev.queries import (IS_TABLE_PARTITIONED_QUERY,
+                              SELECT_TABLE_PARTITIONS_QUERY,
+                              CREATE_MONTHLY_PARTITION_QUERY)
+
+
+class MonthlyPartitionManager:
+    """
+    A class to maintain monthly range partitions of tables partitioned by a timestamp column.
+
+    Partitions are named <table>_pYYYY_MM and cover [first day of the month, first day of the next month).
+
+    Methods:
+        - is_partitioned(cursor, table_name): Checks if a table is a partitioned table.
+        - partition_name(table_name, month_start): Returns the name of the partition of a month.
+        - next_month(month_start): Returns the first day of the following month.
+        - iter_months(start, end): Iterates over the first days of the months between two dates.
+        - ensure_partitions(cursor, table_name, start, end): Creates the missing partitions of a date range.
+    """
+
+    @staticmethod
+    def is_partitioned(cursor, table_name):
+        """
+        Checks if a table is a partitioned table.
+
+        Args:
+            cursor (object): A database cursor object.
+            table_name (str): The name of the table.
+
+        Returns:
+            bool: True if the table exists and is partitioned, False otherwise.
+        """
+        cursor.execute(IS_TABLE_PARTITIONED_QUERY, {'table_name': table_name})
+        return cursor.fetchone()[0]
+
+    @staticmethod
+    def partition_name(table_name, month_start):
+        """
+        Returns the name of the partition of a month.
+
+        Args:
+            table_name (str): The name of the partitioned table.
+            month_start (date): The first day of the month.
+
+        Returns:
+            str: The partition name, e.g. visits_p2025_01.
+        """
+        return f"{table_name}_p{month_start:%Y_%m}"
+
+    @staticmethod
+    def next_month(month_start):
+        """
+        Returns the first day of the following month.
+
+        Args:
+            month_start (date): The first day of a month.
+
+        Returns:
+            date: The first day of the following month.
+        """
+        return date(month_start.year + month_start.month // 12, month_start.month % 12 + 1, 1)
+
+    def iter_months(self, start, end):
+        """
+        Iterates over the first days of the months between two dates.
+
+        Args:
+            start (date or datetime): The first date of the range.
+            end (date or datetime): The last date of the range.
+
+        Yields:
+            date: The first day of every month overlapping the range.
+        """
+        end = end.date() if isinstance(end, datetime) else end
+        month_start = date(start.year, start.month, 1)
+        while month_start <= end:
+            yield month_start
+            month_start = self.next_month(month_start)
+
+    def ensure_partitions(self, cursor, table_name, start, end):
+        """
+        Creates the monthly partitions covering a date range that do not exist yet.
+
+        Args:
+            cursor (object): A database cursor object.
+            table_name (str): The name of the partitioned table.
+            start (date or datetime): The first date that must be covered.
+            end (date or datetime): The last date that must be covered.
+
+        Returns:
+            int: The number of created partitions.
+        """
+        cursor.execute(SELECT_TABLE_PARTITIONS_QUERY, {'table_name': table_name})
+        existing_partitions = {row[0] for row in cursor.fetchall()}
+
+        created = 0
+        for month_start in self.iter_months(start, end):
+            partition = self.partition_name(table_name, month_start)
+            if partition in existing_partitions:
+                continue
+            cursor.execute(
+                sql.SQL(CREATE_MONTHLY_PARTITION_QUERY).format(
+                    partition=sql.Identifier(partition),
+                    table=sql.Identifier(table_name)
+                ),
+                {'month_start': month_start, 'month_end': self.next_month(month_start)}
+            )
+            created += 1
+
+        if created:
+            logging.info(f"Created {created} monthly partition(s) of {table_name}")
+        return created
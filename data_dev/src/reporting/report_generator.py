@@ -1,4 +1,5 @@
 import pandas as pd
+import pyarrow.dataset as ds
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import plotly.io as pio
@@ -53,10 +54,21 @@ class ReportGenerator:
         """
         Reads the source data from a Parquet file specified in the configuration.
 
+        Only the columns used by the report are read, and only from the two latest monthly partitions:
+        the last loaded week always falls into the month of the last loaded date and the month before it.
+
         Returns:
             pd.DataFrame: The loaded data.
         """
-        return pd.read_parquet(report_generator_config.parquet_files_path)
+        dataset = ds.dataset(report_generator_config.parquet_files_path, format='parquet', partitioning='hive')
+        latest_months = sorted({
+            ds.get_partition_keys(fragment.partition_expression).get('partition_date')
+            for fragment in dataset.get_fragments()
+        } - {None})[-2:]
+        return dataset.to_table(
+            columns=['facility_type', 'visit_date', 'avg_time_spent'],
+            filter=ds.field('partition_date').isin(latest_months) if latest_months else None
+        ).to_pandas()
 
     def transform_data(self):
         """
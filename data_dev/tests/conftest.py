@@ -0,0 +1,53 @@
+import os
+import sys
+from uuid import uuid4
+
+import psycopg2
+import pytest
+
+# data_dev modules import both data_dev.* (from the repository root) and src.* (from data_dev)
+DATA_DEV_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (os.path.dirname(DATA_DEV_DIR), DATA_DEV_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from data_dev.config import postgres_config  # noqa: E402
+
+
+def pytest_addoption(parser):
+    parser.addoption("--db_host", action="store", default=postgres_config.host, help="Database host")
+    parser.addoption("--db_port", action="store", default=str(postgres_config.port), help="Database port")
+    parser.addoption("--db_user", action="store", default=postgres_config.user, help="Database user")
+    parser.addoption("--db_password", action="store", default=postgres_config.password, help="Database password")
+    parser.addoption("--db_maintenance_db", action="store", default="postgres",
+                     help="Database connected to while the scratch database of a test is created and dropped")
+
+
+@pytest.fixture
+def scratch_connection(request):
+    """
+    A connection to an empty database created for the test and dropped after it.
+    The test is skipped when no PostgreSQL server is reachable.
+    """
+    params = {
+        "host": request.config.getoption("--db_host"),
+        "port": request.config.getoption("--db_port"),
+        "user": request.config.getoption("--db_user"),
+        "password": request.config.getoption("--db_password"),
+    }
+    try:
+        admin = psycopg2.connect(dbname=request.config.getoption("--db_maintenance_db"), **params)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL is not available: {e}")
+    admin.autocommit = True
+    db_name = f"data_dev_test_{uuid4().hex}"
+    with admin.cursor() as cursor:
+        cursor.execute(f"CREATE DATABASE {db_name}")
+    conn = psycopg2.connect(dbname=db_name, **params)
+    try:
+        yield conn
+    finally:
+        conn.close()
+        with admin.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS {db_name}")
+        admin.close()
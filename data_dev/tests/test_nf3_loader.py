@@ -0,0 +1,94 @@
+from datetime import datetime
+
+import pytest
+
+from data_dev.config import load_config
+from data_dev.queries import (CREATE_SRC_GENERATED_FACILITIES_TABLE_QUERY,
+                              CREATE_SRC_GENERATED_PATIENTS_TABLE_QUERY,
+                              CREATE_SRC_GENERATED_VISITS_TABLE_QUERY,
+                              INSERT_SRC_GENERATED_FACILITIES_QUERY,
+                              INSERT_SRC_GENERATED_PATIENTS_QUERY,
+                              INSERT_SRC_GENERATED_VISITS_QUERY)
+from data_dev.src.data.nf3_loader import NF3Loader
+
+FIRST_VISIT = datetime(2024, 1, 1, 9, 0)
+ORPHAN_VISIT = datetime(2024, 1, 1, 10, 0)
+LAST_VISIT = datetime(2024, 1, 1, 11, 0)
+
+
+@pytest.fixture
+def cursor(scratch_connection, monkeypatch):
+    monkeypatch.setattr(load_config, "date_scope", "2024-12-31")
+    monkeypatch.setattr(load_config, "visits_lookback_days", 0)
+    with scratch_connection.cursor() as cursor:
+        cursor.execute(CREATE_SRC_GENERATED_FACILITIES_TABLE_QUERY)
+        cursor.execute(CREATE_SRC_GENERATED_PATIENTS_TABLE_QUERY)
+        cursor.execute(CREATE_SRC_GENERATED_VISITS_TABLE_QUERY)
+        NF3Loader.provision_schema(cursor)
+        yield cursor
+
+
+def insert_facility(cursor, facility_id):
+    cursor.execute(INSERT_SRC_GENERATED_FACILITIES_QUERY, {
+        "facility_id": facility_id, "facility_name": f"Facility {facility_id}", "facility_type": "Clinic",
+        "address": "Street 1", "city": "City", "state": "State"})
+
+
+def insert_patient(cursor, patient_id):
+    cursor.execute(INSERT_SRC_GENERATED_PATIENTS_QUERY, {
+        "patient_id": patient_id, "first_name": "First", "last_name": "Last",
+        "date_of_birth": "1990-01-01", "address": "Street 2"})
+
+
+def insert_visit(cursor, patient_id, facility_id, visit_timestamp):
+    cursor.execute(INSERT_SRC_GENERATED_VISITS_QUERY, {
+        "patient_id": patient_id, "facility_id": facility_id, "visit_timestamp": visit_timestamp,
+        "treatment_cost": 100, "duration_minutes": 30})
+
+
+def merge_all(cursor):
+    return {entity: NF3Loader.merge_incremental(cursor, entity) for entity in ("facilities", "patients", "visits")}
+
+
+def visits_watermark(cursor):
+    cursor.execute("SELECT last_loaded_timestamp FROM nf3_load_state WHERE entity = 'visits'")
+    return cursor.fetchone()[0]
+
+
+def test_first_incremental_run_without_watermark(cursor):
+    insert_facility(cursor, 1)
+    insert_patient(cursor, 1)
+    insert_visit(cursor, 1, 1, FIRST_VISIT)
+    insert_visit(cursor, 1, 1, LAST_VISIT)
+
+    assert merge_all(cursor) == {"facilities": 1, "patients": 1, "visits": 2}
+    assert visits_watermark(cursor) == LAST_VISIT
+
+
+def test_late_visit_with_the_watermark_timestamp_is_merged(cursor):
+    insert_facility(cursor, 1)
+    insert_patient(cursor, 1)
+    insert_patient(cursor, 2)
+    insert_visit(cursor, 1, 1, LAST_VISIT)
+    merge_all(cursor)
+
+    insert_visit(cursor, 2, 1, LAST_VISIT)
+
+    assert NF3Loader.merge_incremental(cursor, "visits") == 1
+    assert NF3Loader.merge_incremental(cursor, "visits") == 0
+
+
+def test_visit_of_a_missing_patient_holds_the_watermark(cursor):
+    insert_facility(cursor, 1)
+    insert_patient(cursor, 1)
+    insert_visit(cursor, 1, 1, FIRST_VISIT)
+    insert_visit(cursor, 2, 1, ORPHAN_VISIT)
+    insert_visit(cursor, 1, 1, LAST_VISIT)
+
+    assert merge_all(cursor)["visits"] == 2
+    assert visits_watermark(cursor) == ORPHAN_VISIT
+
+    insert_patient(cursor, 2)
+
+    assert merge_all(cursor)["visits"] == 1
+    assert visits_watermark(cursor) == LAST_VISIT
@@ -0,0 +1,70 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pytest
+
+from data_dev.src.data.parquet_compactor import ParquetCompactor
+
+MONTHS = ['2023-11', '2023-12', '2024-01', '2024-02']
+
+
+@pytest.fixture
+def monthly_dataset(tmp_path):
+    """
+    A dataset with one small file per monthly partition_date partition, like the exports of LoadParquet.
+    """
+    storage_path = tmp_path / 'export'
+    for month in MONTHS:
+        df = pd.DataFrame({'visit_date': pd.to_datetime([f'{month}-01', f'{month}-02']), 'value': [1, 2]})
+        df.assign(partition_date=month).to_parquet(storage_path, partition_cols=['partition_date'], index=False)
+    return str(storage_path)
+
+
+def parquet_files(path):
+    return sorted(os.path.join(root, f) for root, _, files in os.walk(path) for f in files if f.endswith('.parquet'))
+
+
+def read(path):
+    table = ds.dataset(path, format='parquet', partitioning='hive').to_table()
+    return table.to_pandas().sort_values('visit_date', ignore_index=True)
+
+
+def test_compact_keeps_one_file_per_partition(monthly_dataset):
+    stats = ParquetCompactor().compact(monthly_dataset)
+
+    assert (stats['partitions'], stats['files_before'], stats['files_after']) == (4, 4, 4)
+
+
+def test_coalesce_by_year(monthly_dataset, tmp_path):
+    output_path = str(tmp_path / 'coalesced')
+
+    stats = ParquetCompactor().coalesce(monthly_dataset, output_path, granularity='year')
+
+    assert (stats['files_before'], stats['files_after']) == (4, 2)
+    assert sorted(os.listdir(output_path)) == ['partition_year=2023', 'partition_year=2024']
+    coalesced = read(output_path)
+    assert coalesced['partition_date'].tolist() == [month for month in MONTHS for _ in range(2)]
+    assert coalesced['value'].tolist() == read(monthly_dataset)['value'].tolist()
+    # The export tree is left unchanged
+    assert len(parquet_files(monthly_dataset)) == 4
+
+
+def test_coalesce_without_partitions(monthly_dataset, tmp_path):
+    output_path = str(tmp_path / 'coalesced')
+
+    stats = ParquetCompactor().coalesce(monthly_dataset, output_path, granularity='none')
+
+    assert stats['files_after'] == 1
+    assert ds.dataset(output_path, format='parquet').schema.field('partition_date').type == pa.string()
+    assert len(read(output_path)) == 8
+
+
+def test_coalesce_by_year_needs_partition_date(tmp_path):
+    storage_path = tmp_path / 'export'
+    pd.DataFrame({'facility_type': ['Clinic'], 'value': [1]}).to_parquet(
+        storage_path, partition_cols=['facility_type'], index=False)
+
+    with pytest.raises(ValueError):
+        ParquetCompactor().coalesce(str(storage_path), str(tmp_path / 'coalesced'), granularity='year')